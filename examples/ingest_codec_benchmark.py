@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark of upload ingest throughput for each supported compression codec.
+Streams a synthetic CSV through DatasetStore.ingest and reports MB/s of CSV
+data written, the compression ratio and the peak Python memory while ingesting.
+"""
+
+import argparse
+import gzip
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.dataset_store import DatasetStore
+from src.services.upload_codecs import open_upload, zstandard
+
+
+def make_csv(rows: int) -> bytes:
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "region": rng.choice(["north", "south", "east", "west"], rows),
+            "amount": rng.gamma(2.0, 50.0, rows).round(2),
+            "quantity": rng.integers(1, 100, rows),
+            "date": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        }
+    )
+    return frame.to_csv(index=False).encode()
+
+
+def compress(data: bytes) -> dict:
+    uploads = {"data.csv": data, "data.csv.gz": gzip.compress(data)}
+    if zstandard is not None:
+        uploads["data.csv.zst"] = zstandard.ZstdCompressor().compress(data)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("data.csv", data)
+    uploads["data.zip"] = archive.getvalue()
+    return uploads
+
+
+def bench(filename: str, payload: bytes, size: int, repeats: int) -> dict:
+    timings, peaks = [], []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            store = DatasetStore(cache_dir)
+            tracemalloc.start()
+            start = time.perf_counter()
+            store.ingest(open_upload(io.BytesIO(payload), filename))
+            timings.append(time.perf_counter() - start)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "upload": filename,
+        "upload_mb": len(payload) / 1e6,
+        "ratio": size / len(payload),
+        "mb_per_s": size / 1e6 / best,
+        "peak_kb": max(peaks) / 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_csv(args.rows)
+    print(f"CSV: {args.rows:,} rows, {len(data) / 1e6:.1f} MB")
+    if zstandard is None:
+        print("zstandard is not installed; skipping .zst")
+
+    print(f"{'upload':<14}{'size MB':>10}{'ratio':>8}{'MB/s':>10}{'peak KB':>10}")
+    for filename, payload in compress(data).items():
+        result = bench(filename, payload, len(data), args.repeats)
+        print(
+            f"{result['upload']:<14}{result['upload_mb']:>10.1f}"
+            f"{result['ratio']:>8.1f}{result['mb_per_s']:>10.0f}"
+            f"{result['peak_kb']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the local fast-path router against the LLM router.
+Reports how many labelled queries the local router settles on its own, how
+accurate those decisions are and how long they take. With GROQ_API_KEY set it
+also times the LLM router on the same queries to estimate the latency saved.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Time real LLM calls; repeated rounds would otherwise be answered from the
+# response cache
+os.environ["RESPONSE_CACHE"] = "off"
+
+from src.services.local_router import LocalRouter
+
+# (query, csv_loaded, expected agent)
+LABELLED_QUERIES = [
+    ("Hello", False, "CONVERSATION_AGENT"),
+    ("hi there", True, "CONVERSATION_AGENT"),
+    ("How are you?", False, "CONVERSATION_AGENT"),
+    ("What can you do?", False, "CONVERSATION_AGENT"),
+    ("Thanks for your help", True, "CONVERSATION_AGENT"),
+    ("thank you!", False, "CONVERSATION_AGENT"),
+    ("Goodbye", True, "CONVERSATION_AGENT"),
+    ("good morning", False, "CONVERSATION_AGENT"),
+    ("who are you?", False, "CONVERSATION_AGENT"),
+    ("nice to meet you", False, "CONVERSATION_AGENT"),
+    ("SELECT * FROM users", False, "SQL_AGENT"),
+    ("select name, email from customers where active = 1", True, "SQL_AGENT"),
+    ("Write a SQL query to find the top 5 customers by revenue", False, "SQL_AGENT"),
+    ("Generate a query that joins orders and customers", False, "SQL_AGENT"),
+    ("How do I create a table for employees with a primary key?", False, "SQL_AGENT"),
+    ("Give me SQL to delete duplicate rows", False, "SQL_AGENT"),
+    (
+        "Optimize this query: SELECT * FROM orders WHERE id IN (SELECT ...)",
+        False,
+        "SQL_AGENT",
+    ),
+    ("Show me all users", False, "SQL_AGENT"),
+    ("List employees hired after 2020 from the database", False, "SQL_AGENT"),
+    ("Analyze this CSV data", True, "CSV_AGENT"),
+    ("Create a chart from the data", True, "CSV_AGENT"),
+    ("Plot sales by region", True, "CSV_AGENT"),
+    ("What is the average price?", True, "CSV_AGENT"),
+    ("Show me a histogram of ages", True, "CSV_AGENT"),
+    ("Summarize the dataset", True, "CSV_AGENT"),
+    ("Is there a correlation between price and rating?", True, "CSV_AGENT"),
+    ("Which camera is most premium?", True, "CSV_AGENT"),
+    ("Compare these devices", True, "CSV_AGENT"),
+    ("Are there any outliers in the amount column?", True, "CSV_AGENT"),
+    ("visualize the trend of revenue over time", True, "CSV_AGENT"),
+]
+
+
+def bench_local(router: LocalRouter):
+    decided, correct, timings = 0, 0, []
+    for query, csv_loaded, expected in LABELLED_QUERIES:
+        start = time.perf_counter()
+        decision = router.route(query, csv_loaded)
+        timings.append(time.perf_counter() - start)
+        if decision is None:
+            print(f"  -> LLM        {query}")
+            continue
+        decided += 1
+        correct += decision.agent == expected
+        mark = "ok" if decision.agent == expected else f"WRONG (want {expected})"
+        print(f"  {decision.agent:<19}{decision.confidence:.2f} {query}  {mark}")
+    return decided, correct, timings
+
+
+def bench_llm():
+    from src.services.routing_service import IntelligentRoutingService
+
+    service = IntelligentRoutingService()
+    service.settings.local_routing = False
+    correct, timings = 0, []
+    for query, csv_loaded, expected in LABELLED_QUERIES:
+        start = time.perf_counter()
+        decision = service.determine_agent(query, [], csv_loaded)
+        timings.append(time.perf_counter() - start)
+        correct += decision.agent == expected
+    return correct, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--llm",
+        action="store_true",
+        help="also time the LLM router (needs GROQ_API_KEY)",
+    )
+    args = parser.parse_args()
+
+    total = len(LABELLED_QUERIES)
+    print("Local router decisions:")
+    decided, correct, timings = bench_local(LocalRouter())
+    print(
+        f"\nLocal: settled {decided}/{total} ({decided / total:.0%}), "
+        f"{correct}/{decided} correct, "
+        f"median {statistics.median(timings) * 1e6:.0f} us per query"
+    )
+
+    if args.llm and os.getenv("GROQ_API_KEY"):
+        llm_correct, llm_timings = bench_llm()
+        mean_llm = statistics.mean(llm_timings)
+        print(
+            f"LLM:   {llm_correct}/{total} correct, mean {mean_llm * 1000:.0f} ms per query"
+        )
+        print(
+            f"Saved: ~{decided * mean_llm:.1f}s over {total} queries "
+            f"({decided / total:.0%} of routing calls skipped)"
+        )
+    elif args.llm:
+        print("GROQ_API_KEY is not set; skipping the LLM router")
+
+
+if __name__ == "__main__":
+    main()
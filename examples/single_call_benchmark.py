@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+A/B latency benchmark of single-call mode against the two-stage flow.
+The two-stage flow makes the LLM routing call and then the chosen agent's
+call; single-call mode makes one structured call whose result type picks the
+agent. Only the LLM calls are timed, so no kernel or dataset is needed.
+Requires GROQ_API_KEY.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Time real LLM calls; repeated rounds would otherwise be answered from the
+# response cache
+os.environ["RESPONSE_CACHE"] = "off"
+
+from router_benchmark import LABELLED_QUERIES
+from src.services.models import (
+    CSVAnalysisResponse,
+    ConversationResponse,
+    SQLResponse,
+)
+from src.services.routing_service import IntelligentRoutingService
+
+# Shaped like the csv_info of an upload; only the prompts read it, no file is opened
+SAMPLE_CSV_INFO = {
+    "file_path": "sample_data/products.csv",
+    "shape": (6, 4),
+    "columns": ["name", "category", "price", "rating"],
+    "dtypes": {
+        "name": "object",
+        "category": "category",
+        "price": "float64",
+        "rating": "float64",
+    },
+    "sample_data": [
+        {"name": "Alpha Cam", "category": "camera", "price": 499.0, "rating": 4.5},
+        {"name": "Beta Phone", "category": "phone", "price": 799.0, "rating": 4.2},
+    ],
+}
+
+RESULT_AGENTS = {
+    ConversationResponse: "CONVERSATION_AGENT",
+    SQLResponse: "SQL_AGENT",
+    CSVAnalysisResponse: "CSV_AGENT",
+}
+
+
+def two_stage(service: IntelligentRoutingService, query: str, csv_loaded: bool) -> str:
+    csv_info = SAMPLE_CSV_INFO if csv_loaded else None
+    context = service._prepare_routing_context(query, [], csv_loaded)
+    agent = service.routing_agent.run_sync(context).output.agent
+    if agent == "SQL_AGENT":
+        service.sql_agent.run_sync(service._prepare_sql_context(query, [], csv_info))
+    elif agent == "CSV_AGENT":
+        service.csv_agent.run_sync(service._prepare_csv_context(query, csv_info))
+    else:
+        service.conversation_agent.run_sync(query)
+    return agent
+
+
+def single_call(
+    service: IntelligentRoutingService, query: str, csv_loaded: bool
+) -> str:
+    context = service._prepare_combined_context(
+        query, [], SAMPLE_CSV_INFO if csv_loaded else None
+    )
+    output = service.combined_agent.run_sync(context).output
+    return RESULT_AGENTS.get(type(output), "FAILED")
+
+
+def run(name, flow, service, rounds):
+    timings, correct = [], 0
+    for _ in range(rounds):
+        for query, csv_loaded, expected in LABELLED_QUERIES:
+            start = time.perf_counter()
+            try:
+                agent = flow(service, query, csv_loaded)
+            except Exception as e:
+                print(f"  {name} failed on {query!r}: {e}")
+                continue
+            timings.append(time.perf_counter() - start)
+            correct += agent == expected
+    total = rounds * len(LABELLED_QUERIES)
+    print(
+        f"{name:<12} median {statistics.median(timings) * 1000:>6.0f} ms, "
+        f"p90 {statistics.quantiles(timings, n=10)[-1] * 1000:>6.0f} ms, "
+        f"agent accuracy {correct}/{total}"
+    )
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    if not os.getenv("GROQ_API_KEY"):
+        print("GROQ_API_KEY is not set; the benchmark needs real LLM calls")
+        return
+
+    service = IntelligentRoutingService()
+    two = run("two-stage", two_stage, service, args.rounds)
+    one = run("single-call", single_call, service, args.rounds)
+    print(f"Single-call saves {(two - one) * 1000:.0f} ms per message at the median")
+
+
+if __name__ == "__main__":
+    main()
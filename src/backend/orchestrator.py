@@ -2,17 +2,30 @@
 Backend orchestrator for managing application state and services.
 """
 
+import io
+import json
 import uuid
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass
+from typing import BinaryIO, List, Optional, Dict, Any
+from dataclasses import dataclass, field
 
 from src.config.settings import get_settings
-from src.config.constants import WELCOME_MESSAGE, DEFAULT_SESSION_NAME
+from src.config.constants import (
+    WELCOME_MESSAGE,
+    DEFAULT_SESSION_NAME,
+    SQL_PAGE_SIZE,
+)
 from src.services.sql_service import SQLGenerationService
 from src.services.csv_analysis_tools import CSVAnalysisTools
 from src.services.conversation_service import ConversationService
 from src.services.routing_service import IntelligentRoutingService
+from src.services.kernel_pool import get_kernel_pool
+from src.services.dataset_catalog import DatasetCatalog
+from src.services.dataset_store import DatasetStore
+from src.services.response_cache import get_response_cache
+from src.services.semantic_cache import get_semantic_cache
+from src.services.sql_engine import SQLEngine
+from src.services.upload_codecs import UPLOAD_ERRORS, open_upload
 from src.schemas.requests import (
     SQLGenerationRequest,
     ChatMessage,
@@ -33,9 +46,10 @@ class Session:
     created_at: datetime
     messages: List[ChatMessage]
     last_activity: datetime
-    csv_data: Optional[str] = None
-    csv_file_path: Optional[str] = None
+    catalog: DatasetCatalog = field(default_factory=DatasetCatalog)
     csv_info: Optional[Dict[str, Any]] = None
+    sql_engine: Optional[SQLEngine] = None
+    last_agent: Optional[str] = None
 
 
 class BackendOrchestrator:
@@ -44,9 +58,15 @@ class BackendOrchestrator:
         self.sql_service = SQLGenerationService()
         self.csv_tools = CSVAnalysisTools()
         self.conversation_service = ConversationService()
-        self.routing_service = IntelligentRoutingService()
+        self.routing_service = IntelligentRoutingService(
+            csv_service=self.csv_tools.csv_service
+        )
         self.sessions: Dict[str, Session] = {}
         self.max_sessions = self.settings.max_chat_histories
+        self.dataset_store = DatasetStore()
+        self.kernel_pool = get_kernel_pool()
+        self.kernel_pool.warm()
+        self.kernel_pool.jupyter_client.start_reaper()
 
     def create_new_session(self, request: NewChatRequest) -> SessionInfo:
         session_id = str(uuid.uuid4())
@@ -95,53 +115,97 @@ class BackendOrchestrator:
     def delete_session(self, session_id: str) -> bool:
         if session_id in self.sessions:
             self.csv_tools.close_session(session_id)
+            self.dataset_store.release(session_id)
+            if self.sessions[session_id].sql_engine is not None:
+                self.sessions[session_id].sql_engine.close()
             del self.sessions[session_id]
             return True
         return False
 
-    def load_csv_data(self, session_id: str, csv_content: str) -> Dict[str, Any]:
+    def load_csv_data(
+        self, session_id: str, csv_content: str, table_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return self.load_csv_stream(
+            session_id, io.BytesIO(csv_content.encode("utf-8")), table_name=table_name
+        )
+
+    def load_csv_stream(
+        self,
+        session_id: str,
+        stream: BinaryIO,
+        filename: str = "data.csv",
+        table_name: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Add an upload to the session's table catalog without holding it in memory.
+
+        Uploads compressed as .gz, .zst or .zip are decompressed as they stream.
+        The bytes are hashed while they are copied to disk, and each distinct
+        upload is profiled once in bounded memory. The kernel does not parse
+        anything here; a table is loaded when generated code first uses it.
+        """
         session = self.get_session(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
 
-        # Save CSV to file
-        import os
-        import tempfile
-
-        # Create temp directory for this session if it doesn't exist
-        temp_dir = f"/tmp/querypls_session_{session_id}"
-        os.makedirs(temp_dir, exist_ok=True)
-
-        # Save CSV to file
-        csv_file_path = os.path.join(temp_dir, "data.csv")
-        with open(csv_file_path, "w") as f:
-            f.write(csv_content)
-
-        # Store both the content and file path in session
-        session.csv_data = csv_content
-        session.csv_file_path = csv_file_path
-
-        # Get CSV info for context
-        import pandas as pd
-        from io import StringIO
-
-        df = pd.read_csv(StringIO(csv_content))
-
-        session.csv_info = {
-            "file_path": csv_file_path,
-            "shape": df.shape,
-            "columns": list(df.columns),
-            "dtypes": df.dtypes.to_dict(),
-            "sample_data": df.head(3).to_dict("records"),
-        }
+        # Identical uploads share one stored file, cache and profile; compressed
+        # uploads are decompressed while streaming, so they dedupe by content
+        try:
+            dataset = self.dataset_store.ingest(open_upload(stream, filename))
+        except UPLOAD_ERRORS as e:
+            return {"status": "error", "message": str(e)}
+        # Held from the start, so another session releasing the same content
+        # cannot evict it while it is being profiled
+        held = dataset.key in self.dataset_store.session_keys.get(session_id, set())
+        self.dataset_store.acquire(dataset.key, session_id)
+        try:
+            profile = self.dataset_store.profile(dataset)
+        except Exception as e:
+            if not held:
+                self.dataset_store.release(session_id, dataset.key)
+            return {"status": "error", "message": str(e)}
+
+        name = table_name or session.catalog.table_name_for(filename)
+        replaced = session.catalog.add(
+            name,
+            dataset,
+            {
+                "file_path": dataset.source_path,
+                "cache_path": dataset.cache_path if dataset.is_cached else None,
+                "arrow_cache_path": dataset.cache_path,
+                "dataset_key": dataset.key,
+                "shape": profile["shape"],
+                "columns": profile["columns"],
+                "dtypes": profile["dtypes"],
+                # "dtypes" changes to the kernel's once the table is loaded;
+                # these stay fixed for the content
+                "profile_dtypes": profile["dtypes"],
+                "sample_data": profile["sample_data"][:3],
+                "column_stats": profile.get("column_stats", {}),
+                "sketch_path": dataset.sketch_path,
+            },
+        )
+        if replaced and replaced.dataset.key not in {
+            table.dataset.key for table in session.catalog.tables.values()
+        }:
+            self.dataset_store.release(session_id, replaced.dataset.key)
 
+        session.csv_info = session.catalog.csv_info()
         session.last_activity = datetime.now()
 
         return {
             "status": "success",
             "message": "CSV data loaded successfully",
-            "shape": df.shape,
-            "columns": list(df.columns),
+            "table_name": name,
+            "shape": profile["shape"],
+            "columns": profile["columns"],
+            "dtypes": profile["dtypes"],
+            "sample_data": profile["sample_data"],
+            # Tables load lazily, so these stay None until code first uses the
+            # table; the catalog and get_memory_usage report them from then on
+            "memory_bytes": session.catalog.tables[name].info.get("memory_bytes"),
+            "memory_saved_bytes": session.catalog.tables[name].info.get(
+                "memory_saved_bytes"
+            ),
         }
 
     def generate_intelligent_response(
@@ -157,11 +221,35 @@ class BackendOrchestrator:
         )
         session.messages.append(user_message)
 
+        if self.settings.single_call_mode:
+            response_content = self.routing_service.handle_single_call(
+                user_query,
+                session.messages,
+                session.csv_info,
+                session_id if session.csv_info else None,
+                self._sql_engine(session) if session.csv_info else None,
+            )
+            return self._record_response(session, response_content)
+
+        if self.settings.speculative_routing:
+            session.last_agent, response_content = (
+                self.routing_service.handle_speculative(
+                    user_query,
+                    session.messages,
+                    session.csv_info,
+                    session_id if session.csv_info else None,
+                    self._sql_engine(session) if session.csv_info else None,
+                    session.last_agent,
+                )
+            )
+            return self._record_response(session, response_content)
+
         # Determine which agent should handle this query
-        csv_loaded = bool(session.csv_data)
+        csv_loaded = bool(session.csv_info)
         routing_decision = self.routing_service.determine_agent(
             user_query, session.messages, csv_loaded
         )
+        session.last_agent = routing_decision.agent
 
         # Generate response based on routing decision
         if routing_decision.agent == "CONVERSATION_AGENT":
@@ -170,13 +258,16 @@ class BackendOrchestrator:
             )
         elif routing_decision.agent == "SQL_AGENT":
             response_content = self.routing_service.handle_sql_query(
-                user_query, session.messages
+                user_query,
+                session.messages,
+                session.csv_info,
+                self._sql_engine(session) if session.csv_info else None,
             )
         elif routing_decision.agent == "CSV_AGENT":
             # Handle CSV analysis - can work with uploaded CSV or product lists from query
-            if session.csv_data and session.csv_info:
+            if session.csv_info:
                 response_content = self.routing_service.handle_csv_query(
-                    user_query, session.csv_info, session.messages
+                    user_query, session.csv_info, session.messages, session_id
                 )
             else:
                 # Handle product analysis from query without uploaded CSV
@@ -189,6 +280,9 @@ class BackendOrchestrator:
                 user_query
             )
 
+        return self._record_response(session, response_content)
+
+    def _record_response(self, session: Session, response_content: str) -> ChatResponse:
         assistant_message = ChatMessage(
             role="assistant",
             content=response_content,
@@ -201,9 +295,45 @@ class BackendOrchestrator:
             message_id=str(uuid.uuid4()),
             content=response_content,
             timestamp=datetime.now().isoformat(),
-            session_id=session_id,
+            session_id=session.session_id,
         )
 
+    def run_sql(
+        self,
+        session_id: str,
+        sql: str,
+        page: int = 0,
+        page_size: int = SQL_PAGE_SIZE,
+    ) -> Dict[str, Any]:
+        """Run SQL over the session's uploaded tables and return one page of rows.
+
+        Only a single SELECT or WITH query over the uploaded tables is run.
+        """
+        session = self.get_session(session_id)
+        if not session:
+            return {"status": "error", "message": "Session not found"}
+        if not session.csv_info:
+            return {"status": "error", "message": "No tables loaded"}
+
+        try:
+            result = self._sql_engine(session).execute(sql, page, page_size)
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        return {"status": "success", **result.to_dict()}
+
+    def _sql_engine(self, session: Session) -> SQLEngine:
+        """The session's SQL engine, with every catalog table registered."""
+        if session.sql_engine is None:
+            session.sql_engine = SQLEngine()
+        for name, table in session.catalog.tables.items():
+            session.sql_engine.register_table(
+                name,
+                table.info["file_path"],
+                table.info["columns"],
+                table.info["shape"][0],
+            )
+        return session.sql_engine
+
     def get_conversation_history(self, session_id: str) -> ConversationHistory:
         session = self.get_session(session_id)
         if not session:
@@ -214,6 +344,77 @@ class BackendOrchestrator:
     def get_csv_info(self, session_id: str) -> Dict[str, Any]:
         return self.csv_tools.get_csv_info(session_id)
 
+    def get_memory_usage(self, session_id: str) -> Dict[str, Any]:
+        """Report the bytes a session holds in the host, on disk and in its kernel.
+
+        Datasets are shared between sessions with identical uploads, so their
+        on-disk size is also split evenly across the sessions referencing them.
+        """
+        session = self.get_session(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+
+        loaded = self.csv_tools.get_loaded_tables(session_id)
+        tables = []
+        for table in session.catalog.tables.values():
+            shared_by = len(table.dataset.refs)
+            disk_bytes = table.dataset.disk_bytes
+            tables.append(
+                {
+                    "table": table.name,
+                    "dataset_key": table.dataset.key,
+                    "loaded": table.name in loaded,
+                    "disk_bytes": disk_bytes,
+                    "shared_by": shared_by,
+                    "attributed_disk_bytes": (
+                        disk_bytes // shared_by if shared_by else disk_bytes
+                    ),
+                    "memory_bytes": table.info.get("memory_bytes"),
+                    "memory_saved_bytes": table.info.get("memory_saved_bytes"),
+                }
+            )
+
+        return {
+            "session_id": session_id,
+            "messages_bytes": sum(
+                len(message.content.encode("utf-8")) for message in session.messages
+            ),
+            "metadata_bytes": (
+                len(json.dumps(session.csv_info, default=str).encode("utf-8"))
+                if session.csv_info
+                else 0
+            ),
+            "tables": tables,
+            "dataset_disk_bytes": sum(table["disk_bytes"] for table in tables),
+            "attributed_disk_bytes": sum(
+                table["attributed_disk_bytes"] for table in tables
+            ),
+            "kernel_rss_bytes": self.csv_tools.get_kernel_rss(session_id),
+        }
+
+    def get_all_memory_usage(self) -> List[Dict[str, Any]]:
+        return [self.get_memory_usage(session_id) for session_id in self.sessions]
+
+    def get_routing_stats(self) -> Dict[str, Any]:
+        return {
+            **self.routing_service.routing_stats,
+            **self.routing_service.speculation_stats(),
+        }
+
+    def get_response_cache_metrics(self) -> Dict[str, Any]:
+        cache = get_response_cache()
+        return cache.metrics() if cache else {"backend": "off"}
+
+    def get_semantic_cache_metrics(self) -> Dict[str, Any]:
+        cache = get_semantic_cache()
+        return cache.metrics() if cache else {"entries": 0, "enabled": False}
+
+    def get_kernel_pool_metrics(self) -> Dict[str, Any]:
+        return self.kernel_pool.metrics()
+
+    def get_kernel_inventory(self) -> List[Dict[str, Any]]:
+        return self.kernel_pool.jupyter_client.list_kernels()
+
     def health_check(self) -> HealthCheckResponse:
         services_status = {
             "sql_service": "healthy",
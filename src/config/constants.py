@@ -5,9 +5,86 @@ Constants for Querypls application.
 # Application Settings
 MAX_RETRIES = 3
 EXECUTION_TIMEOUT = 30
+MAX_OUTPUT_BYTES = 100_000
 MAX_CHAT_HISTORIES = 6
 STREAMLIT_PORT = 8501
 STREAMLIT_HOST = "localhost"
+SESSION_TEMP_DIR = "/tmp/querypls_session_{session_id}"
+
+# Dataset Cache Settings
+DATASET_CACHE_DIR = "/tmp/querypls_datasets"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Dataset Profile Settings
+PROFILE_CHUNK_ROWS = 100_000
+PROFILE_DTYPE_SAMPLE_ROWS = 10_000
+PROFILE_SAMPLE_ROWS = 5
+
+# Dtype Optimization Settings
+DTYPE_CATEGORY_MAX_RATIO = 0.5
+DTYPE_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$"
+
+# Column Statistics Settings
+STATS_TOP_K = 10
+STATS_TRACKED_VALUES = 1000
+STATS_QUANTILES = (0.25, 0.5, 0.75)
+SKETCH_HLL_PRECISION = 12
+SKETCH_KLL_K = 200
+
+# SQL Engine Settings
+SQL_PAGE_SIZE = 50
+SQL_LOAD_CHUNK_ROWS = 100_000
+SQL_MAX_FIX_ATTEMPTS = 2
+# Generated queries whose plan reads more rows than this are not run
+SQL_MAX_PLANNED_ROWS = 50_000_000
+
+# Local Router Settings
+LOCAL_ROUTER_MIN_CONFIDENCE = 0.75
+SPECULATION_MAX_WORKERS = 4
+
+# Response Cache Settings
+RESPONSE_CACHE_MAX_ENTRIES = 1000
+RESPONSE_CACHE_PATH = "/tmp/querypls_cache/responses.sqlite"
+
+# Semantic SQL Cache Settings
+SEMANTIC_CACHE_PATH = "/tmp/querypls_cache/semantic.sqlite"
+SEMANTIC_CACHE_MAX_ENTRIES = 5000
+SEMANTIC_CACHE_TTL = 7 * 24 * 3600
+SEMANTIC_CACHE_DIMENSIONS = 2048
+
+# Kernel Pool Settings
+KERNEL_POOL_SIZE = 2
+KERNEL_MAX_EXECUTIONS = 100
+KERNEL_HEALTH_CHECK_TIMEOUT = 5
+KERNEL_CHECKOUT_TIMEOUT = 60
+KERNEL_STARTUP_TIMEOUT = 60
+KERNEL_INTERRUPT_TIMEOUT = 5
+KERNEL_SHUTDOWN_TIMEOUT = 5
+KERNEL_IDLE_TTL = 3600
+KERNEL_REAPER_INTERVAL = 60
+
+# Environment variables forwarded into analysis kernels at startup
+KERNEL_ENV_ALLOWLIST = ("TZ", "LANG", "LC_ALL", "MPLBACKEND")
+# Variables the kernel process needs to start; the rest of the app's
+# environment, API keys included, is withheld from it
+KERNEL_PROCESS_ENV = (
+    "PATH",
+    "HOME",
+    "TMPDIR",
+    "PYTHONPATH",
+    "VIRTUAL_ENV",
+    "CONDA_PREFIX",
+    "JUPYTER_PATH",
+    "JUPYTER_CONFIG_DIR",
+    "JUPYTER_DATA_DIR",
+    "JUPYTER_RUNTIME_DIR",
+    "IPYTHONDIR",
+    "MPLCONFIGDIR",
+    "SYSTEMROOT",
+)
+
+# Packages verified once per process in the analysis kernels
+REQUIRED_KERNEL_PACKAGES = ("pandas", "numpy", "matplotlib", "seaborn")
 
 # Streamlit Configuration
 STREAMLIT_CONFIG = {"page_title": "Querypls", "page_icon": "💬", "layout": "wide"}
@@ -19,7 +96,8 @@ DEFAULT_SESSION_NAME = "Default Chat"
 # CSV Analysis Section
 CSV_ANALYSIS_SECTION = "### 📊 CSV Analysis"
 CSV_UPLOAD_LABEL = "Upload CSV File"
-CSV_UPLOAD_HELP = "Upload a CSV file to analyze with Python code"
+CSV_UPLOAD_HELP = "Upload CSV files, plain or compressed as .gz, .zst or .zip, to analyze with Python code"
+CSV_UPLOAD_TYPES = ["csv", "gz", "zst", "zip"]
 CSV_PREVIEW = "📋 CSV Preview"
 CSV_COLUMNS = "**Columns:** {columns}"
 CSV_DTYPES = "**Data Types:** {dtypes}"
@@ -4,10 +4,11 @@ Application settings with environment variable support.
 
 import os
 from typing import Optional, ClassVar
-from pydantic import Field, BaseModel, ConfigDict
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
-class Settings(BaseModel):
+class Settings(BaseSettings):
     groq_api_key: str = Field(
         default=os.getenv("GROQ_API_KEY", "mock_api_key"), env="GROQ_API_KEY"
     )
@@ -15,17 +16,30 @@ class Settings(BaseModel):
     app_version: str = Field(default="1.0.0", env="APP_VERSION")
     max_chat_histories: int = Field(default=5, env="MAX_CHAT_HISTORIES")
     debug_mode: bool = Field(default=False, env="DEBUG_MODE")
+    optimize_dtypes: bool = Field(default=True, env="OPTIMIZE_DTYPES")
+    local_routing: bool = Field(default=True, env="LOCAL_ROUTING")
+    single_call_mode: bool = Field(default=False, env="SINGLE_CALL_MODE")
+    speculative_routing: bool = Field(default=False, env="SPECULATIVE_ROUTING")
+    # One of "memory", "sqlite" or "off"
+    response_cache: str = Field(default="memory", env="RESPONSE_CACHE")
+    response_cache_ttl: int = Field(default=3600, env="RESPONSE_CACHE_TTL")
+    semantic_cache: bool = Field(default=True, env="SEMANTIC_CACHE")
+    semantic_cache_threshold: float = Field(
+        default=0.95, env="SEMANTIC_CACHE_THRESHOLD"
+    )
 
     # Legacy fields for backward compatibility
-    max_tokens: Optional[str] = Field(1000, env="MAX_TOKENS")
-    temperature: Optional[str] = Field(0.7, env="TEMPERATURE")
+    max_tokens: Optional[str] = Field("1000", env="MAX_TOKENS")
+    temperature: Optional[str] = Field("0.7", env="TEMPERATURE")
     log_level: Optional[str] = Field("INFO", env="LOG_LEVEL")
 
     json_schema_extra: ClassVar[str] = "ignore"
 
-    model_config = ConfigDict(
+    # Each field is read from the environment variable of the same name
+    model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
+        extra="ignore",
     )
 
 
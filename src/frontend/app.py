@@ -13,6 +13,7 @@ from src.config.constants import (
     CSV_ANALYSIS_SECTION,
     CSV_UPLOAD_LABEL,
     CSV_UPLOAD_HELP,
+    CSV_UPLOAD_TYPES,
     CSV_PREVIEW,
     CSV_COLUMNS,
     CSV_DTYPES,
@@ -135,33 +136,22 @@ def cleanup_old_images():
 
 
 def upload_csv_file():
-    uploaded_file = st.file_uploader(
-        CSV_UPLOAD_LABEL, type=["csv"], help=CSV_UPLOAD_HELP
+    return st.file_uploader(
+        CSV_UPLOAD_LABEL,
+        type=CSV_UPLOAD_TYPES,
+        help=CSV_UPLOAD_HELP,
+        accept_multiple_files=True,
     )
 
-    if uploaded_file is not None:
-        try:
-            # Reset file pointer to beginning
-            uploaded_file.seek(0)
-            csv_content = uploaded_file.read().decode("utf-8")
-
-            # Reset file pointer again for pandas
-            uploaded_file.seek(0)
-            df = pd.read_csv(uploaded_file)
 
-            st.success(CSV_UPLOAD_SUCCESS.format(shape=df.shape))
+def display_csv_preview(table_name, csv_info):
+    # The preview comes from the stored profile, so the upload is never read here
+    st.success(CSV_UPLOAD_SUCCESS.format(shape=tuple(csv_info["shape"])))
 
-            with st.expander(CSV_PREVIEW):
-                st.dataframe(df.head())
-                st.write(CSV_COLUMNS.format(columns=list(df.columns)))
-                st.write(CSV_DTYPES.format(dtypes=df.dtypes.to_dict()))
-
-            return csv_content
-        except Exception as e:
-            st.error(CSV_UPLOAD_ERROR.format(error=str(e)))
-            return None
-
-    return None
+    with st.expander(f"{CSV_PREVIEW}: {table_name}"):
+        st.dataframe(pd.DataFrame(csv_info["sample_data"], columns=csv_info["columns"]))
+        st.write(CSV_COLUMNS.format(columns=csv_info["columns"]))
+        st.write(CSV_DTYPES.format(dtypes=csv_info["dtypes"]))
 
 
 def main():
@@ -201,23 +191,35 @@ def main():
         st.markdown("---")
         st.markdown(CSV_ANALYSIS_SECTION)
 
-        csv_content = upload_csv_file()
-        if csv_content:
+        uploaded_files = upload_csv_file()
+        if uploaded_files:
             if st.button(LOAD_CSV_BUTTON):
                 try:
                     # Clean up old images before loading new CSV
                     cleanup_old_images()
 
-                    result = orchestrator.load_csv_data(current_session_id, csv_content)
-                    if result["status"] == "success":
+                    # Each file becomes a table named after it in the session's catalog
+                    results = []
+                    for uploaded_file in uploaded_files:
+                        uploaded_file.seek(0)
+                        results.append(orchestrator.load_csv_stream(
+                            current_session_id, uploaded_file, filename=uploaded_file.name
+                        ))
+                    errors = [result["message"] for result in results if result["status"] != "success"]
+                    if not errors:
                         st.success(CSV_LOADED_SUCCESS)
                         st.session_state["csv_loaded"] = True
                         st.rerun()  # Refresh to show updated state
                     else:
-                        st.error(f"❌ Error loading CSV: {result['message']}")
+                        st.error(f"❌ Error loading CSV: {'; '.join(errors)}")
                 except Exception as e:
                     st.error(f"❌ Error: {str(e)}")
 
+        session = orchestrator.get_session(current_session_id)
+        if session:
+            for table_name, table in session.catalog.tables.items():
+                display_csv_preview(table_name, table.info)
+
     display_welcome_message()
     display_messages(current_session_id)
 
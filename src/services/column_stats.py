@@ -0,0 +1,286 @@
+"""
+Column statistics computed at load time and a query API for answering simple questions from them.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.config.constants import STATS_TOP_K, STATS_QUANTILES
+from src.services.sketches import HyperLogLog, KLLSketch, SpaceSaving, hash_values
+
+
+def _format_number(value: float) -> str:
+    if float(value).is_integer():
+        return f"{int(value):,}"
+    return f"{value:,.4f}".rstrip("0").rstrip(".")
+
+
+class ColumnStatsAccumulator:
+    """Vectorized per-column statistics, updated one chunk at a time.
+
+    Counts, nulls, min, max and mean are exact. Distinct counts, quantiles and
+    top values come from HyperLogLog, KLL and space-saving sketches, so memory
+    stays bounded per column; the sketches are kept for later queries.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.count = 0
+        self.nulls = 0
+        self.numeric = True
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.total = 0.0
+        self.hll = HyperLogLog()
+        self.kll = KLLSketch(seed=seed)
+        self.heavy_hitters = SpaceSaving()
+
+    def update(self, series: pd.Series):
+        values = series.dropna()
+        self.count += len(values)
+        self.nulls += len(series) - len(values)
+        if values.empty:
+            return
+
+        self.numeric = (
+            self.numeric
+            and pd.api.types.is_numeric_dtype(values)
+            and not pd.api.types.is_bool_dtype(values)
+        )
+        if self.numeric:
+            array = values.to_numpy(dtype=float)
+            chunk_min, chunk_max = float(array.min()), float(array.max())
+            self.minimum = (
+                chunk_min if self.minimum is None else min(self.minimum, chunk_min)
+            )
+            self.maximum = (
+                chunk_max if self.maximum is None else max(self.maximum, chunk_max)
+            )
+            self.total += float(array.sum())
+            self.kll.update(array)
+
+        self.hll.update(hash_values(values))
+        self.heavy_hitters.update(values)
+
+    def distinct(self) -> Dict[str, Any]:
+        # Until space-saving has had to evict a value it holds every distinct one
+        if self.heavy_hitters.is_exact:
+            return {
+                "distinct": len(self.heavy_hitters.counts),
+                "distinct_is_exact": True,
+            }
+        return {"distinct": self.hll.estimate(), "distinct_is_exact": False}
+
+    def sketches(self) -> Dict[str, Any]:
+        sketches = {
+            "hll": self.hll.to_dict(),
+            "heavy_hitters": self.heavy_hitters.to_dict(),
+        }
+        if self.numeric and self.count:
+            sketches["kll"] = self.kll.to_dict()
+        return sketches
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = {
+            "count": self.count,
+            "nulls": self.nulls,
+            **self.distinct(),
+            "top_values": self.heavy_hitters.top(STATS_TOP_K),
+            "top_values_are_exact": self.heavy_hitters.is_exact,
+        }
+        if self.numeric and self.count:
+            stats.update(
+                {
+                    "min": self.minimum,
+                    "max": self.maximum,
+                    "sum": self.total,
+                    "mean": self.total / self.count,
+                    "quantiles": {
+                        str(q): self.kll.quantile(q) for q in STATS_QUANTILES
+                    },
+                    "quantiles_are_exact": self.kll.is_exact,
+                }
+            )
+        return stats
+
+
+_PERCENTILE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)? percentile\b")
+_STAT_KEYWORDS = [
+    ("mean", r"\b(average|mean|avg)\b"),
+    ("median", r"\bmedian\b"),
+    ("min", r"\b(min|minimum|lowest|smallest)\b"),
+    ("max", r"\b(max|maximum|highest|largest|biggest)\b"),
+    ("sum", r"\b(sum|total)\b"),
+    ("nulls", r"\b(missing|null|nulls|empty|nan)\b"),
+    ("distinct", r"\b(unique|distinct)\b"),
+    ("top_values", r"\b(most common|most frequent|top values|frequent)\b"),
+    ("percentile", _PERCENTILE.pattern),
+]
+_COMPLEX_QUERY = re.compile(
+    r"\b(by|per|group|where|when|for each|plot|chart|graph|show me|compare|"
+    r"correlat\w*|trend|filter|between|and)\b",
+    re.IGNORECASE,
+)
+_ROW_COUNT = re.compile(r"how many (rows|records|entries|lines)")
+_COLUMN_COUNT = re.compile(r"how many columns")
+_WORD = re.compile(r"[a-z_]+|\d+(?:\.\d+)?")
+# Words that frame a question without narrowing it; anything else left over
+# once the statistic and column are removed (a filter, a number, another
+# noun) means the question is not about the whole column
+_FRAME_WORDS = set("""
+    a an are calculate can column compute csv data dataset do does entire field
+    file find get give has have in is me of overall please s table tell the
+    there this value values was what whole you
+    """.split())
+
+
+def _only_frame_words(text: str, *removed: str) -> bool:
+    for pattern in removed:
+        text = re.sub(pattern, " ", text)
+    return all(word in _FRAME_WORDS for word in _WORD.findall(text))
+
+
+class ColumnProfile:
+    """Answers simple questions about a dataset from its precomputed statistics.
+
+    With the dataset's sketches loaded, arbitrary percentiles are answered from
+    the KLL sketch instead of only the stored quartiles.
+    """
+
+    def __init__(
+        self,
+        profile: Dict[str, Any],
+        sketches: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        self.shape = tuple(profile["shape"])
+        self.column_stats: Dict[str, Dict[str, Any]] = profile.get("column_stats", {})
+        self.sketches = sketches or {}
+
+    @property
+    def row_count(self) -> int:
+        return self.shape[0]
+
+    def stat(self, column: str, name: str) -> Any:
+        if name == "median":
+            return self.quantile(column, 0.5)
+        return self.column_stats[column].get(name)
+
+    def quantile(self, column: str, q: float) -> Optional[float]:
+        kll = self.sketches.get(column, {}).get("kll")
+        if kll is not None:
+            return kll.quantile(q)
+        return self.column_stats[column].get("quantiles", {}).get(str(q))
+
+    def summary(self) -> str:
+        """One line of statistics per column, compact enough for a prompt."""
+        lines = []
+        for column, stats in self.column_stats.items():
+            parts = [
+                f"{stats['nulls']:,} missing",
+                f"{'' if stats['distinct_is_exact'] else '~'}{stats['distinct']:,} distinct",
+            ]
+            if "mean" in stats:
+                parts.append(
+                    f"min {_format_number(stats['min'])}, "
+                    f"median {'' if stats['quantiles_are_exact'] else '~'}"
+                    f"{_format_number(stats['quantiles']['0.5'])}, "
+                    f"mean {_format_number(stats['mean'])}, "
+                    f"max {_format_number(stats['max'])}"
+                )
+            else:
+                top = ", ".join(str(value) for value, _ in stats["top_values"][:3])
+                parts.append(f"top values {top}")
+            lines.append(f"- {column}: {'; '.join(parts)}")
+        return "\n".join(lines)
+
+    def find_column(self, question: str) -> Optional[str]:
+        """Return the single column a question mentions, if exactly one matches."""
+        text = question.lower()
+        matches: List[str] = []
+        for column in sorted(self.column_stats, key=len, reverse=True):
+            names = {column.lower(), column.lower().replace("_", " ")}
+            if any(re.search(rf"\b{re.escape(name)}\b", text) for name in names):
+                if not any(column.lower() in other.lower() for other in matches):
+                    matches.append(column)
+        return matches[0] if len(matches) == 1 else None
+
+    def answer(self, question: str) -> Optional[str]:
+        """Answer a simple single-statistic question, or return None.
+
+        Only questions about a whole column are answered; anything that
+        narrows it, such as a filter, a number or another noun, returns None.
+        """
+        text = question.lower().strip()
+        if _COMPLEX_QUERY.search(text):
+            return None
+
+        if _ROW_COUNT.search(text):
+            if not _only_frame_words(text, _ROW_COUNT.pattern):
+                return None
+            return f"The dataset has {self.row_count:,} rows."
+        if _COLUMN_COUNT.search(text):
+            if not _only_frame_words(text, _COLUMN_COUNT.pattern):
+                return None
+            return f"The dataset has {self.shape[1]} columns: {', '.join(self.column_stats)}."
+
+        stats = [name for name, pattern in _STAT_KEYWORDS if re.search(pattern, text)]
+        column = self.find_column(text)
+        if len(stats) != 1 or column is None:
+            return None
+        names = {column.lower(), column.lower().replace("_", " ")}
+        if not _only_frame_words(
+            text,
+            *(pattern for _, pattern in _STAT_KEYWORDS),
+            *(rf"\b{re.escape(name)}\b" for name in names),
+        ):
+            return None
+        if stats[0] == "percentile":
+            return self._format_percentile(
+                int(_PERCENTILE.search(text).group(1)), column
+            )
+        return self._format(stats[0], column)
+
+    def _format_percentile(self, percentile: int, column: str) -> Optional[str]:
+        value = self.quantile(column, percentile / 100)
+        if value is None:
+            return None
+        approximate = not self.column_stats[column].get("quantiles_are_exact", False)
+        return (
+            f"The {percentile}th percentile of `{column}` is "
+            f"{'approximately ' if approximate else ''}{_format_number(value)}."
+        )
+
+    def _format(self, name: str, column: str) -> Optional[str]:
+        value = self.stat(column, name)
+        if value is None:
+            return None
+
+        column_stats = self.column_stats[column]
+        if name == "distinct":
+            prefix = "" if column_stats["distinct_is_exact"] else "about "
+            answer = f"`{column}` has {prefix}{value:,} unique values"
+            if column_stats["distinct_is_exact"] and value <= STATS_TOP_K:
+                values = ", ".join(str(v) for v, _ in column_stats["top_values"])
+                answer += f": {values}"
+            return answer + "."
+        if name == "top_values":
+            values = ", ".join(f"{v} ({count:,})" for v, count in value)
+            if not column_stats.get("top_values_are_exact", True):
+                values += " (approximate counts)"
+            return f"Most common values of `{column}`: {values}."
+        if name == "nulls":
+            return f"`{column}` has {value:,} missing values out of {self.row_count:,} rows."
+
+        labels = {
+            "mean": "average",
+            "median": "median",
+            "min": "minimum",
+            "max": "maximum",
+            "sum": "total",
+        }
+        approximate = name == "median" and not column_stats["quantiles_are_exact"]
+        return (
+            f"The {labels[name]} of `{column}` is "
+            f"{'approximately ' if approximate else ''}{_format_number(value)}."
+        )
@@ -9,7 +9,9 @@ from pydantic_ai.providers.groq import GroqProvider
 
 from src.config.constants import WORST_CASE_SCENARIO
 from src.config.settings import get_settings
+from src.services.local_router import is_conversational
 from src.services.models import ConversationResponse, Failed
+from src.services.response_cache import cached_agent
 from utils.prompt import CONVERSATION_PROMPT
 
 
@@ -22,39 +24,19 @@ class ConversationService:
             provider=GroqProvider(api_key=self.settings.groq_api_key),
         )
 
-        self.conversation_agent = Agent[None, Union[ConversationResponse, Failed]](
-            self.model,
-            output_type=Union[ConversationResponse, Failed],
-            system_prompt=CONVERSATION_PROMPT,
+        self.conversation_agent = cached_agent(
+            Agent[None, Union[ConversationResponse, Failed]](
+                self.model,
+                output_type=Union[ConversationResponse, Failed],
+                system_prompt=CONVERSATION_PROMPT,
+            ),
+            "conversation_agent",
+            CONVERSATION_PROMPT,
         )
 
     def is_conversational_query(self, query: str) -> bool:
         """Check if query is conversational (not SQL/data related)."""
-        conversational_keywords = [
-            "hi",
-            "hello",
-            "hey",
-            "good morning",
-            "good afternoon",
-            "good evening",
-            "how are you",
-            "what's up",
-            "thanks",
-            "thank you",
-            "bye",
-            "goodbye",
-            "help",
-            "what can you do",
-            "who are you",
-            "tell me about yourself",
-            "nice to meet you",
-            "pleasure",
-            "good",
-            "fine",
-            "okay",
-        ]
-        query_lower = query.lower().strip()
-        return any(keyword in query_lower for keyword in conversational_keywords)
+        return is_conversational(query)
 
     def get_conversational_response(self, query: str) -> str:
         """Get a natural response for conversational queries."""
@@ -1,6 +1,6 @@
 import io
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.groq import GroqModel
 from pydantic_ai.providers.groq import GroqProvider
@@ -8,6 +8,7 @@ from pydantic import BaseModel, Field
 
 from src.config.settings import get_settings
 from src.services.jupyter_service import CSVAnalysisService
+from src.services.kernel_pool import get_kernel_pool
 from utils.prompt import CSV_ANALYSIS_PROMPT, CODE_FIX_PROMPT, CSV_AGENT_PROMPT
 
 
@@ -38,7 +39,10 @@ class CodeExecutionResult(BaseModel):
 class CSVAnalysisTools:
     def __init__(self):
         self.settings = get_settings()
-        self.csv_service = CSVAnalysisService()
+        self.csv_service = CSVAnalysisService(
+            kernel_pool=get_kernel_pool(),
+            optimize_dtypes=self.settings.optimize_dtypes,
+        )
 
         self.code_generation_model = GroqModel(
             self.settings.groq_model_name,
@@ -65,6 +69,11 @@ class CSVAnalysisTools:
     def load_csv_data(self, csv_content: str, session_id: str) -> Dict[str, Any]:
         return self.csv_service.load_csv_data(session_id, csv_content)
 
+    def load_csv_file(
+        self, file_path: str, session_id: str, cache_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return self.csv_service.load_csv_file(session_id, file_path, cache_path)
+
     def generate_analysis_code(
         self, user_query: str, csv_context: CSVAnalysisContext
     ) -> PythonCodeResponse:
@@ -118,6 +127,12 @@ Please fix the code to resolve the error and ensure it works correctly.
     def get_csv_info(self, session_id: str) -> Dict[str, Any]:
         return self.csv_service.get_csv_info(session_id)
 
+    def get_loaded_tables(self, session_id: str) -> List[str]:
+        return self.csv_service.loaded_tables(session_id)
+
+    def get_kernel_rss(self, session_id: str) -> Optional[int]:
+        return self.csv_service.kernel_rss(session_id)
+
     def close_session(self, session_id: str):
         self.csv_service.close_session(session_id)
 
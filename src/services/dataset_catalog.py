@@ -0,0 +1,91 @@
+"""
+Per-session catalog of named tables that are loaded into the kernel on demand.
+"""
+
+import keyword
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.services.dataset_store import DatasetHandle
+
+RESERVED_TABLE_NAMES = {"df", "pd", "np", "plt", "sns", "os", "json"}
+
+
+@dataclass
+class CatalogTable:
+    name: str
+    dataset: DatasetHandle
+    info: Dict[str, Any]
+
+
+def _mentions(text: str, name: str) -> bool:
+    return re.search(rf"(?<![\w.]){re.escape(name)}(?!\w)", text) is not None
+
+
+class DatasetCatalog:
+    """Named tables of one session.
+
+    Every table is exposed in the kernel as a DataFrame variable of the same
+    name, and the first table is also ``df``. Nothing is loaded up front: the
+    router loads the tables generated code actually references.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, CatalogTable] = {}
+
+    @property
+    def primary(self) -> Optional[CatalogTable]:
+        return next(iter(self.tables.values()), None)
+
+    def table_name_for(self, filename: str) -> str:
+        """Turn an upload's filename into a usable Python identifier."""
+        stem = os.path.basename(filename).split(".")[0]
+        name = re.sub(r"\W+", "_", stem).strip("_").lower() or "data"
+        if name[0].isdigit() or keyword.iskeyword(name) or name in RESERVED_TABLE_NAMES:
+            name = f"table_{name}"
+        return name
+
+    def add(
+        self, name: str, dataset: DatasetHandle, info: Dict[str, Any]
+    ) -> Optional[CatalogTable]:
+        """Add a table, returning the one it replaces under the same name."""
+        replaced = self.tables.get(name)
+        self.tables[name] = CatalogTable(name, dataset, {**info, "variable": name})
+        return replaced
+
+    def csv_info(self) -> Optional[Dict[str, Any]]:
+        """Describe the primary table, with every table's description under ``tables``."""
+        if self.primary is None:
+            return None
+        return {
+            **self.primary.info,
+            "tables": {name: table.info for name, table in self.tables.items()},
+        }
+
+
+def referenced_tables(code: str, csv_info: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Map each kernel variable the code uses to the table it holds."""
+    tables = csv_info.get("tables", {})
+    referenced = {name: info for name, info in tables.items() if _mentions(code, name)}
+    if _mentions(code, "df") and tables:
+        referenced["df"] = tables[csv_info["variable"]]
+    return referenced
+
+
+def relevant_tables(question: str, csv_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Tables the question names or whose columns it mentions.
+
+    Falls back to the primary table when nothing matches.
+    """
+    tables = csv_info.get("tables", {})
+    text = question.lower()
+    relevant = [
+        info
+        for name, info in tables.items()
+        if _mentions(text, name.lower())
+        or _mentions(text, name.lower().replace("_", " "))
+        or any(_mentions(text, str(column).lower()) for column in info["columns"])
+    ]
+    return relevant or [tables.get(csv_info.get("variable"), csv_info)]
@@ -0,0 +1,84 @@
+"""
+Bounded-memory profiling of uploaded CSV files.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config.constants import (
+    PROFILE_CHUNK_ROWS,
+    PROFILE_DTYPE_SAMPLE_ROWS,
+    PROFILE_SAMPLE_ROWS,
+)
+from src.services.column_stats import ColumnStatsAccumulator
+
+
+def _merge_dtype(current: str, other: str) -> str:
+    if current == other:
+        return current
+    numeric = ("int", "uint", "float")
+    if current.startswith(numeric) and other.startswith(numeric):
+        return "float64"
+    return "object"
+
+
+def profile_csv(
+    file_path: str,
+    chunk_rows: int = PROFILE_CHUNK_ROWS,
+    dtype_sample_rows: int = PROFILE_DTYPE_SAMPLE_ROWS,
+    sample_rows: int = PROFILE_SAMPLE_ROWS,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Profile a CSV without loading it whole.
+
+    Dtypes are inferred from the first ``dtype_sample_rows`` rows and only
+    widened if a later chunk disagrees. Rows are counted chunk by chunk, and
+    the sample rows are a uniform draw from the whole file (bottom-k on random
+    keys), so memory is bounded by ``chunk_rows`` whatever the file size.
+    Column statistics and their sketches are accumulated over the same chunks.
+    """
+    head = pd.read_csv(file_path, nrows=dtype_sample_rows)
+    columns = [str(column) for column in head.columns]
+    dtypes = {str(column): str(dtype) for column, dtype in head.dtypes.items()}
+
+    rng = np.random.default_rng(seed)
+    sample: Optional[pd.DataFrame] = None
+    column_stats = {column: ColumnStatsAccumulator(seed=seed) for column in columns}
+    row_count = 0
+
+    for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+        chunk.index = pd.RangeIndex(row_count, row_count + len(chunk))
+        row_count += len(chunk)
+
+        for column, dtype in chunk.dtypes.items():
+            dtypes[str(column)] = _merge_dtype(dtypes[str(column)], str(dtype))
+            column_stats[str(column)].update(chunk[column])
+
+        chunk = chunk.assign(_sample_key=rng.random(len(chunk)))
+        candidates = chunk.nsmallest(sample_rows, "_sample_key")
+        sample = (
+            candidates
+            if sample is None
+            else pd.concat([sample, candidates]).nsmallest(sample_rows, "_sample_key")
+        )
+
+    if sample is None:
+        sample = head.assign(_sample_key=0.0)
+    sample = sample.sort_index().drop(columns="_sample_key")
+
+    return {
+        "shape": (row_count, len(columns)),
+        "columns": columns,
+        "dtypes": dtypes,
+        "sample_data": json.loads(sample.to_json(orient="records", date_format="iso")),
+        "sample_row_numbers": [int(position) for position in sample.index],
+        "column_stats": {
+            column: stats.to_dict() for column, stats in column_stats.items()
+        },
+        "sketches": {
+            column: stats.sketches() for column, stats in column_stats.items()
+        },
+    }
@@ -0,0 +1,169 @@
+"""
+Dataset store for deduplicating uploaded CSVs and caching them in a columnar format.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple
+
+from src.config.constants import DATASET_CACHE_DIR, HASH_CHUNK_SIZE
+from src.services.dataset_profile import profile_csv
+
+
+@dataclass
+class DatasetHandle:
+    key: str
+    source_path: str
+    cache_path: str
+    profile_path: str
+    sketch_path: str
+    metadata: Optional[Dict[str, Any]] = None
+    refs: Set[str] = field(default_factory=set)
+
+    @property
+    def is_cached(self) -> bool:
+        return os.path.exists(self.cache_path)
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        return (self.source_path, self.cache_path, self.profile_path, self.sketch_path)
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(os.path.getsize(path) for path in self.paths if os.path.exists(path))
+
+
+def hash_file(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Hash a file's contents without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json(path: str, data: Any):
+    staging_path = f"{path}.tmp"
+    with open(staging_path, "w") as f:
+        json.dump(data, f)
+    os.replace(staging_path, path)
+
+
+class DatasetStore:
+    """Keeps one copy of each distinct upload, shared by every session that uses it.
+
+    Uploads are keyed by content hash. Each upload is streamed into the store, so
+    identical uploads share a single source file, a single Arrow IPC cache and a
+    single metadata profile. Sessions hold references; the files are removed when
+    the last session lets go.
+
+    The cache file itself is written by the analysis kernel the first time it
+    parses the CSV, so each distinct upload is parsed only once; later loads
+    memory-map the cache instead.
+    """
+
+    def __init__(self, cache_dir: str = DATASET_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.datasets: Dict[str, DatasetHandle] = {}
+        self.session_keys: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+
+    def ingest(
+        self, stream: BinaryIO, chunk_size: int = HASH_CHUNK_SIZE
+    ) -> DatasetHandle:
+        """Copy an upload stream to disk and hash it in the same pass.
+
+        Only one chunk is held in memory at a time, whatever the upload size.
+        """
+        digest = hashlib.sha256()
+        staging_path = os.path.join(self.cache_dir, f".upload-{uuid.uuid4().hex}")
+        try:
+            with open(staging_path, "wb") as f:
+                for chunk in iter(lambda: stream.read(chunk_size), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+            return self._adopt(staging_path, digest.hexdigest())
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+
+    def acquire(self, key: str, session_id: str) -> DatasetHandle:
+        """Record that a session uses a dataset."""
+        with self._lock:
+            handle = self.datasets[key]
+            handle.refs.add(session_id)
+            self.session_keys.setdefault(session_id, set()).add(key)
+            return handle
+
+    def release(self, session_id: str, key: Optional[str] = None) -> List[str]:
+        """Drop one or all of a session's references, evicting unused datasets."""
+        with self._lock:
+            keys = self.session_keys.get(session_id, set())
+            if key is None:
+                released = list(keys)
+            else:
+                released = [key] if key in keys else []
+            for released_key in released:
+                keys.discard(released_key)
+                handle = self.datasets.get(released_key)
+                if handle is None:
+                    continue
+                handle.refs.discard(session_id)
+                if not handle.refs:
+                    self._evict(handle)
+            if not keys:
+                self.session_keys.pop(session_id, None)
+            return released
+
+    def profile(self, handle: DatasetHandle) -> Dict[str, Any]:
+        """Return the dataset's profile, computing and storing it only once.
+
+        The profile's sketches are written to their own file next to it.
+        """
+        if handle.metadata is None:
+            if os.path.exists(handle.profile_path):
+                with open(handle.profile_path) as f:
+                    metadata = json.load(f)
+                metadata["shape"] = tuple(metadata["shape"])
+            else:
+                metadata = profile_csv(handle.source_path)
+                _write_json(handle.sketch_path, metadata.pop("sketches"))
+                _write_json(handle.profile_path, metadata)
+            handle.metadata = metadata
+        return handle.metadata
+
+    def _adopt(self, source_path: str, key: str) -> DatasetHandle:
+        stored_path = os.path.join(self.cache_dir, f"{key}.csv")
+
+        with self._lock:
+            if os.path.abspath(source_path) != os.path.abspath(stored_path):
+                if os.path.exists(stored_path):
+                    os.remove(source_path)
+                else:
+                    shutil.move(source_path, stored_path)
+
+            handle = self.datasets.get(key)
+            if handle is None:
+                handle = DatasetHandle(
+                    key=key,
+                    source_path=stored_path,
+                    cache_path=os.path.join(self.cache_dir, f"{key}.arrow"),
+                    profile_path=os.path.join(self.cache_dir, f"{key}.profile.json"),
+                    sketch_path=os.path.join(self.cache_dir, f"{key}.sketches.json"),
+                )
+                self.datasets[key] = handle
+            return handle
+
+    def _evict(self, handle: DatasetHandle):
+        del self.datasets[handle.key]
+        for path in handle.paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -3,16 +3,45 @@ Jupyter service for executing Python code with CSV data analysis.
 """
 
 import os
-import io
+import asyncio
+import atexit
 import jupyter_client
 import inspect
+import json
 import time
 import re
-import pandas as pd
-from typing import Dict, Any, Optional
+import queue
+import textwrap
+import threading
+import weakref
+from typing import Dict, Any, List, Optional, Sequence, Set, TYPE_CHECKING
 from dataclasses import dataclass
 
-from src.config.constants import EXECUTION_TIMEOUT, MAX_RETRIES
+from src.config.constants import (
+    EXECUTION_TIMEOUT,
+    MAX_OUTPUT_BYTES,
+    MAX_RETRIES,
+    KERNEL_INTERRUPT_TIMEOUT,
+    KERNEL_HEALTH_CHECK_TIMEOUT,
+    KERNEL_STARTUP_TIMEOUT,
+    KERNEL_SHUTDOWN_TIMEOUT,
+    KERNEL_IDLE_TTL,
+    KERNEL_REAPER_INTERVAL,
+    KERNEL_ENV_ALLOWLIST,
+    KERNEL_PROCESS_ENV,
+    REQUIRED_KERNEL_PACKAGES,
+    SESSION_TEMP_DIR,
+    DTYPE_CATEGORY_MAX_RATIO,
+    DTYPE_DATE_PATTERN,
+)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+if TYPE_CHECKING:
+    from src.services.kernel_pool import KernelPool
 
 
 def clean_error_message(error_msg: str) -> str:
@@ -30,12 +59,192 @@ class ExecutionResult:
     status: str
     error_message: Optional[str] = None
     execution_time: float = 0.0
+    kernel_restarted: bool = False
+
+
+@dataclass
+class EnvironmentStatus:
+    packages: Dict[str, Optional[str]]
+    check_seconds: float
+    skipped_bootstraps: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return all(version is not None for version in self.packages.values())
+
+    @property
+    def missing(self) -> List[str]:
+        return [name for name, version in self.packages.items() if version is None]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "environment_ok": self.ok,
+            "missing_packages": self.missing,
+            "environment_check_seconds": self.check_seconds,
+            "bootstrap_runs_skipped": self.skipped_bootstraps,
+            "estimated_latency_saved_seconds": self.check_seconds
+            * self.skipped_bootstraps,
+        }
+
+
+_environment_status: Optional[EnvironmentStatus] = None
+_environment_lock = threading.Lock()
+
+
+def get_environment_status() -> Optional[EnvironmentStatus]:
+    return _environment_status
+
+
+def build_environment_check_code(
+    packages: Sequence[str] = REQUIRED_KERNEL_PACKAGES,
+) -> str:
+    return f"""
+import importlib as _importlib, json as _json
+_querypls_packages = {{}}
+for _name in {list(packages)!r}:
+    try:
+        _module = _importlib.import_module(_name)
+        _querypls_packages[_name] = getattr(_module, "__version__", "unknown")
+    except ImportError:
+        _querypls_packages[_name] = None
+print(_json.dumps(_querypls_packages))
+del _importlib, _json, _querypls_packages, _name
+"""
+
+
+class _OutputCollector:
+    """Accumulates the iopub messages belonging to one execute request."""
+
+    def __init__(self, msg_id: str, max_output_bytes: int):
+        self.msg_id = msg_id
+        self.max_output_bytes = max_output_bytes
+        self.output: List[str] = []
+        self.output_bytes = 0
+        self.truncated = False
+        self.status = "Success"
+        self.error_message: Optional[str] = None
+
+    def handle(self, msg: Dict[str, Any]) -> bool:
+        """Record a message and return True once the kernel is idle again."""
+        if (
+            "parent_header" not in msg
+            or msg["parent_header"].get("msg_id") != self.msg_id
+        ):
+            return False
+
+        msg_type = msg.get("msg_type", "")
+        content = msg.get("content", {})
+        text = None
+
+        if msg_type == "execute_result":
+            text = str(content.get("data", {}).get("text/plain", ""))
+        elif msg_type == "stream":
+            text = content.get("text", "")
+        elif msg_type == "error":
+            error_traceback = "\n".join(content.get("traceback", []))
+            cleaned_error = clean_error_message(error_traceback)
+            text = f"Error: {cleaned_error}"
+            self.error_message = cleaned_error
+            self.status = "Fail"
+        elif msg_type == "status" and content.get("execution_state") == "idle":
+            return True
+
+        if text is not None and not self.truncated:
+            text_bytes = len(text.encode("utf-8"))
+            if self.output_bytes + text_bytes > self.max_output_bytes:
+                keep = max(self.max_output_bytes - self.output_bytes, 0)
+                text = text.encode("utf-8")[:keep].decode("utf-8", "ignore")
+                self.truncated = True
+            self.output.append(text)
+            self.output_bytes += text_bytes
+        return False
+
+    def fail(self, status: str, error_message: str):
+        self.status = status
+        self.error_message = error_message
+
+    def result(
+        self, start_time: float, kernel_restarted: bool = False
+    ) -> ExecutionResult:
+        output = list(self.output)
+        if self.truncated:
+            output.append(f"... [output truncated after {self.max_output_bytes} bytes]")
+
+        return ExecutionResult(
+            output="\n".join(output).strip(),
+            status=self.status,
+            error_message=self.error_message,
+            execution_time=time.time() - start_time,
+            kernel_restarted=kernel_restarted,
+        )
+
+
+def build_kernel_env(
+    env_allowlist: Sequence[str] = KERNEL_ENV_ALLOWLIST,
+) -> Dict[str, str]:
+    """The environment a kernel process starts with.
+
+    Only the variables the process needs to run and the allowlisted ones are
+    passed on, so secrets in the app's environment never reach generated code.
+    """
+    keys = set(KERNEL_PROCESS_ENV) | set(env_allowlist)
+    return {key: value for key, value in os.environ.items() if key in keys}
+
+
+def build_bootstrap_code(env_allowlist: Sequence[str] = KERNEL_ENV_ALLOWLIST) -> str:
+    """Build the single cell that prepares a fresh kernel.
+
+    Only allowlisted environment variables are forwarded, as kernel globals,
+    together with the common data science imports.
+    """
+    env = {key: os.environ[key] for key in env_allowlist if key in os.environ}
+    return f"""
+globals().update({env!r})
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+"""
 
 
 class SimpleJupyterClient:
-    def __init__(self):
+    def __init__(self, env_allowlist: Optional[Sequence[str]] = None):
+        self.env_allowlist = (
+            KERNEL_ENV_ALLOWLIST if env_allowlist is None else env_allowlist
+        )
+        self.bootstrap_code = build_bootstrap_code(self.env_allowlist)
         self.clients: Dict[str, Any] = {}
+        self.kernel_managers: Dict[str, Any] = {}
         self.globals: Dict[str, Dict[str, Any]] = {}
+        self.execution_counts: Dict[str, int] = {}
+        self.created_at: Dict[str, float] = {}
+        self.last_used: Dict[str, float] = {}
+        self.startup_times: Dict[str, Dict[str, float]] = {}
+        # Sessions held by the kernel pool; waiting idle is their job, so the
+        # reaper leaves them to the pool's own health checks
+        self.pinned: Set[str] = set()
+        self._lock = threading.RLock()
+        self._reaper_thread: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        _live_clients.add(self)
+
+    def _start_kernel(self, kernel_name: Optional[str] = None):
+        km = (
+            jupyter_client.KernelManager(kernel_name=kernel_name)
+            if kernel_name
+            else jupyter_client.KernelManager()
+        )
+        km.shutdown_wait_time = KERNEL_SHUTDOWN_TIMEOUT
+        km.start_kernel(env=build_kernel_env(self.env_allowlist))
+        try:
+            client = km.client()
+            client.start_channels()
+            client.wait_for_ready(timeout=KERNEL_STARTUP_TIMEOUT)
+            return km, client
+        except Exception:
+            # Never leave a half-started kernel process behind
+            km.shutdown_kernel(now=True)
+            raise
 
     def create_new_session(
         self, session_id: str = "default", kernel_name: str = "querypls"
@@ -43,95 +252,157 @@ class SimpleJupyterClient:
         if session_id in self.clients:
             return session_id
 
+        start_time = time.time()
         try:
-            km = jupyter_client.KernelManager(kernel_name=kernel_name)
-            km.start_kernel()
-            client = km.client()
-            self.clients[session_id] = client
-            self.globals[session_id] = {}
-
-            # Set environment variables
-            for key, value in os.environ.items():
-                self.execute_code(f"{key} = '{value}'", session_id)
-
-            # Import common data science libraries
-            self.execute_code("import pandas as pd", session_id)
-            self.execute_code("import numpy as np", session_id)
-            self.execute_code("import matplotlib.pyplot as plt", session_id)
-            self.execute_code("import seaborn as sns", session_id)
-
-            return session_id
+            km, client = self._start_kernel(kernel_name)
         except Exception as e:
             # Fallback to default kernel
             try:
-                km = jupyter_client.KernelManager()
-                km.start_kernel()
-                client = km.client()
-                self.clients[session_id] = client
-                self.globals[session_id] = {}
-
-                # Set environment variables
-                for key, value in os.environ.items():
-                    self.execute_code(f"{key} = '{value}'", session_id)
-
-                # Import common data science libraries
-                self.execute_code("import pandas as pd", session_id)
-                self.execute_code("import numpy as np", session_id)
-                self.execute_code("import matplotlib.pyplot as plt", session_id)
-                self.execute_code("import seaborn as sns", session_id)
-
-                return session_id
+                km, client = self._start_kernel()
             except Exception as e2:
                 raise ValueError(f"Failed to create kernel: {str(e2)}")
+        kernel_ready_time = time.time()
+
+        with self._lock:
+            self.clients[session_id] = client
+            self.kernel_managers[session_id] = km
+            self.globals[session_id] = {}
+            self.execution_counts[session_id] = 0
+            self.created_at[session_id] = kernel_ready_time
+            self.last_used[session_id] = kernel_ready_time
+
+        # Forward allowlisted environment variables and import common
+        # data science libraries in a single round trip
+        result = self.execute_code(self.bootstrap_code, session_id)
+        if result.status != "Success":
+            print(f"Kernel bootstrap failed: {result.error_message}")
+
+        self.execution_counts[session_id] = 0
+        self.startup_times[session_id] = {
+            "kernel_start_seconds": kernel_ready_time - start_time,
+            "bootstrap_seconds": time.time() - kernel_ready_time,
+            "total_seconds": time.time() - start_time,
+        }
+        return session_id
+
+    def execute_code(
+        self,
+        code: str,
+        session_id: str = "default",
+        timeout: float = EXECUTION_TIMEOUT,
+        max_output_bytes: int = MAX_OUTPUT_BYTES,
+    ) -> ExecutionResult:
+        """Run code in a session's kernel, enforcing a wall-clock deadline.
 
-    def execute_code(self, code: str, session_id: str = "default") -> ExecutionResult:
+        When the deadline passes the kernel is interrupted, and restarted if the
+        interrupt does not bring it back to idle. Output past ``max_output_bytes``
+        is dropped.
+        """
         if session_id not in self.clients:
             raise ValueError(f"Session {session_id} not found")
 
         client = self.clients[session_id]
         start_time = time.time()
+        self.execution_counts[session_id] = self.execution_counts.get(session_id, 0) + 1
+        self.last_used[session_id] = start_time
 
-        msg_id = client.execute(code)
-        output = []
-        timeout = time.time() + EXECUTION_TIMEOUT
-        status = "Success"
-        error_message = None
+        collector = _OutputCollector(client.execute(code), max_output_bytes)
+        deadline = start_time + timeout
+        kernel_restarted = False
 
         while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                collector.fail(
+                    "Timeout", f"Execution timed out after {timeout} seconds"
+                )
+                kernel_restarted = not self._interrupt(session_id, collector.msg_id)
+                break
+
             try:
-                msg = client.get_iopub_msg(timeout=1)
-                if (
-                    "parent_header" not in msg
-                    or msg["parent_header"].get("msg_id") != msg_id
-                ):
-                    continue
-
-                msg_type = msg.get("msg_type", "")
-                content = msg.get("content", {})
-
-                if msg_type == "execute_result":
-                    output.append(str(content.get("data", {}).get("text/plain", "")))
-                elif msg_type == "stream":
-                    output.append(content.get("text", ""))
-                elif msg_type == "error":
-                    error_traceback = "\n".join(content.get("traceback", []))
-                    cleaned_error = clean_error_message(error_traceback)
-                    output.append(f"Error: {cleaned_error}")
-                    error_message = cleaned_error
-                    status = "Fail"
-                elif msg_type == "status" and content.get("execution_state") == "idle":
+                msg = client.get_iopub_msg(timeout=min(1, remaining))
+            except queue.Empty:
+                if not self._is_alive(session_id):
+                    collector.fail("Fail", "Kernel died during execution")
                     break
+                continue
             except Exception as e:
-                pass
+                collector.fail("Fail", f"Lost connection to kernel: {str(e)}")
+                break
 
-        execution_time = time.time() - start_time
+            if collector.handle(msg):
+                break
 
-        return ExecutionResult(
-            output="\n".join(output).strip(),
-            status=status,
-            error_message=error_message,
-            execution_time=execution_time,
-        )
+        return collector.result(start_time, kernel_restarted)
+
+    def _is_alive(self, session_id: str) -> bool:
+        km = self.kernel_managers.get(session_id)
+        try:
+            return km is None or km.is_alive()
+        except Exception:
+            return False
+
+    def _interrupt(self, session_id: str, msg_id: str) -> bool:
+        """Interrupt a runaway execution, restarting the kernel if that fails.
+
+        Returns True if the interrupt brought the kernel back to idle.
+        """
+        km = self.kernel_managers.get(session_id)
+        client = self.clients[session_id]
+        if km is None:
+            return False
+
+        try:
+            km.interrupt_kernel()
+            deadline = time.time() + KERNEL_INTERRUPT_TIMEOUT
+            while time.time() < deadline:
+                try:
+                    msg = client.get_iopub_msg(
+                        timeout=max(deadline - time.time(), 0.01)
+                    )
+                except queue.Empty:
+                    break
+                if (
+                    msg.get("parent_header", {}).get("msg_id") == msg_id
+                    and msg.get("msg_type") == "status"
+                    and msg.get("content", {}).get("execution_state") == "idle"
+                ):
+                    return True
+        except Exception as e:
+            print(f"Kernel interrupt failed: {e}")
+
+        self.restart_session(session_id)
+        return False
+
+    def restart_session(self, session_id: str):
+        """Restart a session's kernel in place and run the bootstrap again."""
+        km = self.kernel_managers[session_id]
+        client = self.clients[session_id]
+        km.restart_kernel(now=True)
+        client.wait_for_ready(timeout=KERNEL_STARTUP_TIMEOUT)
+        self.globals[session_id] = {}
+        self.execute_code(self.bootstrap_code, session_id)
+
+    def ping(
+        self, session_id: str = "default", timeout: float = KERNEL_HEALTH_CHECK_TIMEOUT
+    ) -> bool:
+        """Check that the kernel answers a kernel_info request within the timeout."""
+        if session_id not in self.clients:
+            return False
+
+        client = self.clients[session_id]
+        deadline = time.time() + timeout
+        try:
+            msg_id = client.kernel_info()
+            while time.time() < deadline:
+                reply = client.get_shell_msg(timeout=max(deadline - time.time(), 0.01))
+                if reply.get("parent_header", {}).get("msg_id") == msg_id:
+                    return reply.get("content", {}).get("status") == "ok"
+        except queue.Empty:
+            return False
+        except Exception:
+            return False
+        return False
 
     def import_function(self, func, session_id: str = "default") -> ExecutionResult:
         if session_id not in self.globals:
@@ -146,101 +417,681 @@ class SimpleJupyterClient:
 
         return result
 
-    def close_session(self, session_id: str = "default"):
+    def close_session(self, session_id: str = "default", now: bool = False):
+        """Stop the session's channels and shut its kernel down.
+
+        A graceful shutdown request is tried first; if the kernel does not exit
+        within ``KERNEL_SHUTDOWN_TIMEOUT`` it is killed.
+        """
+        with self._lock:
+            if (
+                session_id not in self.clients
+                and session_id not in self.kernel_managers
+            ):
+                raise ValueError(f"Session {session_id} not found")
+
+            client = self.clients.pop(session_id, None)
+            km = self.kernel_managers.pop(session_id, None)
+            self.globals.pop(session_id, None)
+            self.execution_counts.pop(session_id, None)
+            self.created_at.pop(session_id, None)
+            self.last_used.pop(session_id, None)
+            self.startup_times.pop(session_id, None)
+            self.pinned.discard(session_id)
+
+        if client is not None:
+            client.stop_channels()
+        if km is not None:
+            self._shutdown_kernel(km, now)
+
+    def _shutdown_kernel(self, km, now: bool = False):
+        try:
+            km.shutdown_kernel(now=now)
+        except Exception as e:
+            print(f"Graceful kernel shutdown failed: {e}")
+        try:
+            if km.is_alive():
+                km.shutdown_kernel(now=True)
+        except Exception as e:
+            print(f"Forced kernel shutdown failed: {e}")
+
+    def close_all_sessions(self, now: bool = False):
+        for session_id in list(self.kernel_managers.keys()):
+            self.close_session(session_id, now=now)
+
+    def list_kernels(self) -> List[Dict[str, Any]]:
+        """Report every kernel this client owns with its PID, RSS and age."""
+        inventory = []
+        current_time = time.time()
+        with self._lock:
+            sessions = list(self.kernel_managers.items())
+
+        for session_id, km in sessions:
+            pid = _kernel_pid(km)
+            try:
+                alive = km.is_alive()
+            except Exception:
+                alive = False
+            inventory.append(
+                {
+                    "session_id": session_id,
+                    "pid": pid,
+                    "rss_bytes": _process_rss(pid),
+                    "alive": alive,
+                    "age_seconds": current_time
+                    - self.created_at.get(session_id, current_time),
+                    "idle_seconds": current_time
+                    - self.last_used.get(session_id, current_time),
+                    "executions": self.execution_counts.get(session_id, 0),
+                    "startup_seconds": self.startup_times.get(session_id, {}).get(
+                        "total_seconds"
+                    ),
+                }
+            )
+        return inventory
+
+    def verify_environment(self, session_id: str = "default") -> EnvironmentStatus:
+        """Check once per process that the analysis packages import in the kernel.
+
+        The result is cached, so analysis executions never need to run an
+        install or import bootstrap of their own.
+        """
+        global _environment_status
+        with _environment_lock:
+            if _environment_status is not None:
+                return _environment_status
+
+            result = self.execute_code(build_environment_check_code(), session_id)
+            try:
+                packages = json.loads(result.output.splitlines()[-1])
+            except (ValueError, IndexError):
+                packages = {name: None for name in REQUIRED_KERNEL_PACKAGES}
+
+            _environment_status = EnvironmentStatus(
+                packages=packages, check_seconds=result.execution_time
+            )
+            if not _environment_status.ok:
+                print(
+                    f"Analysis kernel is missing packages: {_environment_status.missing}"
+                )
+            return _environment_status
+
+    def get_startup_metrics(self) -> Dict[str, Any]:
+        """Summarize how long the live kernels took to start and bootstrap."""
+        with self._lock:
+            timings = list(self.startup_times.values())
+
+        metrics: Dict[str, Any] = {"kernels": len(timings)}
+        for key in ("kernel_start_seconds", "bootstrap_seconds", "total_seconds"):
+            values = [timing[key] for timing in timings]
+            metrics[f"avg_{key}"] = sum(values) / len(values) if values else 0.0
+            metrics[f"max_{key}"] = max(values) if values else 0.0
+        return metrics
+
+    def reap_kernels(self, idle_ttl: float = KERNEL_IDLE_TTL) -> List[str]:
+        """Shut down dead, orphaned and idle kernels and return their session ids.
+
+        Pinned sessions are skipped.
+        """
+        current_time = time.time()
+        reaped = []
+        with self._lock:
+            session_ids = (set(self.kernel_managers) | set(self.clients)) - self.pinned
+
+        for session_id in session_ids:
+            km = self.kernel_managers.get(session_id)
+            orphaned = km is None or session_id not in self.clients
+            try:
+                dead = km is not None and not km.is_alive()
+            except Exception:
+                dead = True
+            idle = current_time - self.last_used.get(session_id, current_time)
+
+            if orphaned or dead or idle > idle_ttl:
+                try:
+                    self.close_session(session_id, now=orphaned or dead)
+                    reaped.append(session_id)
+                except ValueError:
+                    pass
+        return reaped
+
+    def start_reaper(
+        self,
+        interval: float = KERNEL_REAPER_INTERVAL,
+        idle_ttl: float = KERNEL_IDLE_TTL,
+    ):
+        """Reap dead and idle kernels periodically on a background thread."""
+        if self._reaper_thread and self._reaper_thread.is_alive():
+            return
+
+        def run():
+            while not self._reaper_stop.wait(interval):
+                try:
+                    reaped = self.reap_kernels(idle_ttl)
+                    if reaped:
+                        print(f"Reaped kernels: {reaped}")
+                except Exception as e:
+                    print(f"Kernel reaper failed: {e}")
+
+        self._reaper_stop.clear()
+        self._reaper_thread = threading.Thread(target=run, daemon=True)
+        self._reaper_thread.start()
+
+    def stop_reaper(self):
+        self._reaper_stop.set()
+        self._reaper_thread = None
+
+
+class AsyncJupyterClient:
+    """Asyncio variant of SimpleJupyterClient.
+
+    Executions for many sessions can be awaited concurrently on one event loop
+    instead of tying up a thread each. Executions on the same session are
+    serialized so they never consume each other's iopub messages.
+    """
+
+    def __init__(self, env_allowlist: Optional[Sequence[str]] = None):
+        self.env_allowlist = (
+            KERNEL_ENV_ALLOWLIST if env_allowlist is None else env_allowlist
+        )
+        self.bootstrap_code = build_bootstrap_code(self.env_allowlist)
+        self.clients: Dict[str, Any] = {}
+        self.kernel_managers: Dict[str, Any] = {}
+        self.execution_counts: Dict[str, int] = {}
+        self.startup_times: Dict[str, Dict[str, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def _start_kernel(self, kernel_name: Optional[str] = None):
+        km = (
+            jupyter_client.AsyncKernelManager(kernel_name=kernel_name)
+            if kernel_name
+            else jupyter_client.AsyncKernelManager()
+        )
+        km.shutdown_wait_time = KERNEL_SHUTDOWN_TIMEOUT
+        await km.start_kernel(env=build_kernel_env(self.env_allowlist))
+        try:
+            client = km.client()
+            client.start_channels()
+            await client.wait_for_ready(timeout=KERNEL_STARTUP_TIMEOUT)
+            return km, client
+        except Exception:
+            await km.shutdown_kernel(now=True)
+            raise
+
+    async def create_new_session(
+        self, session_id: str = "default", kernel_name: str = "querypls"
+    ) -> str:
+        if session_id in self.clients:
+            return session_id
+
+        start_time = time.time()
+        try:
+            km, client = await self._start_kernel(kernel_name)
+        except Exception as e:
+            try:
+                km, client = await self._start_kernel()
+            except Exception as e2:
+                raise ValueError(f"Failed to create kernel: {str(e2)}")
+        kernel_ready_time = time.time()
+
+        self.clients[session_id] = client
+        self.kernel_managers[session_id] = km
+        self.execution_counts[session_id] = 0
+        self._locks[session_id] = asyncio.Lock()
+
+        result = await self.execute_code(self.bootstrap_code, session_id)
+        if result.status != "Success":
+            print(f"Kernel bootstrap failed: {result.error_message}")
+
+        self.execution_counts[session_id] = 0
+        self.startup_times[session_id] = {
+            "kernel_start_seconds": kernel_ready_time - start_time,
+            "bootstrap_seconds": time.time() - kernel_ready_time,
+            "total_seconds": time.time() - start_time,
+        }
+        return session_id
+
+    async def execute_code(
+        self,
+        code: str,
+        session_id: str = "default",
+        timeout: float = EXECUTION_TIMEOUT,
+        max_output_bytes: int = MAX_OUTPUT_BYTES,
+    ) -> ExecutionResult:
         if session_id not in self.clients:
             raise ValueError(f"Session {session_id} not found")
 
+        async with self._locks[session_id]:
+            return await self._execute(code, session_id, timeout, max_output_bytes)
+
+    async def _execute(
+        self,
+        code: str,
+        session_id: str,
+        timeout: float = EXECUTION_TIMEOUT,
+        max_output_bytes: int = MAX_OUTPUT_BYTES,
+    ) -> ExecutionResult:
+        client = self.clients[session_id]
+        start_time = time.time()
+        self.execution_counts[session_id] += 1
+
+        collector = _OutputCollector(client.execute(code), max_output_bytes)
+        deadline = start_time + timeout
+        kernel_restarted = False
+
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                collector.fail(
+                    "Timeout", f"Execution timed out after {timeout} seconds"
+                )
+                kernel_restarted = not await self._interrupt(
+                    session_id, collector.msg_id
+                )
+                break
+
+            try:
+                msg = await client.get_iopub_msg(timeout=min(1, remaining))
+            except queue.Empty:
+                if not await self.kernel_managers[session_id].is_alive():
+                    collector.fail("Fail", "Kernel died during execution")
+                    break
+                continue
+            except Exception as e:
+                collector.fail("Fail", f"Lost connection to kernel: {str(e)}")
+                break
+
+            if collector.handle(msg):
+                break
+
+        return collector.result(start_time, kernel_restarted)
+
+    async def _interrupt(self, session_id: str, msg_id: str) -> bool:
+        km = self.kernel_managers[session_id]
         client = self.clients[session_id]
+
+        try:
+            await km.interrupt_kernel()
+            deadline = time.time() + KERNEL_INTERRUPT_TIMEOUT
+            while time.time() < deadline:
+                try:
+                    msg = await client.get_iopub_msg(
+                        timeout=max(deadline - time.time(), 0.01)
+                    )
+                except queue.Empty:
+                    break
+                if (
+                    msg.get("parent_header", {}).get("msg_id") == msg_id
+                    and msg.get("msg_type") == "status"
+                    and msg.get("content", {}).get("execution_state") == "idle"
+                ):
+                    return True
+        except Exception as e:
+            print(f"Kernel interrupt failed: {e}")
+
+        await km.restart_kernel(now=True)
+        await client.wait_for_ready(timeout=KERNEL_STARTUP_TIMEOUT)
+        # The session lock is already held by the timed-out execution
+        await self._execute(self.bootstrap_code, session_id)
+        return False
+
+    async def close_session(self, session_id: str = "default", now: bool = False):
+        if session_id not in self.clients:
+            raise ValueError(f"Session {session_id} not found")
+
+        client = self.clients.pop(session_id)
+        km = self.kernel_managers.pop(session_id)
+        self.execution_counts.pop(session_id, None)
+        self.startup_times.pop(session_id, None)
+        self._locks.pop(session_id, None)
+
         client.stop_channels()
-        del self.clients[session_id]
-        del self.globals[session_id]
+        try:
+            await km.shutdown_kernel(now=now)
+        except Exception as e:
+            print(f"Graceful kernel shutdown failed: {e}")
+        try:
+            if await km.is_alive():
+                await km.shutdown_kernel(now=True)
+        except Exception as e:
+            print(f"Forced kernel shutdown failed: {e}")
+
+    async def close_all_sessions(self, now: bool = False):
+        await asyncio.gather(
+            *(self.close_session(session_id, now) for session_id in list(self.clients))
+        )
 
-    def close_all_sessions(self):
-        for session_id in list(self.clients.keys()):
-            self.close_session(session_id)
+
+def _kernel_pid(km) -> Optional[int]:
+    provisioner = getattr(km, "provisioner", None)
+    pid = getattr(provisioner, "pid", None)
+    if pid is None:
+        pid = getattr(getattr(km, "kernel", None), "pid", None)
+    return pid
+
+
+def _process_rss(pid: Optional[int]) -> Optional[int]:
+    if pid is None:
+        return None
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except Exception:
+            return None
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_live_clients: "weakref.WeakSet[SimpleJupyterClient]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_live_clients():
+    for client in list(_live_clients):
+        client.stop_reaper()
+        client.close_all_sessions(now=True)
+
+
+def build_dtype_optimization_code(
+    frame: str = "df",
+    category_max_ratio: float = DTYPE_CATEGORY_MAX_RATIO,
+    date_pattern: str = DTYPE_DATE_PATTERN,
+) -> str:
+    """Build the kernel code that shrinks a parsed DataFrame in place.
+
+    ISO date strings become datetimes and low-cardinality strings become
+    ``category``. Numeric columns keep their parsed 64-bit types: narrower ones
+    make generated arithmetic overflow or lose precision without an error.
+    """
+    return f"""
+_memory_before = int({frame}.memory_usage(deep=True).sum())
+for _column in {frame}.columns:
+    _series = {frame}[_column]
+    if pd.api.types.is_object_dtype(_series) or pd.api.types.is_string_dtype(_series):
+        _values = _series.dropna()
+        if len(_values) and _values.astype(str).str.match({date_pattern!r}).all():
+            {frame}[_column] = pd.to_datetime(_series, format="ISO8601")
+        elif len(_values) and _series.nunique() <= {category_max_ratio!r} * len(_series):
+            {frame}[_column] = _series.astype("category")
+_memory_saved = _memory_before - int({frame}.memory_usage(deep=True).sum())
+for _name in ("_column", "_series", "_values", "_memory_before"):
+    globals().pop(_name, None)
+"""
 
 
 class CSVAnalysisService:
-    def __init__(self):
-        self.jupyter_client = SimpleJupyterClient()
-        self.csv_data: Dict[str, pd.DataFrame] = {}
-        self.csv_headers: Dict[str, list] = {}
+    def __init__(
+        self,
+        jupyter_client: Optional[SimpleJupyterClient] = None,
+        kernel_pool: Optional["KernelPool"] = None,
+        async_client: Optional[AsyncJupyterClient] = None,
+        optimize_dtypes: bool = False,
+    ):
+        self.kernel_pool = kernel_pool
+        self.optimize_dtypes = optimize_dtypes
+        self.async_client = async_client or AsyncJupyterClient()
+        self.jupyter_client = jupyter_client or (
+            kernel_pool.jupyter_client if kernel_pool else SimpleJupyterClient()
+        )
+        self.kernel_sessions: Dict[str, str] = {}
+        # Per session, keyed by the kernel variable each table is loaded into
+        self.load_code: Dict[str, Dict[str, str]] = {}
+        self.csv_metadata: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def _ensure_kernel(self, session_id: str) -> str:
+        """Return the kernel bound to a session, taking a warm one if needed."""
+        if self.has_session(session_id):
+            return self.kernel_sessions[session_id]
+
+        if self.kernel_pool:
+            kernel_session_id = self.kernel_pool.take().session_id
+        else:
+            kernel_session_id = self.jupyter_client.create_new_session(session_id)
+
+        self.kernel_sessions[session_id] = kernel_session_id
+        return kernel_session_id
+
+    def _kernel_session(self, session_id: str) -> str:
+        return self.kernel_sessions.get(session_id, session_id)
+
+    def verify_environment(self, session_id: str) -> EnvironmentStatus:
+        return self.jupyter_client.verify_environment(self._kernel_session(session_id))
+
+    def has_session(self, session_id: str) -> bool:
+        kernel_session_id = self.kernel_sessions.get(session_id)
+        return kernel_session_id in self.jupyter_client.clients
+
+    def kernel_rss(self, session_id: str) -> Optional[int]:
+        """Resident memory of the kernel bound to a session, if it has one."""
+        if not self.has_session(session_id):
+            return None
+        km = self.jupyter_client.kernel_managers.get(self.kernel_sessions[session_id])
+        return _process_rss(_kernel_pid(km)) if km else None
 
     def load_csv_data(
         self, session_id: str, csv_content: str, filename: str = "data.csv"
     ) -> Dict[str, Any]:
         try:
-            self.jupyter_client.create_new_session(session_id)
+            file_path = self._write_csv(session_id, csv_content, filename)
+        except OSError as e:
+            return {"status": "error", "message": str(e)}
+        return self.load_csv_file(session_id, file_path)
 
-            csv_code = f"""
-import pandas as pd
-import io
-
-csv_content = '''{csv_content}'''
-df = pd.read_csv(io.StringIO(csv_content))
-print("CSV loaded successfully!")
-print(f"Shape: {{df.shape}}")
-print("\\nColumns:")
-print(df.columns.tolist())
-print("\\nFirst few rows:")
-print(df.head())
-"""
+    def load_csv_file(
+        self,
+        session_id: str,
+        file_path: str,
+        cache_path: Optional[str] = None,
+        variable: str = "df",
+    ) -> Dict[str, Any]:
+        """Have the session's kernel read the CSV from disk into ``variable``.
 
-            result = self.jupyter_client.execute_code(csv_code, session_id)
+        The file is parsed once, inside the kernel; only lightweight metadata
+        comes back to the host. With a ``cache_path`` the kernel memory-maps the
+        Arrow IPC cache if it exists and writes it after parsing if it does not.
+        Loading a file the kernel already holds is a no-op, or a plain alias
+        when it is held under another variable.
+        """
+        loaded = self.csv_metadata.get(session_id, {})
+        if self.has_session(session_id):
+            metadata = loaded.get(variable)
+            if metadata and metadata["file_path"] == file_path:
+                return self._load_response(metadata, "CSV already loaded")
 
-            if result.status == "Success":
-                df = pd.read_csv(io.StringIO(csv_content))
-                self.csv_data[session_id] = df
-                self.csv_headers[session_id] = df.columns.tolist()
+            for other, metadata in loaded.items():
+                if metadata["file_path"] == file_path:
+                    return self._alias_table(session_id, variable, other)
 
-                return {
-                    "status": "success",
-                    "message": "CSV loaded successfully",
-                    "shape": df.shape,
-                    "columns": df.columns.tolist(),
-                    "sample_data": df.head().to_dict("records"),
-                }
-            else:
-                return {
-                    "status": "error",
-                    "message": result.error_message or "Failed to load CSV",
-                }
+        try:
+            kernel_session_id = self._ensure_kernel(session_id)
+            csv_code = self._build_load_code(file_path, cache_path, variable)
+            result = self.jupyter_client.execute_code(csv_code, kernel_session_id)
+            return self._record_load(
+                session_id, csv_code, file_path, result, cache_path, variable
+            )
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    async def load_csv_data_async(
+        self, session_id: str, csv_content: str, filename: str = "data.csv"
+    ) -> Dict[str, Any]:
+        try:
+            file_path = self._write_csv(session_id, csv_content, filename)
+        except OSError as e:
+            return {"status": "error", "message": str(e)}
+        return await self.load_csv_file_async(session_id, file_path)
+
+    async def load_csv_file_async(
+        self,
+        session_id: str,
+        file_path: str,
+        cache_path: Optional[str] = None,
+        variable: str = "df",
+    ) -> Dict[str, Any]:
+        """Load a CSV file into the session's kernel on the async client."""
+        try:
+            await self.async_client.create_new_session(session_id)
+            csv_code = self._build_load_code(file_path, cache_path, variable)
+            result = await self.async_client.execute_code(csv_code, session_id)
+            return self._record_load(
+                session_id, csv_code, file_path, result, cache_path, variable
+            )
+
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def _write_csv(self, session_id: str, csv_content: str, filename: str) -> str:
+        session_dir = SESSION_TEMP_DIR.format(session_id=session_id)
+        os.makedirs(session_dir, exist_ok=True)
+        file_path = os.path.join(session_dir, filename)
+        with open(file_path, "w") as f:
+            f.write(csv_content)
+        return file_path
+
+    def ensure_tables(
+        self, session_id: str, tables: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Load the given tables, keyed by kernel variable, unless already loaded.
+
+        Each table description needs ``file_path`` and may carry
+        ``arrow_cache_path``. The session's kernel is started even if no table
+        is needed, so code can always run in it.
+        """
+        try:
+            self._ensure_kernel(session_id)
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+        for variable, table in tables.items():
+            result = self.load_csv_file(
+                session_id,
+                table["file_path"],
+                table.get("arrow_cache_path"),
+                variable,
+            )
+            if result["status"] != "success":
+                return result
+        return {"status": "success", "loaded": list(self.loaded_tables(session_id))}
+
+    def loaded_tables(self, session_id: str) -> List[str]:
+        return list(self.csv_metadata.get(session_id, {}))
+
+    def _alias_table(
+        self, session_id: str, variable: str, other: str
+    ) -> Dict[str, Any]:
+        alias_code = f"{variable} = {other}\n"
+        result = self.jupyter_client.execute_code(
+            alias_code, self._kernel_session(session_id)
+        )
+        if result.status != "Success":
+            return {"status": "error", "message": result.error_message}
+
+        metadata = self.csv_metadata[session_id][other]
+        self.load_code[session_id][variable] = alias_code
+        self.csv_metadata[session_id][variable] = metadata
+        return self._load_response(metadata, "CSV already loaded")
+
+    def _build_load_code(
+        self, file_path: str, cache_path: Optional[str] = None, frame: str = "df"
+    ) -> str:
+        # The optimized frame is what gets cached, so loads from the cache
+        # are already optimized and have nothing left to report as saved
+        parse_code = f"{frame} = pd.read_csv({file_path!r})\n_memory_saved = None\n"
+        if self.optimize_dtypes:
+            parse_code += build_dtype_optimization_code(frame)
+
+        if cache_path:
+            read_code = f"""
+import os as _os
+import pyarrow.feather as _feather
+if _os.path.exists({cache_path!r}):
+    {frame} = _feather.read_table({cache_path!r}, memory_map=True).to_pandas()
+    _memory_saved = None
+else:
+{textwrap.indent(parse_code.strip(), "    ")}
+    try:
+        _feather.write_feather({frame}, {cache_path!r} + ".tmp", compression="uncompressed")
+        _os.replace({cache_path!r} + ".tmp", {cache_path!r})
+    except Exception as _error:
+        print(f"Columnar cache not written: {{_error}}")
+del _os, _feather
+"""
+        else:
+            read_code = parse_code
+
+        return f"""
+import json as _json
+{read_code}print(_json.dumps({{
+    "shape": list({frame}.shape),
+    "columns": [str(column) for column in {frame}.columns],
+    "dtypes": {{str(column): str(dtype) for column, dtype in {frame}.dtypes.items()}},
+    "sample_data": _json.loads({frame}.head().to_json(orient="records", date_format="iso")),
+    "memory_bytes": int({frame}.memory_usage(deep=True).sum()),
+    "memory_saved_bytes": _memory_saved,
+}}))
+del _json, _memory_saved
+"""
+
+    def _record_load(
+        self,
+        session_id: str,
+        csv_code: str,
+        file_path: str,
+        result: ExecutionResult,
+        cache_path: Optional[str] = None,
+        variable: str = "df",
+    ) -> Dict[str, Any]:
+        if result.status != "Success":
+            return {
+                "status": "error",
+                "message": result.error_message or "Failed to load CSV",
+            }
+
+        metadata = json.loads(result.output.splitlines()[-1])
+        metadata["shape"] = tuple(metadata["shape"])
+        metadata["file_path"] = file_path
+        metadata["cache_path"] = cache_path
+        self.load_code.setdefault(session_id, {})[variable] = csv_code
+        self.csv_metadata.setdefault(session_id, {})[variable] = metadata
+        return self._load_response(metadata, "CSV loaded successfully")
+
+    def _load_response(self, metadata: Dict[str, Any], message: str) -> Dict[str, Any]:
+        return {
+            "status": "success",
+            "message": message,
+            "shape": metadata["shape"],
+            "columns": metadata["columns"],
+            "sample_data": metadata["sample_data"],
+            "memory_bytes": metadata["memory_bytes"],
+            "memory_saved_bytes": metadata["memory_saved_bytes"],
+        }
+
     def execute_analysis(
         self, session_id: str, python_code: str, max_retries: int = MAX_RETRIES
     ) -> Dict[str, Any]:
         for attempt in range(max_retries):
             try:
-                result = self.jupyter_client.execute_code(python_code, session_id)
-
-                if result.status == "Success":
-                    return {
-                        "status": "success",
-                        "output": result.output,
-                        "execution_time": result.execution_time,
-                        "attempt": attempt + 1,
-                    }
-                else:
-                    if attempt == max_retries - 1:
-                        return {
-                            "status": "error",
-                            "error_message": result.error_message,
-                            "output": result.output,
-                            "attempt": attempt + 1,
-                        }
-                    continue
+                result = self.jupyter_client.execute_code(
+                    python_code, self._kernel_session(session_id)
+                )
 
+                if result.kernel_restarted:
+                    self._reload_data(session_id)
+
+                outcome = self._analysis_outcome(result, attempt)
             except Exception as e:
-                if attempt == max_retries - 1:
-                    return {
-                        "status": "error",
-                        "error_message": str(e),
-                        "attempt": attempt + 1,
-                    }
-                continue
+                outcome = {
+                    "status": "error",
+                    "error_message": str(e),
+                    "attempt": attempt + 1,
+                }
+
+            if outcome["status"] != "error" or attempt == max_retries - 1:
+                return outcome
 
         return {
             "status": "error",
@@ -248,22 +1099,89 @@ print(df.head())
             "attempt": max_retries,
         }
 
-    def get_csv_info(self, session_id: str) -> Dict[str, Any]:
-        if session_id not in self.csv_data:
+    async def execute_analysis_async(
+        self, session_id: str, python_code: str, max_retries: int = MAX_RETRIES
+    ) -> Dict[str, Any]:
+        """Awaitable execute_analysis; many sessions can run on one event loop."""
+        for attempt in range(max_retries):
+            try:
+                result = await self.async_client.execute_code(python_code, session_id)
+
+                if result.kernel_restarted:
+                    for load_code in self.load_code.get(session_id, {}).values():
+                        await self.async_client.execute_code(load_code, session_id)
+
+                outcome = self._analysis_outcome(result, attempt)
+            except Exception as e:
+                outcome = {
+                    "status": "error",
+                    "error_message": str(e),
+                    "attempt": attempt + 1,
+                }
+
+            if outcome["status"] != "error" or attempt == max_retries - 1:
+                return outcome
+
+        return {
+            "status": "error",
+            "error_message": "Max retries exceeded",
+            "attempt": max_retries,
+        }
+
+    def _analysis_outcome(
+        self, result: ExecutionResult, attempt: int
+    ) -> Dict[str, Any]:
+        if result.status == "Success":
+            return {
+                "status": "success",
+                "output": result.output,
+                "execution_time": result.execution_time,
+                "attempt": attempt + 1,
+            }
+
+        # Re-running the same code after a timeout would only time out again,
+        # so the distinct status lets callers stop retrying
+        return {
+            "status": "timeout" if result.status == "Timeout" else "error",
+            "error_message": result.error_message,
+            "output": result.output,
+            "execution_time": result.execution_time,
+            "attempt": attempt + 1,
+        }
+
+    def _reload_data(self, session_id: str):
+        """Load the session's tables again after its kernel was restarted."""
+        for load_code in self.load_code.get(session_id, {}).values():
+            self.jupyter_client.execute_code(
+                load_code, self._kernel_session(session_id)
+            )
+
+    def get_csv_info(self, session_id: str, variable: str = "df") -> Dict[str, Any]:
+        metadata = self.csv_metadata.get(session_id, {}).get(variable)
+        if metadata is None:
             return {"status": "error", "message": "No CSV data loaded for this session"}
 
-        df = self.csv_data[session_id]
         return {
             "status": "success",
-            "shape": df.shape,
-            "columns": df.columns.tolist(),
-            "dtypes": df.dtypes.to_dict(),
-            "sample_data": df.head().to_dict("records"),
+            "file_path": metadata["file_path"],
+            "cache_path": metadata["cache_path"],
+            "shape": metadata["shape"],
+            "columns": metadata["columns"],
+            "dtypes": metadata["dtypes"],
+            "sample_data": metadata["sample_data"],
+            "memory_bytes": metadata["memory_bytes"],
+            "memory_saved_bytes": metadata["memory_saved_bytes"],
         }
 
     def close_session(self, session_id: str):
-        self.jupyter_client.close_session(session_id)
-        if session_id in self.csv_data:
-            del self.csv_data[session_id]
-        if session_id in self.csv_headers:
-            del self.csv_headers[session_id]
+        kernel_session_id = self.kernel_sessions.pop(session_id, session_id)
+        if kernel_session_id in self.jupyter_client.clients:
+            self.jupyter_client.close_session(kernel_session_id)
+        self.csv_metadata.pop(session_id, None)
+        self.load_code.pop(session_id, None)
+
+    async def close_session_async(self, session_id: str):
+        if session_id in self.async_client.clients:
+            await self.async_client.close_session(session_id)
+        self.csv_metadata.pop(session_id, None)
+        self.load_code.pop(session_id, None)
@@ -0,0 +1,280 @@
+"""
+Kernel pool for reusing warm Jupyter kernels across CSV analysis requests.
+"""
+
+import atexit
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Any, Iterator, Optional
+
+from src.config.constants import (
+    KERNEL_POOL_SIZE,
+    KERNEL_MAX_EXECUTIONS,
+    KERNEL_HEALTH_CHECK_TIMEOUT,
+    KERNEL_CHECKOUT_TIMEOUT,
+)
+from src.services.jupyter_service import SimpleJupyterClient, get_environment_status
+
+KERNEL_RESET_CODE = """
+import matplotlib.pyplot as plt
+plt.close("all")
+%reset -f
+"""
+
+
+@dataclass
+class PooledKernel:
+    session_id: str
+    created_at: float = field(default_factory=time.time)
+    checked_out_at: Optional[float] = None
+
+
+class KernelPool:
+    """Keeps a fixed number of pre-started, pre-imported kernels ready for use."""
+
+    def __init__(
+        self,
+        size: int = KERNEL_POOL_SIZE,
+        max_executions: int = KERNEL_MAX_EXECUTIONS,
+        jupyter_client: Optional[SimpleJupyterClient] = None,
+    ):
+        self.size = size
+        self.max_executions = max_executions
+        self.jupyter_client = jupyter_client or SimpleJupyterClient()
+        self._idle: Deque[PooledKernel] = deque()
+        self._in_use: Dict[str, PooledKernel] = {}
+        self._starting = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._stats = {
+            "kernels_started": 0,
+            "kernels_recycled": 0,
+            "kernels_unhealthy": 0,
+            "kernels_taken": 0,
+            "checkouts": 0,
+            "checkout_wait_seconds": 0.0,
+        }
+
+    def start(self) -> "KernelPool":
+        """Start kernels until the pool holds its configured size."""
+        while True:
+            with self._condition:
+                if self._closed or self._total() >= self.size:
+                    return self
+                self._starting += 1
+
+            kernel = self._spawn()
+            with self._condition:
+                self._starting -= 1
+                closed = self._closed
+                if kernel is not None and not closed:
+                    self._idle.append(kernel)
+                self._condition.notify_all()
+            if kernel is None:
+                return self
+            if closed:
+                self._shutdown(kernel)
+                return self
+
+    def warm(self) -> threading.Thread:
+        """Start the pool's kernels in the background."""
+        thread = threading.Thread(target=self.start, daemon=True)
+        thread.start()
+        return thread
+
+    def checkout(self, timeout: float = KERNEL_CHECKOUT_TIMEOUT) -> PooledKernel:
+        """Take a healthy kernel out of the pool, starting one if there is room."""
+        start_time = time.time()
+        deadline = start_time + timeout
+
+        while True:
+            kernel = None
+            with self._condition:
+                if self._closed:
+                    raise ValueError("Kernel pool is closed")
+
+                while not self._idle and self._total() >= self.size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError("No kernel available in the pool")
+                    self._condition.wait(remaining)
+
+                if self._idle:
+                    kernel = self._idle.popleft()
+                else:
+                    self._starting += 1
+
+            if kernel is None:
+                kernel = self._spawn()
+                with self._condition:
+                    self._starting -= 1
+                    self._condition.notify_all()
+                if kernel is None:
+                    raise ValueError("Failed to start a kernel for the pool")
+            elif not self.jupyter_client.ping(
+                kernel.session_id, KERNEL_HEALTH_CHECK_TIMEOUT
+            ):
+                self._stats["kernels_unhealthy"] += 1
+                self._shutdown(kernel, now=True)
+                continue
+
+            with self._condition:
+                kernel.checked_out_at = time.time()
+                self._in_use[kernel.session_id] = kernel
+                self._stats["checkouts"] += 1
+                self._stats["checkout_wait_seconds"] += time.time() - start_time
+            return kernel
+
+    def take(self, timeout: float = KERNEL_CHECKOUT_TIMEOUT) -> PooledKernel:
+        """Hand a warm kernel over to the caller for good and start a replacement.
+
+        The caller owns the kernel afterwards and must close it through
+        ``jupyter_client.close_session``.
+        """
+        kernel = self.checkout(timeout)
+        with self._condition:
+            self._in_use.pop(kernel.session_id, None)
+            self._stats["kernels_taken"] += 1
+        # From now on it is a session kernel, reaped when its session goes idle
+        self.jupyter_client.pinned.discard(kernel.session_id)
+        self.warm()
+        return kernel
+
+    def checkin(self, kernel: PooledKernel):
+        """Return a kernel to the pool, recycling it once it has done enough work."""
+        with self._condition:
+            self._in_use.pop(kernel.session_id, None)
+
+        executions = self.jupyter_client.execution_counts.get(kernel.session_id, 0)
+        if self._closed:
+            self._shutdown(kernel)
+            return
+        if executions >= self.max_executions:
+            self._stats["kernels_recycled"] += 1
+            self.discard(kernel)
+            return
+
+        result = self.jupyter_client.execute_code(
+            KERNEL_RESET_CODE + self.jupyter_client.bootstrap_code, kernel.session_id
+        )
+        if result.status != "Success":
+            self.discard(kernel)
+            return
+
+        with self._condition:
+            kernel.checked_out_at = None
+            self._idle.append(kernel)
+            self._condition.notify()
+
+    def discard(self, kernel: PooledKernel):
+        """Shut a kernel down and start a replacement in the background."""
+        with self._condition:
+            self._in_use.pop(kernel.session_id, None)
+        self._shutdown(kernel)
+        if not self._closed:
+            self.warm()
+
+    @contextmanager
+    def kernel(
+        self, timeout: float = KERNEL_CHECKOUT_TIMEOUT
+    ) -> Iterator[PooledKernel]:
+        kernel = self.checkout(timeout)
+        try:
+            yield kernel
+        finally:
+            self.checkin(kernel)
+
+    def health_check(self) -> Dict[str, bool]:
+        """Ping every idle kernel and replace the ones that do not answer."""
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+            for kernel in idle:
+                self._in_use[kernel.session_id] = kernel
+
+        results = {}
+        for kernel in idle:
+            healthy = self.jupyter_client.ping(
+                kernel.session_id, KERNEL_HEALTH_CHECK_TIMEOUT
+            )
+            results[kernel.session_id] = healthy
+            if healthy:
+                with self._condition:
+                    self._in_use.pop(kernel.session_id, None)
+                    self._idle.append(kernel)
+                    self._condition.notify()
+            else:
+                self._stats["kernels_unhealthy"] += 1
+                self.discard(kernel)
+        return results
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._condition:
+            checkouts = self._stats["checkouts"]
+            startup = self.jupyter_client.get_startup_metrics()
+            environment = get_environment_status()
+            return {
+                "pool_size": self._total(),
+                "target_size": self.size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "starting": self._starting,
+                **self._stats,
+                "avg_checkout_wait_seconds": (
+                    self._stats["checkout_wait_seconds"] / checkouts
+                    if checkouts
+                    else 0.0
+                ),
+                "avg_kernel_startup_seconds": startup["avg_total_seconds"],
+                **(environment.metrics() if environment else {}),
+            }
+
+    def shutdown(self):
+        with self._condition:
+            self._closed = True
+            kernels = list(self._idle) + list(self._in_use.values())
+            self._idle.clear()
+            self._in_use.clear()
+            self._condition.notify_all()
+
+        for kernel in kernels:
+            self._shutdown(kernel)
+
+    def _total(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._starting
+
+    def _spawn(self) -> Optional[PooledKernel]:
+        session_id = f"pool-{uuid.uuid4().hex[:8]}"
+        self.jupyter_client.pinned.add(session_id)
+        try:
+            self.jupyter_client.create_new_session(session_id)
+            self.jupyter_client.verify_environment(session_id)
+        except Exception as e:
+            self.jupyter_client.pinned.discard(session_id)
+            print(f"Failed to start pooled kernel: {e}")
+            return None
+        self._stats["kernels_started"] += 1
+        return PooledKernel(session_id=session_id)
+
+    def _shutdown(self, kernel: PooledKernel, now: bool = False):
+        try:
+            self.jupyter_client.close_session(kernel.session_id, now=now)
+        except Exception:
+            pass
+
+
+_kernel_pool_instance: Optional[KernelPool] = None
+_kernel_pool_lock = threading.Lock()
+
+
+def get_kernel_pool() -> KernelPool:
+    global _kernel_pool_instance
+    with _kernel_pool_lock:
+        if _kernel_pool_instance is None:
+            _kernel_pool_instance = KernelPool()
+            atexit.register(_kernel_pool_instance.shutdown)
+    return _kernel_pool_instance
@@ -0,0 +1,148 @@
+"""
+Local keyword and feature router that settles obvious queries without an LLM call.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from src.config.constants import LOCAL_ROUTER_MIN_CONFIDENCE
+from src.services.models import RoutingDecision
+
+CONVERSATIONAL_KEYWORDS = [
+    "hi",
+    "hello",
+    "hey",
+    "good morning",
+    "good afternoon",
+    "good evening",
+    "how are you",
+    "what's up",
+    "thanks",
+    "thank you",
+    "bye",
+    "goodbye",
+    "help",
+    "what can you do",
+    "who are you",
+    "tell me about yourself",
+    "nice to meet you",
+    "pleasure",
+    "good",
+    "fine",
+    "okay",
+]
+
+# Words that are as common inside data questions as in small talk
+_FILLER_WORDS = {"help", "pleasure", "good", "fine", "okay"}
+
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    return re.compile(
+        r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b",
+        re.IGNORECASE,
+    )
+
+
+_CONVERSATIONAL = _keyword_pattern(CONVERSATIONAL_KEYWORDS)
+# Only unambiguous small talk counts towards routing
+_SMALL_TALK = _keyword_pattern(
+    [keyword for keyword in CONVERSATIONAL_KEYWORDS if keyword not in _FILLER_WORDS]
+)
+
+# (agent, weight, pattern); each matching feature adds its weight once
+_FEATURES: List[Tuple[str, float, re.Pattern]] = [
+    (
+        "SQL_AGENT",
+        5.0,
+        re.compile(
+            r"^\s*(select\b.+\bfrom|with\s+\w+\s+as\s*\(|insert\s+into|update\s+\w+\s+set|"
+            r"delete\s+from|create\s+(table|view|index)|drop\s+(table|view|index)|alter\s+table)\b",
+            re.IGNORECASE | re.DOTALL,
+        ),
+    ),
+    ("SQL_AGENT", 2.0, re.compile(r"\bsql\b", re.IGNORECASE)),
+    ("SQL_AGENT", 2.0, re.compile(r"\bquer(y|ies)\b", re.IGNORECASE)),
+    (
+        "SQL_AGENT",
+        1.5,
+        re.compile(
+            r"\b(database|schema|tables?|joins?|primary key|foreign key|stored procedure)\b",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "CSV_AGENT",
+        3.0,
+        re.compile(
+            r"\b(csv|dataset|spreadsheet|uploaded (file|data))\b", re.IGNORECASE
+        ),
+    ),
+    (
+        "CSV_AGENT",
+        3.0,
+        re.compile(
+            r"\b(plot|chart|graph|visuali[sz]e|visuali[sz]ation|histogram|scatter|heatmap)\b",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "CSV_AGENT",
+        1.5,
+        re.compile(
+            r"\b(analy[sz]e|analysis|average|mean|median|correlat\w*|distribution|trend|"
+            r"summari[sz]e|statistics|outliers?|columns?|the data|this data)\b",
+            re.IGNORECASE,
+        ),
+    ),
+]
+
+
+def is_conversational(query: str) -> bool:
+    """Whether a query contains a greeting, thanks or other small-talk phrase."""
+    return _CONVERSATIONAL.search(query) is not None
+
+
+class LocalRouter:
+    """Scores each agent from weighted keyword and shape features of the query.
+
+    A decision is only returned when one agent clearly outscores the others;
+    otherwise the caller falls back to the LLM router.
+    """
+
+    def __init__(self, min_confidence: float = LOCAL_ROUTER_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+
+    def scores(self, query: str, csv_loaded: bool = False) -> Dict[str, float]:
+        scores = {"CONVERSATION_AGENT": 0.0, "SQL_AGENT": 0.0, "CSV_AGENT": 0.0}
+        for agent, weight, pattern in _FEATURES:
+            if pattern.search(query):
+                scores[agent] += weight
+
+        if _SMALL_TALK.search(query):
+            scores["CONVERSATION_AGENT"] += 2.0
+            # Small talk is short; longer messages usually carry a real request
+            if len(query.split()) <= 6:
+                scores["CONVERSATION_AGENT"] += 1.0
+        if csv_loaded and scores["CSV_AGENT"]:
+            scores["CSV_AGENT"] += 1.0
+        return scores
+
+    def route(self, query: str, csv_loaded: bool = False) -> Optional[RoutingDecision]:
+        """Return a confident routing decision, or None when the query is unclear."""
+        scores = self.scores(query, csv_loaded)
+        agent, best = max(scores.items(), key=lambda item: item[1])
+        # One unit of weight stands for evidence the features cannot see
+        confidence = best / (sum(scores.values()) + 1.0)
+        if confidence < self.min_confidence:
+            return None
+
+        features = ", ".join(
+            f"{name.split('_')[0].lower()} {score:g}"
+            for name, score in scores.items()
+            if score
+        )
+        return RoutingDecision(
+            agent=agent,
+            confidence=round(confidence, 2),
+            reasoning=f"Local keyword routing ({features})",
+        )
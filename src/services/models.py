@@ -86,3 +86,5 @@ ConversationResult = Union[ConversationResponse, Failed]
 SQLResult = Union[SQLResponse, Failed]
 CSVAnalysisResult = Union[CSVAnalysisResponse, Failed]
 CodeFixResult = Union[CodeFixResponse, Failed]
+# Routing and generation in a single call: the output type picks the agent
+CombinedResult = Union[ConversationResponse, SQLResponse, CSVAnalysisResponse, Failed]
@@ -0,0 +1,254 @@
+"""
+Cache of LLM agent responses, with in-memory LRU and on-disk SQLite backends.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from src.config.constants import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_PATH
+from src.config.settings import get_settings
+from src.services.models import Failed
+
+_QUOTED = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace, leaving quoted literals untouched.
+
+    Case is kept: unquoted values and table or column names in the prompt end
+    up in the generated code, where case matters.
+    """
+    parts = _QUOTED.split(prompt.strip())
+    return "".join(
+        part if index % 2 else re.sub(r"\s+", " ", part)
+        for index, part in enumerate(parts)
+    )
+
+
+def _output_types(output_type: Any) -> Tuple[Type, ...]:
+    if get_origin(output_type) is Union:
+        return get_args(output_type)
+    return (output_type,)
+
+
+class MemoryCacheBackend:
+    """Least-recently-used entries held in process memory."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """Entries persisted in a SQLite file, so they survive restarts."""
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str = RESPONSE_CACHE_PATH,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_used REAL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._connection.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (now, key)
+            )
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float):
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            self._connection.execute(
+                "DELETE FROM responses WHERE expires_at < ? OR key NOT IN "
+                "(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (now, self.max_entries),
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+
+
+class ResponseCache:
+    """Agent outputs keyed by agent, model, prompt version and normalized prompt.
+
+    Outputs are stored as JSON and validated back into their pydantic model
+    on every hit, so callers always get a fresh, fully validated object.
+    """
+
+    def __init__(
+        self,
+        backend: Union[MemoryCacheBackend, SQLiteCacheBackend],
+        ttl: float,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def key(self, agent: str, model: str, prompt_version: str, prompt: str) -> str:
+        payload = json.dumps([agent, model, prompt_version, normalize_prompt(prompt)])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str, output_type: Any) -> Optional[BaseModel]:
+        value = self.backend.get(key)
+        output = None
+        if value is not None:
+            stored = json.loads(value)
+            types = {cls.__name__: cls for cls in _output_types(output_type)}
+            cls = types.get(stored["type"])
+            if cls is not None:
+                output = cls.model_validate(stored["data"])
+        self._stats["hits" if output is not None else "misses"] += 1
+        return output
+
+    def set(self, key: str, output: Any):
+        # Failures are worth asking again
+        if not isinstance(output, BaseModel) or isinstance(output, Failed):
+            return
+        value = {"type": type(output).__name__, "data": output.model_dump(mode="json")}
+        self.backend.set(key, json.dumps(value), self.ttl)
+        self._stats["stores"] += 1
+
+    def clear(self):
+        self.backend.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "backend": self.backend.name,
+            "entries": len(self.backend),
+            "ttl_seconds": self.ttl,
+            **self._stats,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+@dataclass
+class CachedRun:
+    output: Any
+
+
+class CachedAgent:
+    """Wraps an agent so that ``run_sync`` answers repeated prompts from the cache."""
+
+    def __init__(self, agent: Any, name: str, system_prompt: str, cache: ResponseCache):
+        self.agent = agent
+        self.name = name
+        self.cache = cache
+        self.prompt_version = hashlib.sha256(system_prompt.encode()).hexdigest()[:12]
+        self.model_name = getattr(agent.model, "model_name", str(agent.model))
+
+    def run_sync(self, prompt: Any, **kwargs: Any) -> Any:
+        if kwargs or not isinstance(prompt, str):
+            return self.agent.run_sync(prompt, **kwargs)
+
+        key = self.cache.key(self.name, self.model_name, self.prompt_version, prompt)
+        output = self.cache.get(key, self.agent.output_type)
+        if output is not None:
+            return CachedRun(output)
+
+        result = self.agent.run_sync(prompt)
+        self.cache.set(key, result.output)
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.agent, name)
+
+
+_response_cache_instance: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The process-wide response cache, or None when caching is turned off."""
+    global _response_cache_instance
+    settings = get_settings()
+    if settings.response_cache == "off":
+        return None
+    with _response_cache_lock:
+        if _response_cache_instance is None:
+            backend = (
+                SQLiteCacheBackend()
+                if settings.response_cache == "sqlite"
+                else MemoryCacheBackend()
+            )
+            _response_cache_instance = ResponseCache(
+                backend, settings.response_cache_ttl
+            )
+    return _response_cache_instance
+
+
+def cached_agent(agent: Any, name: str, system_prompt: str) -> Any:
+    """Put the response cache in front of an agent, if caching is on."""
+    cache = get_response_cache()
+    if cache is None:
+        return agent
+    return CachedAgent(agent, name, system_prompt, cache)
@@ -3,18 +3,43 @@ Intelligent routing service for determining which agent should handle user queri
 """
 
 import json
-from typing import List, Optional, Dict, Any
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.groq import GroqModel
 from pydantic_ai.providers.groq import GroqProvider
 
-from src.config.constants import WORST_CASE_SCENARIO
+from src.config.constants import (
+    SPECULATION_MAX_WORKERS,
+    SQL_MAX_FIX_ATTEMPTS,
+    WORST_CASE_SCENARIO,
+)
 from src.config.settings import get_settings
+from src.services.column_stats import ColumnProfile
+from src.services.dataset_catalog import referenced_tables, relevant_tables
+from src.services.sketches import load_sketches
+from src.services.sql_engine import (
+    QueryResult,
+    SQLEngine,
+    run_generated_sql,
+    validate_generated_sql,
+)
+from src.services.jupyter_service import CSVAnalysisService
+from src.services.kernel_pool import get_kernel_pool
+from src.services.local_router import LocalRouter
+from src.services.response_cache import cached_agent
+from src.services.semantic_cache import get_semantic_cache, schema_fingerprint
 from src.services.models import (
     RoutingDecision,
+    ConversationResponse,
     ConversationResult,
+    SQLResponse,
     SQLResult,
+    CSVAnalysisResponse,
     CSVAnalysisResult,
+    CombinedResult,
 )
 from src.schemas.requests import ChatMessage
 from utils.prompt import (
@@ -22,14 +47,29 @@ from utils.prompt import (
     CONVERSATION_PROMPT,
     SQL_GENERATION_PROMPT,
     CSV_ANALYSIS_PROMPT,
+    COMBINED_PROMPT,
 )
 
 
 class IntelligentRoutingService:
     """Service for intelligently routing user queries to appropriate agents."""
 
-    def __init__(self):
+    def __init__(self, csv_service: Optional[CSVAnalysisService] = None):
         self.settings = get_settings()
+        self.csv_service = csv_service
+        self.local_router = LocalRouter()
+        self.routing_stats = {
+            "local": 0,
+            "llm": 0,
+            "single_call": 0,
+            "speculative_hits": 0,
+            "speculative_misses": 0,
+            "speculation_saved_seconds": 0.0,
+        }
+        self._speculation_pool = ThreadPoolExecutor(
+            max_workers=SPECULATION_MAX_WORKERS, thread_name_prefix="speculation"
+        )
+        self.semantic_cache = get_semantic_cache()
 
         self.model = GroqModel(
             self.settings.groq_model_name,
@@ -37,25 +77,50 @@ class IntelligentRoutingService:
         )
 
         # Create routing agent
-        self.routing_agent = Agent[None, RoutingDecision](
-            self.model, output_type=RoutingDecision, system_prompt=ROUTING_PROMPT
+        self.routing_agent = cached_agent(
+            Agent[None, RoutingDecision](
+                self.model, output_type=RoutingDecision, system_prompt=ROUTING_PROMPT
+            ),
+            "routing_agent",
+            ROUTING_PROMPT,
         )
 
         # Create conversation agent
-        self.conversation_agent = Agent[None, ConversationResult](
-            self.model,
-            output_type=ConversationResult,
-            system_prompt=CONVERSATION_PROMPT,
+        self.conversation_agent = cached_agent(
+            Agent[None, ConversationResult](
+                self.model,
+                output_type=ConversationResult,
+                system_prompt=CONVERSATION_PROMPT,
+            ),
+            "conversation_agent",
+            CONVERSATION_PROMPT,
         )
 
         # Create SQL agent
-        self.sql_agent = Agent[None, SQLResult](
-            self.model, output_type=SQLResult, system_prompt=SQL_GENERATION_PROMPT
+        self.sql_agent = cached_agent(
+            Agent[None, SQLResult](
+                self.model, output_type=SQLResult, system_prompt=SQL_GENERATION_PROMPT
+            ),
+            "sql_agent",
+            SQL_GENERATION_PROMPT,
+        )
+
+        # Create the single-call agent, which routes and generates at once
+        self.combined_agent = cached_agent(
+            Agent[None, CombinedResult](
+                self.model, output_type=CombinedResult, system_prompt=COMBINED_PROMPT
+            ),
+            "combined_agent",
+            COMBINED_PROMPT,
         )
 
         # Create CSV analysis agent
-        self.csv_agent = Agent[None, CSVAnalysisResult](
-            self.model, output_type=CSVAnalysisResult, system_prompt=CSV_ANALYSIS_PROMPT
+        self.csv_agent = cached_agent(
+            Agent[None, CSVAnalysisResult](
+                self.model, output_type=CSVAnalysisResult, system_prompt=CSV_ANALYSIS_PROMPT
+            ),
+            "csv_agent",
+            CSV_ANALYSIS_PROMPT,
         )
 
     def determine_agent(
@@ -64,7 +129,26 @@ class IntelligentRoutingService:
         conversation_history: List[ChatMessage],
         csv_loaded: bool = False,
     ) -> RoutingDecision:
-        """Determine which agent should handle the user query."""
+        """Determine which agent should handle the user query.
+
+        Obvious queries are settled by the local router; the LLM router is only
+        called when it is unsure.
+        """
+        if self.settings.local_routing:
+            decision = self.local_router.route(user_query, csv_loaded)
+            if decision is not None:
+                self.routing_stats["local"] += 1
+                return decision
+        return self._route_with_llm(user_query, conversation_history, csv_loaded)
+
+    def _route_with_llm(
+        self,
+        user_query: str,
+        conversation_history: List[ChatMessage],
+        csv_loaded: bool = False,
+    ) -> RoutingDecision:
+        self.routing_stats["llm"] += 1
+
         try:
             # Prepare context for routing
             context = self._prepare_routing_context(
@@ -93,92 +177,481 @@ class IntelligentRoutingService:
             return self._get_fallback_conversation_response(user_query)
 
     def handle_sql_query(
-        self, user_query: str, conversation_history: List[ChatMessage]
+        self,
+        user_query: str,
+        conversation_history: List[ChatMessage],
+        csv_info: Optional[Dict[str, Any]] = None,
+        sql_engine: Optional[SQLEngine] = None,
     ) -> str:
-        """Handle SQL generation queries."""
+        """Handle SQL generation queries, running them on uploaded tables if any."""
         try:
-            context = self._prepare_sql_context(user_query, conversation_history)
-            result = self.sql_agent.run_sync(context)
-
-            if hasattr(result.output, "sql_query"):
-                return self._format_sql_response(result.output)
-            else:
-                return "I'm sorry, I couldn't generate a SQL query for that request. Could you please rephrase your question?"
+            return self._draft_response(
+                "SQL_AGENT", user_query, conversation_history, csv_info, None, sql_engine
+            )()
 
         except Exception as e:
             return f"I encountered an error while generating SQL: {str(e)}"
 
+    def _complete_sql_response(
+        self,
+        output: Any,
+        context: str,
+        sql_engine: Optional[SQLEngine] = None,
+        user_query: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+    ) -> str:
+        """Validate, run and format generated SQL, asking for fixes when it is invalid.
+
+        With a question and schema fingerprint, SQL that passes validation is
+        kept in the semantic cache for similar questions later.
+        """
+        for attempt in range(SQL_MAX_FIX_ATTEMPTS + 1):
+            if not hasattr(output, "sql_query"):
+                break
+
+            # SQL that fails validation goes back to the model, not the user
+            validation = validate_generated_sql(output, sql_engine)
+            if validation and not validation.valid and attempt < SQL_MAX_FIX_ATTEMPTS:
+                context = self._prepare_sql_fix_context(
+                    context, output.sql_query, validation.errors
+                )
+                output = self.sql_agent.run_sync(context).output
+                continue
+
+            # Cached before running, which fills in this dataset's row counts
+            if (
+                self.semantic_cache is not None
+                and fingerprint is not None
+                and (validation is None or validation.valid)
+            ):
+                self.semantic_cache.store(user_query, fingerprint, output)
+
+            execution = run_generated_sql(output, sql_engine, validation)
+            return self._format_sql_response(output, execution)
+
+        return "I'm sorry, I couldn't generate a SQL query for that request. Could you please rephrase your question?"
+
+    def handle_single_call(
+        self,
+        user_query: str,
+        conversation_history: List[ChatMessage],
+        csv_info: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        sql_engine: Optional[SQLEngine] = None,
+    ) -> str:
+        """Route and answer a query with one LLM call instead of two.
+
+        Queries the local router is sure about go straight to their agent. For
+        the rest, one structured call returns a conversation reply, SQL or
+        analysis code, and the type of the result decides how it is handled.
+        """
+        decision = (
+            self.local_router.route(user_query, bool(csv_info))
+            if self.settings.local_routing
+            else None
+        )
+        if decision is not None:
+            self.routing_stats["local"] += 1
+            return self._respond(
+                decision.agent,
+                user_query,
+                conversation_history,
+                csv_info,
+                session_id,
+                sql_engine,
+            )
+        self.routing_stats["single_call"] += 1
+
+        try:
+            answer = self._answer_from_profile(user_query, csv_info)
+            if answer:
+                return answer
+
+            context = self._prepare_combined_context(
+                user_query, conversation_history, csv_info, session_id, sql_engine
+            )
+            output = self.combined_agent.run_sync(context).output
+        except Exception as e:
+            print(f"Single-call response failed with error: {e}")
+            return WORST_CASE_SCENARIO
+
+        if isinstance(output, ConversationResponse):
+            return output.message
+        if isinstance(output, SQLResponse):
+            return self._complete_sql_response(
+                output,
+                context,
+                sql_engine,
+                user_query,
+                self._sql_cache_fingerprint(
+                    user_query, conversation_history, csv_info, sql_engine
+                ),
+            )
+        if isinstance(output, CSVAnalysisResponse):
+            return self._execute_csv_analysis(
+                output.python_code, csv_info, output.explanation, session_id
+            )
+        return self._get_fallback_conversation_response(user_query)
+
     def handle_csv_query(
         self,
         user_query: str,
         csv_info: Optional[Dict[str, Any]] = None,
         conversation_history: Optional[List[ChatMessage]] = None,
+        session_id: Optional[str] = None,
     ) -> str:
         """Handle CSV analysis queries."""
         try:
-            # Use the AI agent to generate code based on user request and conversation history
-            context = self._prepare_csv_context(
-                user_query, csv_info, conversation_history
-            )
-            result = self.csv_agent.run_sync(context)
-
-            if hasattr(result.output, "python_code"):
-                # Execute the generated code using Jupyter service
-                return self._execute_csv_analysis(
-                    result.output.python_code, csv_info, result.output.explanation
-                )
-            else:
-                return "I'm sorry, I couldn't generate analysis code for that request. Could you please rephrase your question?"
+            return self._draft_response(
+                "CSV_AGENT", user_query, conversation_history, csv_info, session_id
+            )()
 
         except Exception as e:
             # If LLM fails, provide a graceful response without showing errors
             return WORST_CASE_SCENARIO
 
+    def handle_speculative(
+        self,
+        user_query: str,
+        conversation_history: List[ChatMessage],
+        csv_info: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        sql_engine: Optional[SQLEngine] = None,
+        last_agent: Optional[str] = None,
+    ) -> Tuple[str, str]:
+        """Answer a query while the LLM router runs, returning the agent and response.
+
+        The most likely agent's LLM call starts alongside the routing call.
+        Its draft is kept when the route matches and discarded otherwise;
+        nothing with side effects (running SQL or code) happens until then.
+        """
+        csv_loaded = bool(csv_info)
+        decision = (
+            self.local_router.route(user_query, csv_loaded)
+            if self.settings.local_routing
+            else None
+        )
+        if decision is not None:
+            self.routing_stats["local"] += 1
+            return decision.agent, self._respond(
+                decision.agent,
+                user_query,
+                conversation_history,
+                csv_info,
+                session_id,
+                sql_engine,
+            )
+
+        predicted = self._predict_agent(user_query, csv_loaded, last_agent)
+        start = time.perf_counter()
+        routing = self._speculation_pool.submit(
+            self._route_with_llm, user_query, conversation_history, csv_loaded
+        )
+        draft = self._speculation_pool.submit(
+            self._timed,
+            self._draft_response,
+            predicted,
+            user_query,
+            conversation_history,
+            csv_info,
+            session_id,
+            sql_engine,
+        )
+        agent = routing.result().agent
+        routing_seconds = time.perf_counter() - start
+
+        if agent != predicted:
+            # A draft that is still queued never runs; one in flight is ignored
+            draft.cancel()
+            self.routing_stats["speculative_misses"] += 1
+            return agent, self._respond(
+                agent, user_query, conversation_history, csv_info, session_id, sql_engine
+            )
+
+        try:
+            finish, draft_seconds = draft.result()
+        except Exception as e:
+            print(f"Speculative draft failed with error: {e}")
+            self.routing_stats["speculative_misses"] += 1
+            return agent, self._respond(
+                agent, user_query, conversation_history, csv_info, session_id, sql_engine
+            )
+
+        # Run one after the other, routing and drafting would have taken their sum
+        self.routing_stats["speculative_hits"] += 1
+        self.routing_stats["speculation_saved_seconds"] += (
+            routing_seconds + draft_seconds - (time.perf_counter() - start)
+        )
+        return agent, finish()
+
+    def speculation_stats(self) -> Dict[str, Any]:
+        hits = self.routing_stats["speculative_hits"]
+        speculated = hits + self.routing_stats["speculative_misses"]
+        return {
+            "speculative_hits": hits,
+            "speculative_misses": self.routing_stats["speculative_misses"],
+            "hit_rate": hits / speculated if speculated else 0.0,
+            "saved_seconds": self.routing_stats["speculation_saved_seconds"],
+            "avg_saved_seconds": (
+                self.routing_stats["speculation_saved_seconds"] / speculated
+                if speculated
+                else 0.0
+            ),
+        }
+
+    def _timed(self, function: Callable, *args) -> Tuple[Any, float]:
+        start = time.perf_counter()
+        return function(*args), time.perf_counter() - start
+
+    def _predict_agent(
+        self, user_query: str, csv_loaded: bool, last_agent: Optional[str]
+    ) -> str:
+        """Guess the route from local evidence, the last agent used and the data loaded."""
+        scores = self.local_router.scores(user_query, csv_loaded)
+        agent, best = max(scores.items(), key=lambda item: item[1])
+        if best:
+            return agent
+        if last_agent:
+            return last_agent
+        return "CSV_AGENT" if csv_loaded else "SQL_AGENT"
+
+    def _respond(
+        self,
+        agent: str,
+        user_query: str,
+        conversation_history: List[ChatMessage],
+        csv_info: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        sql_engine: Optional[SQLEngine] = None,
+    ) -> str:
+        if agent == "SQL_AGENT":
+            return self.handle_sql_query(
+                user_query, conversation_history, csv_info, sql_engine
+            )
+        if agent == "CSV_AGENT":
+            return self.handle_csv_query(
+                user_query, csv_info, conversation_history, session_id
+            )
+        return self.handle_conversation_query(user_query)
+
+    def _draft_response(
+        self,
+        agent: str,
+        user_query: str,
+        conversation_history: Optional[List[ChatMessage]],
+        csv_info: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        sql_engine: Optional[SQLEngine] = None,
+    ) -> Callable[[], str]:
+        """Make the agent's LLM call and return what finishes the response.
+
+        The LLM call has no side effects, so it is safe to make speculatively;
+        running the SQL or the analysis code is left to the returned function.
+        """
+        if agent == "CONVERSATION_AGENT":
+            message = self.handle_conversation_query(user_query)
+            return lambda: message
+
+        if agent == "SQL_AGENT":
+            context = self._prepare_sql_context(
+                user_query, conversation_history or [], csv_info, sql_engine
+            )
+            # A paraphrase of an earlier question in the same context reuses its SQL
+            fingerprint = self._sql_cache_fingerprint(
+                user_query, conversation_history, csv_info, sql_engine
+            )
+            if self.semantic_cache is not None:
+                cached = self.semantic_cache.lookup(user_query, fingerprint, SQLResponse)
+                if cached is not None:
+                    return lambda: self._complete_sql_response(cached, context, sql_engine)
+
+            output = self.sql_agent.run_sync(context).output
+            return lambda: self._complete_sql_response(
+                output, context, sql_engine, user_query, fingerprint
+            )
+
+        answer = self._answer_from_profile(user_query, csv_info)
+        if answer:
+            return lambda: answer
+
+        # Use the AI agent to generate code based on user request and conversation history
+        context = self._prepare_csv_context(
+            user_query,
+            csv_info,
+            conversation_history,
+            df_loaded=self._has_session_kernel(session_id)
+            or self._uses_session_tables(session_id, csv_info),
+        )
+        output = self.csv_agent.run_sync(context).output
+
+        if not hasattr(output, "python_code"):
+            return lambda: "I'm sorry, I couldn't generate analysis code for that request. Could you please rephrase your question?"
+        # Execute the generated code using Jupyter service
+        return lambda: self._execute_csv_analysis(
+            output.python_code, csv_info, output.explanation, session_id
+        )
+
+    def _sql_cache_fingerprint(
+        self,
+        user_query: str,
+        conversation_history: Optional[List[ChatMessage]],
+        csv_info: Optional[Dict[str, Any]] = None,
+        sql_engine: Optional[SQLEngine] = None,
+    ) -> str:
+        """Fingerprint everything besides the question that shapes generated SQL.
+
+        That is the tables and the earlier conversation the SQL prompt shows,
+        so a follow-up like "only for 2023" only matches within the same
+        conversation, while opening questions match across conversations.
+        """
+        earlier = list(conversation_history or [])[-10:]
+        if earlier and earlier[-1].role == "user" and earlier[-1].content == user_query:
+            earlier.pop()
+        schema = None
+        if csv_info and sql_engine is not None:
+            schema = {
+                "dialect": sql_engine.dialect,
+                # Profile dtypes, not "dtypes", which a kernel load rewrites
+                "tables": {
+                    name: [info["columns"], info.get("profile_dtypes")]
+                    for name, info in csv_info.get("tables", {}).items()
+                },
+            }
+        return schema_fingerprint(
+            {
+                "schema": schema,
+                "history": [[message.role, message.content] for message in earlier],
+            }
+        )
+
+    def _answer_from_profile(
+        self, user_query: str, csv_info: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """Answer a simple statistic question from the precomputed column profile."""
+        tables = relevant_tables(user_query, csv_info) if csv_info else []
+        if len(tables) == 1 and tables[0].get("column_stats"):
+            return self._column_profile(tables[0]).answer(user_query)
+        return None
+
+    def _column_profile(self, csv_info: Dict[str, Any]) -> ColumnProfile:
+        """Wrap the dataset's statistics, with its sketches when they are stored."""
+        sketch_path = csv_info.get("sketch_path")
+        sketches = (
+            load_sketches(sketch_path)
+            if sketch_path and os.path.exists(sketch_path)
+            else None
+        )
+        return ColumnProfile(csv_info, sketches)
+
+    def _uses_session_tables(
+        self, session_id: Optional[str], csv_info: Optional[Dict[str, Any]]
+    ) -> bool:
+        """Check whether the session's tables are loaded into its kernel on demand."""
+        return bool(
+            session_id and self.csv_service and csv_info and csv_info.get("tables")
+        )
+
+    def _load_referenced_tables(
+        self,
+        python_code: str,
+        csv_info: Dict[str, Any],
+        session_id: str,
+        jupyter_service: CSVAnalysisService,
+    ) -> Dict[str, Any]:
+        """Load the tables the code uses into the session's kernel before it runs."""
+        tables = referenced_tables(python_code, csv_info)
+        result = jupyter_service.ensure_tables(session_id, tables)
+        if result["status"] == "success":
+            # Describe loaded tables with the dtypes their DataFrames really have,
+            # including the primary table's copy at the top of csv_info
+            for variable, table in tables.items():
+                loaded = jupyter_service.get_csv_info(session_id, variable)
+                update = {
+                    "dtypes": loaded["dtypes"],
+                    "memory_bytes": loaded["memory_bytes"],
+                }
+                # Loads from the columnar cache are already optimized and
+                # report no saving; keep the one measured when it was built
+                if loaded["memory_saved_bytes"] is not None:
+                    update["memory_saved_bytes"] = loaded["memory_saved_bytes"]
+                table.update(update)
+                if table is csv_info.get("tables", {}).get(csv_info.get("variable")):
+                    csv_info.update(update)
+        return result
+
+    def _has_session_kernel(self, session_id: Optional[str]) -> bool:
+        """Check whether the chat session owns a kernel with its data loaded."""
+        return bool(
+            session_id and self.csv_service and self.csv_service.has_session(session_id)
+        )
+
     def _execute_csv_analysis(
-        self, python_code: str, csv_info: Optional[Dict[str, Any]], explanation: str
+        self,
+        python_code: str,
+        csv_info: Optional[Dict[str, Any]],
+        explanation: str,
+        session_id: Optional[str] = None,
     ) -> str:
         """Execute CSV analysis code using Jupyter service with error fixing retry loop."""
         try:
-            from src.services.jupyter_service import CSVAnalysisService
-
-            # Create Jupyter service instance
-            jupyter_service = CSVAnalysisService()
-
-            # Create a temporary session for this analysis
-            session_id = "csv_analysis_temp"
-
-            # Load CSV data into the session if available
-            if csv_info and csv_info.get("file_path"):
-                jupyter_service.load_csv_data(session_id, csv_info["file_path"])
-
-            # Install required libraries if needed
-            install_code = """
-import sys
-import subprocess
-
-def install_package(package):
-    try:
-        __import__(package)
-    except ImportError:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-
-# Install required packages
-install_package('pandas')
-install_package('numpy')
-install_package('matplotlib')
-install_package('seaborn')
-"""
+            # Reuse the chat session's kernel, where df is already loaded or
+            # the session's tables are loaded as the code needs them
+            if self._has_session_kernel(session_id) or self._uses_session_tables(
+                session_id, csv_info
+            ):
+                return self._run_csv_analysis(
+                    python_code, csv_info, session_id, self.csv_service, df_loaded=True
+                )
 
-            # Execute installation first
-            install_result = jupyter_service.execute_analysis(
-                session_id, install_code, max_retries=1
-            )
+            # Otherwise borrow a warm kernel from the pool instead of starting a new one
+            with get_kernel_pool().kernel() as kernel:
+                jupyter_service = CSVAnalysisService(
+                    jupyter_client=get_kernel_pool().jupyter_client
+                )
+
+                # Load CSV data into the session if available
+                if csv_info and csv_info.get("file_path"):
+                    jupyter_service.load_csv_file(
+                        kernel.session_id,
+                        csv_info["file_path"],
+                        csv_info.get("cache_path"),
+                    )
 
+                return self._run_csv_analysis(
+                    python_code, csv_info, kernel.session_id, jupyter_service
+                )
+
+        except Exception as e:
+            return WORST_CASE_SCENARIO
+
+    def _run_csv_analysis(
+        self,
+        python_code: str,
+        csv_info: Optional[Dict[str, Any]],
+        session_id: str,
+        jupyter_service: CSVAnalysisService,
+        df_loaded: bool = False,
+    ) -> str:
+        """Run analysis code in the given kernel session, fixing errors between retries."""
+        try:
             # Retry loop for code execution with error fixing
             current_code = python_code
             max_retries = 3
 
             for attempt in range(max_retries):
+                # Tables are loaded lazily, as the (possibly fixed) code uses them;
+                # this also starts the session's kernel on its first query
+                if csv_info and csv_info.get("tables"):
+                    load_result = self._load_referenced_tables(
+                        current_code, csv_info, session_id, jupyter_service
+                    )
+                    if load_result["status"] != "success":
+                        return WORST_CASE_SCENARIO
+
+                if attempt == 0:
+                    # The kernel environment is verified once per process, never per query
+                    jupyter_service.verify_environment(session_id).skipped_bootstraps += 1
+
                 # Execute the current code
                 result = jupyter_service.execute_analysis(
                     session_id, current_code, max_retries=1
@@ -216,11 +689,17 @@ install_package('seaborn')
                 else:
                     # Code execution failed - try to fix it
                     error_msg = result.get("error_message", "Unknown error")
+                    if result["status"] == "timeout":
+                        error_msg = (
+                            f"{error_msg}. The code is too slow - rewrite it to finish "
+                            "quickly using vectorized pandas operations, no row-by-row "
+                            "loops, and sampling for large charts."
+                        )
 
                     if attempt < max_retries - 1:  # Not the last attempt
                         # Send error to LLM to fix the code
                         fixed_code = self._fix_python_code(
-                            current_code, error_msg, csv_info or {}
+                            current_code, error_msg, csv_info or {}, df_loaded
                         )
                         if fixed_code:
                             current_code = fixed_code
@@ -237,12 +716,16 @@ install_package('seaborn')
         return WORST_CASE_SCENARIO
 
     def _fix_python_code(
-        self, original_code: str, error_message: str, csv_info: Dict[str, Any]
+        self,
+        original_code: str,
+        error_message: str,
+        csv_info: Dict[str, Any],
+        df_loaded: bool = False,
     ) -> Optional[str]:
         """Send error to LLM to fix the Python code."""
         try:
             context = self._prepare_code_fix_context(
-                original_code, error_message, csv_info
+                original_code, error_message, csv_info, df_loaded
             )
 
             result = self.csv_agent.run_sync(context)
@@ -274,13 +757,28 @@ install_package('seaborn')
         return "\n".join(context_parts)
 
     def _prepare_sql_context(
-        self, user_query: str, conversation_history: List[ChatMessage]
+        self,
+        user_query: str,
+        conversation_history: List[ChatMessage],
+        csv_info: Optional[Dict[str, Any]] = None,
+        sql_engine: Optional[SQLEngine] = None,
     ) -> str:
         """Prepare context for SQL generation."""
         context_parts = [
             f"User Query: {user_query}",
         ]
 
+        if csv_info and sql_engine is not None:
+            context_parts.append(
+                f"Uploaded Tables (queried with {sql_engine.dialect}; use these exact table and column names):"
+            )
+            for name, info in csv_info.get("tables", {}).items():
+                columns = ", ".join(
+                    f"{column} {info['dtypes'].get(column, '')}".strip()
+                    for column in info["columns"]
+                )
+                context_parts.append(f"- {name} ({info['shape'][0]:,} rows): {columns}")
+
         if conversation_history:
             context_parts.append("Conversation History:")
             for msg in conversation_history[-10:]:  # Last 10 messages
@@ -288,11 +786,55 @@ install_package('seaborn')
 
         return "\n".join(context_parts)
 
+    def _prepare_combined_context(
+        self,
+        user_query: str,
+        conversation_history: List[ChatMessage],
+        csv_info: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        sql_engine: Optional[SQLEngine] = None,
+    ) -> str:
+        """Prepare context for routing and generation in one call."""
+        context_parts = [f"CSV Data Loaded: {bool(csv_info)}"]
+        if csv_info:
+            context_parts.append(
+                self._prepare_csv_context(
+                    user_query,
+                    csv_info,
+                    conversation_history,
+                    df_loaded=self._has_session_kernel(session_id)
+                    or self._uses_session_tables(session_id, csv_info),
+                )
+            )
+            if sql_engine is not None:
+                context_parts.append(
+                    f"SQL over these tables runs with {sql_engine.dialect}."
+                )
+        else:
+            context_parts.append(
+                self._prepare_sql_context(user_query, conversation_history)
+            )
+        return "\n".join(context_parts)
+
+    def _prepare_sql_fix_context(
+        self, context: str, sql_query: str, errors: List[str]
+    ) -> str:
+        """Ask for corrected SQL after the previous query failed validation."""
+        context_parts = [
+            context,
+            "Your previous SQL was rejected before running:",
+            f"```sql\n{sql_query}\n```",
+            *[f"- {error}" for error in errors],
+            "Return corrected SQL that uses only the uploaded tables and their columns.",
+        ]
+        return "\n".join(context_parts)
+
     def _prepare_csv_context(
         self,
         user_query: str,
         csv_info: Optional[Dict[str, Any]] = None,
         conversation_history: Optional[List[ChatMessage]] = None,
+        df_loaded: bool = False,
     ) -> str:
         """Prepare context for CSV analysis."""
         context_parts = [
@@ -300,15 +842,23 @@ install_package('seaborn')
         ]
 
         # Check if CSV data is available
-        if csv_info and csv_info.get('file_path'):
+        if csv_info and len(csv_info.get('tables', {})) > 1:
+            context_parts.extend(self._describe_tables(user_query, csv_info))
+        elif csv_info and csv_info.get('file_path'):
             context_parts.extend([
                 f"CSV Data Available: Yes",
                 f"CSV File Path: {csv_info['file_path']}",
+                f"Columnar Cache Path: {csv_info.get('cache_path') or 'Not available'}",
                 f"CSV Shape: {csv_info['shape']}",
                 f"CSV Columns: {csv_info['columns']}",
                 f"CSV Data Types: {csv_info['dtypes']}",
                 f"CSV Sample Data: {csv_info['sample_data']}",
             ])
+            if csv_info.get('column_stats'):
+                context_parts.append(
+                    "Precomputed Column Statistics (~ marks sketch estimates, use them for approximate answers):\n"
+                    + ColumnProfile(csv_info).summary()
+                )
         else:
             context_parts.extend([
                 f"CSV Data Available: No - User provided data in query",
@@ -329,7 +879,25 @@ install_package('seaborn')
             "NO FUNCTIONS OR CLASSES - Just direct code that prints results!"
         )
         
-        if csv_info and csv_info.get('file_path'):
+        if csv_info and len(csv_info.get('tables', {})) > 1 and df_loaded:
+            context_parts.append(
+                f"IMPORTANT: Each table is already a DataFrame variable named after the table (`df` is `{csv_info['variable']}`) - use them directly, join them with pd.merge, and do NOT read any files!"
+            )
+            context_parts.append(
+                "Variables created while answering earlier questions in this conversation are still available."
+            )
+        elif csv_info and csv_info.get('file_path') and df_loaded:
+            context_parts.append(
+                "IMPORTANT: The data is already loaded as the DataFrame `df` - use it directly and do NOT reload the file!"
+            )
+            context_parts.append(
+                "Variables created while answering earlier questions in this conversation are still available."
+            )
+        elif csv_info and csv_info.get('cache_path'):
+            context_parts.append(
+                f"IMPORTANT: Use pd.read_feather('{csv_info['cache_path']}') to load the data - it is a columnar cache of the CSV and loads much faster than read_csv!"
+            )
+        elif csv_info and csv_info.get('file_path'):
             context_parts.append(
                 f"IMPORTANT: Use pd.read_csv('{csv_info['file_path']}') to load the data from the file path!"
             )
@@ -352,8 +920,33 @@ install_package('seaborn')
 
 
 
+    def _describe_tables(self, user_query: str, csv_info: Dict[str, Any]) -> List[str]:
+        """Describe only the tables relevant to the question, and name the rest."""
+        relevant = relevant_tables(user_query, csv_info)
+        parts = ["CSV Data Available: Yes - multiple tables"]
+        for table in relevant:
+            parts.extend([
+                f"Table `{table['variable']}`:",
+                f"  Shape: {table['shape']}",
+                f"  Columns: {table['columns']}",
+                f"  Data Types: {table['dtypes']}",
+                f"  Sample Data: {table['sample_data'][:2]}",
+            ])
+
+        others = [
+            name for name in csv_info['tables']
+            if name not in {table['variable'] for table in relevant}
+        ]
+        if others:
+            parts.append(f"Other Tables (not described): {', '.join(others)}")
+        return parts
+
     def _prepare_code_fix_context(
-        self, original_code: str, error_message: str, csv_info: Dict[str, Any]
+        self,
+        original_code: str,
+        error_message: str,
+        csv_info: Dict[str, Any],
+        df_loaded: bool = False,
     ) -> str:
         """Prepare context for code fixing."""
         context_parts = [
@@ -365,6 +958,7 @@ install_package('seaborn')
             f"CSV Columns: {csv_info['columns']}",
             f"CSV Data Types: {csv_info['dtypes']}",
             f"CSV Sample Data: {csv_info['sample_data']}",
+            f"Available Tables: {', '.join(csv_info.get('tables', {})) or 'df'}",
             "",
             "INSTRUCTIONS:",
             "The above Python code failed to execute. Please fix the code and return a working version.",
@@ -373,7 +967,7 @@ install_package('seaborn')
             "2. NO SPECIAL CHARACTERS - Use standard ASCII only",
             "3. NO FUNCTIONS - Write code directly",
             "4. NO DOCSTRINGS - No complex documentation",
-            "5. Use pd.read_csv('file_path') to load data",
+            self._data_loading_guideline(csv_info, df_loaded),
             "6. Print human-readable insights directly",
             "7. For charts, save to /tmp/querypls_session_csv_analysis_temp/",
             "",
@@ -382,7 +976,17 @@ install_package('seaborn')
 
         return "\n".join(context_parts)
 
-    def _format_sql_response(self, sql_response) -> str:
+    def _data_loading_guideline(self, csv_info: Dict[str, Any], df_loaded: bool) -> str:
+        """Tell the code fixer how the data should be loaded."""
+        if df_loaded:
+            return "5. The data is already loaded as `df` - do NOT reload it"
+        if csv_info.get("cache_path"):
+            return f"5. Use pd.read_feather('{csv_info['cache_path']}') to load data"
+        return "5. Use pd.read_csv('file_path') to load data"
+
+    def _format_sql_response(
+        self, sql_response, execution: Optional[QueryResult] = None
+    ) -> str:
         """Format SQL response for display."""
         response_parts = [
             f"**SQL Query:**\n```sql\n{sql_response.sql_query}\n```",
@@ -391,9 +995,21 @@ install_package('seaborn')
             f"**Complexity:** {sql_response.complexity}",
             f"**Tables Used:** {', '.join(sql_response.tables_used)}",
             f"**Columns Selected:** {', '.join(sql_response.columns_selected)}",
-            f"**Estimated Rows:** {sql_response.estimated_rows}",
         ]
 
+        if execution is not None:
+            response_parts.append(
+                f"**Rows Returned:** {execution.total_rows:,} "
+                f"(ran in {execution.execution_time})"
+            )
+            if execution.planned_rows is not None:
+                response_parts.append(
+                    f"**Planner Estimate:** ~{execution.planned_rows:,} rows"
+                )
+            response_parts.append(execution.to_markdown())
+        else:
+            response_parts.append(f"**Estimated Rows:** {sql_response.estimated_rows}")
+
         if sql_response.warnings:
             response_parts.append(f"**Warnings:** {', '.join(sql_response.warnings)}")
 
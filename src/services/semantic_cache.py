@@ -0,0 +1,249 @@
+"""
+Semantic cache of generated SQL, matched by question similarity within a schema.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.config.constants import (
+    SEMANTIC_CACHE_DIMENSIONS,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_PATH,
+    SEMANTIC_CACHE_TTL,
+)
+from src.config.settings import get_settings
+
+_WORD = re.compile(r"[a-z0-9_]+")
+# Words that shape a sentence but not the query it asks for
+# ("how many" stays: counting is a different query from listing)
+_STOPWORDS = set("""
+    a all an and are by can do does each every for from give have i in is list
+    me of on per please show tell the there to us what which with you
+    """.split())
+# Numbers and quoted values change what a query means, however similar the wording
+_LITERAL = re.compile(r"'[^']*'|\"[^\"]*\"|\b\d+(?:\.\d+)?\b")
+# So do words that flip a sort order, a filter or a comparison
+_POLARITY = re.compile(
+    r"\b(?:asc|ascending|desc|descending|not|no|without|never|before|after|"
+    r"above|below|less|fewer|greater|more|\w+n't)\b"
+)
+
+
+def schema_fingerprint(schema: Any) -> str:
+    """Hash a schema description; questions only match within one schema."""
+    return hashlib.sha256(
+        json.dumps(schema, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def question_literals(question: str) -> str:
+    """The parts of a question that must match exactly for a cache hit."""
+    question = question.lower()
+    polarity = [
+        "not" if word.endswith("n't") else word for word in _POLARITY.findall(question)
+    ]
+    return json.dumps(sorted(_LITERAL.findall(question)) + sorted(polarity))
+
+
+def embed_question(
+    question: str, dimensions: int = SEMANTIC_CACHE_DIMENSIONS
+) -> np.ndarray:
+    """Embed a question as a unit vector of hashed word and character n-grams."""
+    words = [
+        word[:-1] if len(word) > 3 and word.endswith("s") else word
+        for word in _WORD.findall(question.lower())
+        if word not in _STOPWORDS
+    ]
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features += [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature in features:
+        digest = zlib.crc32(feature.encode())
+        sign = 1.0 if digest & 1 else -1.0
+        vector[(digest >> 1) % dimensions] += sign
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """Previously generated SQL responses, found again for paraphrased questions.
+
+    Entries live in SQLite with their question vectors, so the index survives
+    restarts. A lookup compares the question against every entry for the same
+    schema fingerprint and response type, and returns the closest one at or
+    above the similarity threshold whose numbers, quoted values and direction
+    or negation words match.
+    Entries expire after a TTL and the least recently used go first once the
+    cache is full.
+    """
+
+    def __init__(
+        self,
+        path: str = SEMANTIC_CACHE_PATH,
+        threshold: float = 0.95,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl: float = SEMANTIC_CACHE_TTL,
+        dimensions: int = SEMANTIC_CACHE_DIMENSIONS,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.dimensions = dimensions
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "id INTEGER PRIMARY KEY, fingerprint TEXT, output_type TEXT, "
+                "question TEXT, literals TEXT, vector BLOB, response TEXT, "
+                "created_at REAL, last_used REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_schema "
+                "ON entries (fingerprint, output_type)"
+            )
+        self._lock = threading.Lock()
+        # Vectors of each (fingerprint, output type), loaded on first lookup
+        self._indexes: Dict[
+            Tuple[str, str], Tuple[List[int], List[str], List[float], np.ndarray]
+        ] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def lookup(
+        self, question: str, fingerprint: str, output_type: Type[BaseModel]
+    ) -> Optional[BaseModel]:
+        """Return a validated cached response for a similar question, or None."""
+        with self._lock:
+            ids, literals, created, vectors = self._index(
+                fingerprint, output_type.__name__
+            )
+            match = None
+            if ids:
+                scores = vectors @ embed_question(question, self.dimensions)
+                wanted = question_literals(question)
+                expired_before = time.time() - self.ttl
+                for position in np.argsort(-scores):
+                    if scores[position] < self.threshold:
+                        break
+                    if (
+                        literals[position] == wanted
+                        and created[position] >= expired_before
+                    ):
+                        match = ids[position]
+                        break
+
+            row = None
+            if match is not None:
+                with self._connection:
+                    row = self._connection.execute(
+                        "SELECT response FROM entries WHERE id = ?", (match,)
+                    ).fetchone()
+                    self._connection.execute(
+                        "UPDATE entries SET last_used = ? WHERE id = ?",
+                        (time.time(), match),
+                    )
+            self._stats["hits" if row else "misses"] += 1
+
+        return output_type.model_validate(json.loads(row[0])) if row else None
+
+    def store(self, question: str, fingerprint: str, output: BaseModel):
+        now = time.time()
+        vector = embed_question(question, self.dimensions)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO entries (fingerprint, output_type, question, literals, "
+                "vector, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    fingerprint,
+                    type(output).__name__,
+                    question,
+                    question_literals(question),
+                    vector.tobytes(),
+                    output.model_dump_json(),
+                    now,
+                    now,
+                ),
+            )
+            evicted = self._connection.execute(
+                "DELETE FROM entries WHERE created_at < ? OR id NOT IN "
+                "(SELECT id FROM entries ORDER BY last_used DESC LIMIT ?)",
+                (now - self.ttl, self.max_entries),
+            ).rowcount
+            if evicted:
+                self._indexes.clear()
+            else:
+                self._indexes.pop((fingerprint, type(output).__name__), None)
+            self._stats["stores"] += 1
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM entries")
+            self._indexes.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        with self._lock:
+            entries = self._connection.execute(
+                "SELECT COUNT(*) FROM entries"
+            ).fetchone()[0]
+        return {
+            "entries": entries,
+            "threshold": self.threshold,
+            **self._stats,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+        }
+
+    def _index(
+        self, fingerprint: str, output_type: str
+    ) -> Tuple[List[int], List[str], List[float], np.ndarray]:
+        key = (fingerprint, output_type)
+        if key not in self._indexes:
+            rows = self._connection.execute(
+                "SELECT id, literals, created_at, vector FROM entries "
+                "WHERE fingerprint = ? AND output_type = ?",
+                (fingerprint, output_type),
+            ).fetchall()
+            vectors = np.array(
+                [np.frombuffer(row[3], dtype=np.float32) for row in rows],
+                dtype=np.float32,
+            ).reshape(len(rows), self.dimensions)
+            self._indexes[key] = (
+                [row[0] for row in rows],
+                [row[1] for row in rows],
+                [row[2] for row in rows],
+                vectors,
+            )
+        return self._indexes[key]
+
+
+_semantic_cache_instance: Optional[SemanticCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """The process-wide semantic SQL cache, or None when it is turned off."""
+    global _semantic_cache_instance
+    settings = get_settings()
+    if not settings.semantic_cache:
+        return None
+    with _semantic_cache_lock:
+        if _semantic_cache_instance is None:
+            _semantic_cache_instance = SemanticCache(
+                threshold=settings.semantic_cache_threshold
+            )
+    return _semantic_cache_instance
@@ -0,0 +1,479 @@
+"""
+Embedded SQL engine that runs generated SQL over a session's uploaded tables.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from src.config.constants import (
+    SQL_LOAD_CHUNK_ROWS,
+    SQL_MAX_PLANNED_ROWS,
+    SQL_PAGE_SIZE,
+)
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+@dataclass
+class SQLTable:
+    name: str
+    file_path: str
+    columns: List[str] = field(default_factory=list)
+    row_count: Optional[int] = None
+    loaded: bool = False
+
+
+@dataclass
+class SQLValidation:
+    errors: List[str] = field(default_factory=list)
+    plan: List[str] = field(default_factory=list)
+    estimated_rows: Optional[int] = None
+    scanned_rows: Optional[int] = None
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    @property
+    def planned_rows(self) -> Optional[int]:
+        """DuckDB's cardinality estimate, or the rows SQLite's full scans read."""
+        if self.estimated_rows is not None:
+            return self.estimated_rows
+        return self.scanned_rows
+
+
+_CTE_NAME = re.compile(
+    r'(?:\bwith(?:\s+recursive)?|,)\s*"?(\w+)"?\s*(?:\([^)]*\)\s*)?as\s*\(',
+    re.IGNORECASE,
+)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_TOKEN = re.compile(
+    r'"(?:[^"]|"")*"|\'\'|[A-Za-z_][\w$]*(?:\.[A-Za-z_][\w$]*)*|\d\w*|\S'
+)
+# FROM inside EXTRACT(year FROM ...) and similar calls does not name a table
+_CALLS_WITH_FROM = {"extract", "substring", "trim", "position", "overlay"}
+# Keywords that end a FROM clause
+_FROM_CLAUSE_END = {
+    "where",
+    "group",
+    "order",
+    "having",
+    "limit",
+    "offset",
+    "fetch",
+    "window",
+    "qualify",
+    "union",
+    "except",
+    "intersect",
+}
+_ESTIMATED_ROWS = re.compile(r"~\s*([\d,]+)\s+rows?", re.IGNORECASE)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _deny_attach(action: int, *args: Any) -> int:
+    if action in (sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH):
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+
+def _from_items(code: str) -> Iterator[Tuple[str, str]]:
+    """Yield ``(kind, name)`` for every item a FROM clause reads rows from.
+
+    Covers comma joins, JOINs, parenthesised joins and subqueries at any
+    depth. ``kind`` is "table" for a named relation, "function" for a table
+    function such as ``read_csv('...')`` and "literal" for a quoted file path.
+    String literals must already be blanked to ``''``.
+    """
+    tokens = _TOKEN.findall(code)
+    calls: List[Optional[str]] = [None]  # the call each open parenthesis belongs to
+    # Per parenthesis depth: expecting a FROM "item", "after" one, or None
+    state: Dict[int, Optional[str]] = {}
+    previous = ""
+    for position, token in enumerate(tokens):
+        depth = len(calls) - 1
+        word = token.lower()
+        following = tokens[position + 1] if position + 1 < len(tokens) else ""
+        mode = state.get(depth)
+
+        if token == "(":
+            inner = None
+            if mode == "item":
+                # A subquery walks its own FROM; a parenthesised join is items
+                if following.lower() not in ("select", "with", "values"):
+                    inner = "item"
+                state[depth] = "after"
+            calls.append(previous.lower() if previous[:1].isalpha() else None)
+            state[depth + 1] = inner
+        elif token == ")":
+            if depth:
+                state.pop(depth, None)
+                calls.pop()
+        elif mode == "item":
+            if word != "lateral":
+                if following == "(":
+                    yield "function", token
+                elif token == "''":
+                    yield "literal", token
+                else:
+                    yield "table", token.strip('"').replace('""', '"')
+                state[depth] = "after"
+        elif (
+            word == "from"
+            and calls[-1] not in _CALLS_WITH_FROM
+            and previous.lower() != "distinct"
+        ):
+            state[depth] = "item"
+        elif mode == "after":
+            if token == "," or word == "join":
+                state[depth] = "item"
+            elif word in _FROM_CLAUSE_END:
+                state[depth] = None
+        previous = token
+
+
+@dataclass
+class QueryResult:
+    columns: List[str]
+    rows: List[Tuple[Any, ...]]
+    total_rows: int
+    page: int
+    page_size: int
+    elapsed_seconds: float
+    planned_rows: Optional[int] = None
+
+    @property
+    def has_more(self) -> bool:
+        return (self.page + 1) * self.page_size < self.total_rows
+
+    @property
+    def execution_time(self) -> str:
+        return f"{self.elapsed_seconds * 1000:.1f} ms"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "columns": self.columns,
+            "rows": [list(row) for row in self.rows],
+            "total_rows": self.total_rows,
+            "page": self.page,
+            "page_size": self.page_size,
+            "has_more": self.has_more,
+            "elapsed_seconds": self.elapsed_seconds,
+            "planned_rows": self.planned_rows,
+        }
+
+    def to_markdown(self) -> str:
+        """Render the page as a markdown table."""
+        if not self.columns:
+            return ""
+
+        def cell(value: Any) -> str:
+            return "" if value is None else str(value).replace("|", "\\|")
+
+        lines = [
+            "| " + " | ".join(cell(column) for column in self.columns) + " |",
+            "| " + " | ".join("---" for _ in self.columns) + " |",
+        ]
+        lines += ["| " + " | ".join(cell(v) for v in row) + " |" for row in self.rows]
+        first = self.page * self.page_size
+        if self.total_rows > len(self.rows):
+            lines.append(
+                f"\nShowing rows {first + 1:,}-{first + len(self.rows):,} "
+                f"of {self.total_rows:,}."
+            )
+        return "\n".join(lines)
+
+
+class SQLEngine:
+    """An in-process database holding one session's tables.
+
+    DuckDB is used when it is installed and reads the CSV files in place,
+    with access to any other file switched off; otherwise each table is copied
+    into an in-memory SQLite database in chunks. A table is only loaded the
+    first time a query references it.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend or ("duckdb" if duckdb is not None else "sqlite")
+        if self.backend == "duckdb":
+            self.connection = duckdb.connect()
+            self.connection.execute("SET enable_external_access = false")
+        else:
+            self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+            self.connection.execute("PRAGMA query_only = ON")
+            # query_only does not stop ATTACH from creating database files
+            self.connection.set_authorizer(_deny_attach)
+        # Empty tables with each table's columns, so SQLite can plan queries
+        # without any data being loaded
+        self._schema = sqlite3.connect(":memory:", check_same_thread=False)
+        self.tables: Dict[str, SQLTable] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def dialect(self) -> str:
+        return "DuckDB" if self.backend == "duckdb" else "SQLite"
+
+    def register_table(
+        self,
+        name: str,
+        file_path: str,
+        columns: Optional[List[str]] = None,
+        row_count: Optional[int] = None,
+    ):
+        """Make a CSV queryable under a table name, replacing an older table."""
+        with self._lock:
+            existing = self.tables.get(name)
+            if existing is not None and existing.file_path == file_path:
+                return
+            if existing is not None and existing.loaded and self.backend == "sqlite":
+                self._drop(name)
+            self.tables[name] = SQLTable(
+                name, file_path, list(columns or []), row_count
+            )
+            self._schema.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+            if columns:
+                self._schema.execute(
+                    f"CREATE TABLE {_quote(name)} "
+                    f"({', '.join(_quote(str(column)) for column in columns)})"
+                )
+
+    def referenced_tables(self, sql: str) -> List[str]:
+        return [
+            name
+            for name in self.tables
+            if re.search(rf"(?<![\w.]){re.escape(name)}(?!\w)", sql, re.IGNORECASE)
+        ]
+
+    def validate(self, sql: str) -> SQLValidation:
+        """Check a query against the known schema and estimate its cost.
+
+        The statement is checked locally first: it must be a single read-only
+        query over known tables. The engine's planner then resolves the
+        columns; DuckDB's plan carries a cardinality estimate, and for SQLite
+        the rows of every fully scanned table are summed.
+        """
+        validation = SQLValidation()
+        statement = sql.strip().rstrip(";").strip()
+        code = _STRING_LITERAL.sub("''", statement)
+        if ";" in code:
+            validation.errors.append("Only a single SQL statement can be run.")
+        if not re.match(r"(select|with)\b", code, re.IGNORECASE):
+            validation.errors.append(
+                "Only read-only SELECT queries can run on the uploaded data."
+            )
+
+        known = {name.lower() for name in self.tables}
+        known |= {name.lower() for name in _CTE_NAME.findall(code)}
+        unknown: List[str] = []
+        for kind, name in _from_items(code):
+            if kind == "function":
+                validation.errors.append(
+                    f"Table function '{name}' is not allowed; "
+                    "query the uploaded tables by name."
+                )
+            elif kind == "literal":
+                validation.errors.append(
+                    "Files cannot be read directly; query the uploaded tables by name."
+                )
+            elif name.lower() not in known and name not in unknown:
+                unknown.append(name)
+        for table in unknown:
+            validation.errors.append(
+                f"Unknown table '{table}'. Available tables: {', '.join(self.tables)}."
+            )
+        if not validation.valid:
+            return validation
+
+        try:
+            if self.backend == "duckdb":
+                self._explain_duckdb(statement, validation)
+            else:
+                self._explain_sqlite(statement, validation)
+        except Exception as e:
+            validation.errors.append(str(e))
+        return validation
+
+    def execute(
+        self, sql: str, page: int = 0, page_size: int = SQL_PAGE_SIZE
+    ) -> QueryResult:
+        """Run a query and return one page of its rows with the real row count.
+
+        Rows outside the page are counted as they stream past, not kept.
+        Raises ValueError for anything ``validate`` rejects.
+        """
+        start = time.perf_counter()
+        cursor = self._cursor(sql)
+        columns = [column[0] for column in cursor.description or []]
+        rows: List[Tuple[Any, ...]] = []
+        total = 0
+        for batch in iter(lambda: cursor.fetchmany(page_size), []):
+            if total // page_size == page:
+                rows = [tuple(row) for row in batch]
+            total += len(batch)
+        return QueryResult(
+            columns=columns,
+            rows=rows,
+            total_rows=total,
+            page=page,
+            page_size=page_size,
+            elapsed_seconds=time.perf_counter() - start,
+        )
+
+    def pages(
+        self, sql: str, page_size: int = SQL_PAGE_SIZE
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """Stream a query's rows one page at a time, after validating it."""
+        cursor = self._cursor(sql)
+        for batch in iter(lambda: cursor.fetchmany(page_size), []):
+            yield [tuple(row) for row in batch]
+
+    def close(self):
+        self.connection.close()
+        self._schema.close()
+
+    def _explain_sqlite(self, statement: str, validation: SQLValidation):
+        rows = self._schema.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+        validation.plan = [row[-1] for row in rows]
+        by_name = {name.lower(): table for name, table in self.tables.items()}
+        scanned = [
+            by_name.get(detail.split()[1].strip('"').lower())
+            for detail in validation.plan
+            if detail.startswith("SCAN ") and len(detail.split()) > 1
+        ]
+        counts = [table.row_count for table in scanned if table is not None]
+        if counts and all(count is not None for count in counts):
+            validation.scanned_rows = sum(counts)
+
+    def _explain_duckdb(self, statement: str, validation: SQLValidation):
+        # Views over the CSVs are cheap to create and let DuckDB estimate
+        with self._lock:
+            for name in self.referenced_tables(statement):
+                if not self.tables[name].loaded:
+                    self._load(self.tables[name])
+        plan = "\n".join(
+            str(row[-1])
+            for row in self.connection.execute(f"EXPLAIN {statement}").fetchall()
+        )
+        validation.plan = plan.splitlines()
+        estimate = _ESTIMATED_ROWS.search(plan)
+        if estimate:
+            validation.estimated_rows = int(estimate.group(1).replace(",", ""))
+
+    def _cursor(self, sql: str):
+        validation = self.validate(sql)
+        if not validation.valid:
+            raise ValueError(" ".join(validation.errors))
+        with self._lock:
+            for name in self.referenced_tables(sql):
+                if not self.tables[name].loaded:
+                    self._load(self.tables[name])
+        cursor = self.connection.cursor()
+        cursor.execute(sql)
+        return cursor
+
+    def _load(self, table: SQLTable):
+        if self.backend == "duckdb":
+            self._connect_duckdb()
+            return
+        self.connection.execute("PRAGMA query_only = OFF")
+        try:
+            for chunk in pd.read_csv(table.file_path, chunksize=SQL_LOAD_CHUNK_ROWS):
+                chunk.to_sql(
+                    table.name, self.connection, if_exists="append", index=False
+                )
+        finally:
+            self.connection.execute("PRAGMA query_only = ON")
+        table.loaded = True
+
+    def _connect_duckdb(self):
+        """Reconnect with a view over every table's CSV and no other file access.
+
+        DuckDB cannot turn external access back on once it is off, so the
+        connection is rebuilt, which only recreates the views, when a table
+        is added or replaced.
+        """
+        connection = duckdb.connect()
+        paths = []
+        for table in self.tables.values():
+            path = table.file_path.replace("'", "''")
+            connection.execute(
+                f"CREATE VIEW {_quote(table.name)} AS "
+                f"SELECT * FROM read_csv_auto('{path}')"
+            )
+            paths.append(f"'{path}'")
+        connection.execute(f"SET allowed_paths = [{', '.join(paths)}]")
+        connection.execute("SET enable_external_access = false")
+        self.connection.close()
+        self.connection = connection
+        for table in self.tables.values():
+            table.loaded = True
+
+    def _drop(self, name: str):
+        self.connection.execute("PRAGMA query_only = OFF")
+        try:
+            self.connection.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+        finally:
+            self.connection.execute("PRAGMA query_only = ON")
+
+
+def validate_generated_sql(
+    sql_response: Any, engine: Optional[SQLEngine]
+) -> Optional[SQLValidation]:
+    """Validate a generated read query against the session's tables, if any."""
+    if engine is None or not engine.tables:
+        return None
+    if sql_response.query_type.upper() not in ("SELECT", "WITH"):
+        return None
+    return engine.validate(sql_response.sql_query)
+
+
+def run_generated_sql(
+    sql_response: Any,
+    engine: Optional[SQLEngine],
+    validation: Optional[SQLValidation] = None,
+    max_planned_rows: int = SQL_MAX_PLANNED_ROWS,
+) -> Optional[QueryResult]:
+    """Run a generated query on the session's data and record what really happened.
+
+    Queries that fail validation, or whose plan reads more than
+    ``max_planned_rows``, never run; the reason is added to ``warnings``.
+    Otherwise the model's guessed ``estimated_rows`` and ``execution_time``
+    are replaced with the real row count and timing, and the planner's row
+    count is kept on the result.
+    """
+    validation = validation or validate_generated_sql(sql_response, engine)
+    if validation is None:
+        return None
+    if not validation.valid:
+        sql_response.warnings.extend(validation.errors)
+        return None
+    planned_rows = validation.planned_rows
+    if planned_rows is not None:
+        sql_response.estimated_rows = f"~{planned_rows}"
+        if planned_rows > max_planned_rows:
+            sql_response.warnings.append(
+                f"Query not run: its plan reads about {planned_rows:,} rows, "
+                f"more than the {max_planned_rows:,} allowed."
+            )
+            return None
+    try:
+        result = engine.execute(sql_response.sql_query)
+    except Exception as e:
+        sql_response.warnings.append(f"Query failed on the uploaded data: {e}")
+        return None
+    result.planned_rows = planned_rows
+    sql_response.estimated_rows = str(result.total_rows)
+    sql_response.execution_time = result.execution_time
+    return result
@@ -9,6 +9,13 @@ from pydantic_ai.providers.groq import GroqProvider
 from src.config.settings import get_settings
 from src.schemas.requests import SQLGenerationRequest, ChatMessage
 from src.schemas.responses import SQLQueryResponse, ChatResponse, ErrorResponse
+from src.services.response_cache import cached_agent
+from src.services.semantic_cache import get_semantic_cache, schema_fingerprint
+from src.services.sql_engine import (
+    SQLEngine,
+    run_generated_sql,
+    validate_generated_sql,
+)
 from utils.prompt import SQL_GENERATION_PROMPT
 
 
@@ -26,9 +33,16 @@ class SQLGenerationService:
             self.settings.groq_model_name, provider=GroqProvider(api_key=self.api_key)
         )
 
-        self.agent = Agent(
-            self.model, instructions=SQL_GENERATION_PROMPT, output_type=SQLQueryResponse
+        self.agent = cached_agent(
+            Agent(
+                self.model,
+                instructions=SQL_GENERATION_PROMPT,
+                output_type=SQLQueryResponse,
+            ),
+            "sql_generation",
+            SQL_GENERATION_PROMPT,
         )
+        self.semantic_cache = get_semantic_cache()
 
     def format_chat_history(self, messages: list) -> str:
         history = []
@@ -49,26 +63,65 @@ class SQLGenerationService:
 
         return json.dumps(history, indent=2)
 
-    def generate_sql(self, request: SQLGenerationRequest) -> ChatResponse:
+    def generate_sql(
+        self, request: SQLGenerationRequest, sql_engine: Optional[SQLEngine] = None
+    ) -> ChatResponse:
         try:
             formatted_history = self.format_chat_history(request.conversation_history)
             prompt = f"Previous conversation: {formatted_history}\nCurrent question: {request.user_query}"
 
-            result = self.agent.run_sync(prompt)
-
-            sql_response = SQLQueryResponse(
-                sql_query=result.output.sql_query,
-                explanation=result.output.explanation,
-                tables_used=result.output.tables_used,
-                columns_selected=result.output.columns_selected,
-                query_type=result.output.query_type,
-                complexity=result.output.complexity,
-                estimated_rows=result.output.estimated_rows,
-                execution_time=result.output.execution_time,
-                warnings=result.output.warnings,
+            # The earlier conversation is part of the prompt, so it is part of
+            # the key: follow-ups only match within the same conversation
+            earlier = json.loads(formatted_history)
+            if earlier and earlier[-1].get("query") == request.user_query:
+                earlier.pop()
+            fingerprint = schema_fingerprint(
+                {"schema": request.database_schema, "history": earlier}
             )
+            sql_response = (
+                self.semantic_cache.lookup(
+                    request.user_query, fingerprint, SQLQueryResponse
+                )
+                if self.semantic_cache is not None
+                else None
+            )
+
+            if sql_response is None:
+                result = self.agent.run_sync(prompt)
+
+                sql_response = SQLQueryResponse(
+                    sql_query=result.output.sql_query,
+                    explanation=result.output.explanation,
+                    tables_used=result.output.tables_used,
+                    columns_selected=result.output.columns_selected,
+                    query_type=result.output.query_type,
+                    complexity=result.output.complexity,
+                    estimated_rows=result.output.estimated_rows,
+                    execution_time=result.output.execution_time,
+                    warnings=result.output.warnings,
+                )
+
+                validation = validate_generated_sql(sql_response, sql_engine)
+                if self.semantic_cache is not None and (
+                    validation is None or validation.valid
+                ):
+                    self.semantic_cache.store(
+                        request.user_query, fingerprint, sql_response
+                    )
+
+            execution = run_generated_sql(sql_response, sql_engine)
 
             formatted_content = f"```sql\n{sql_response.sql_query}\n```\n\n**Explanation:** {sql_response.explanation}"
+            if execution is not None:
+                if execution.planned_rows is not None:
+                    formatted_content += (
+                        f"\n\n**Planner Estimate:** ~{execution.planned_rows:,} rows"
+                    )
+                formatted_content += f"\n\n{execution.to_markdown()}"
+            if sql_response.warnings:
+                formatted_content += (
+                    f"\n\n**Warnings:** {', '.join(sql_response.warnings)}"
+                )
 
             session_id = "default"
             if request.conversation_history:
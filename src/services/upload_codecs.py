@@ -0,0 +1,66 @@
+"""
+Streaming decompression for compressed CSV uploads.
+"""
+
+import gzip
+import zipfile
+import zlib
+from typing import BinaryIO, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# What reading a corrupt or unsupported upload can raise; a damaged zip
+# member raises BadZipFile or zlib.error only once it is read
+UPLOAD_ERRORS = (OSError, EOFError, ValueError, zipfile.BadZipFile, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+def upload_codec(filename: str) -> Optional[str]:
+    """Name the codec an upload is compressed with, going by its extension."""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        return "gzip"
+    if name.endswith(".zst"):
+        return "zstd"
+    if name.endswith(".zip"):
+        return "zip"
+    return None
+
+
+def open_upload(stream: BinaryIO, filename: str) -> BinaryIO:
+    """Wrap an upload so that reading it yields the decompressed CSV bytes.
+
+    Decompression happens chunk by chunk as the caller reads, so no full
+    decompressed copy is ever held in memory. Zip archives must contain a CSV
+    file; the first one is used.
+    """
+    codec = upload_codec(filename)
+    if codec is None:
+        return stream
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("Reading .zst uploads requires the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(
+            stream, read_across_frames=True
+        )
+
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"{filename} is not a valid zip archive") from e
+    members = [
+        info.filename
+        for info in archive.infolist()
+        if info.filename.lower().endswith(".csv")
+        and not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+    ]
+    if not members:
+        raise ValueError(f"No CSV file found in {filename}")
+    return archive.open(members[0])
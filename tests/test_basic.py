@@ -44,3 +44,83 @@ def test_session_message_flow():
     )
     assert session_info.session_name == "Test Session"
     assert session_info.session_id is not None
+
+
+def test_memory_usage_reports_shared_dataset():
+    orchestrator = BackendOrchestrator()
+    first = orchestrator.create_new_session(NewChatRequest(session_name="First"))
+    second = orchestrator.create_new_session(NewChatRequest(session_name="Second"))
+    csv_content = "name,age\nJohn,30\nJane,25"
+
+    try:
+        assert (
+            orchestrator.load_csv_data(first.session_id, csv_content)["status"]
+            == "success"
+        )
+        assert (
+            orchestrator.load_csv_data(second.session_id, csv_content)["status"]
+            == "success"
+        )
+
+        usage = orchestrator.get_memory_usage(first.session_id)
+        assert not hasattr(orchestrator.get_session(first.session_id), "csv_data")
+        assert usage["tables"][0]["shared_by"] == 2
+        assert usage["dataset_disk_bytes"] >= len(csv_content)
+        assert usage["messages_bytes"] > 0
+    finally:
+        orchestrator.delete_session(first.session_id)
+        orchestrator.delete_session(second.session_id)
+
+
+def test_dataset_is_held_while_it_is_profiled():
+    orchestrator = BackendOrchestrator()
+    first = orchestrator.create_new_session(NewChatRequest(session_name="First"))
+    second = orchestrator.create_new_session(NewChatRequest(session_name="Second"))
+    csv_content = "name,age\nJohn,30\nJane,25"
+    store = orchestrator.dataset_store
+    profile = store.profile
+
+    def profile_while_first_releases(dataset):
+        # The other session drops the same content mid-profile
+        store.release(first.session_id)
+        assert os.path.exists(dataset.source_path)
+        return profile(dataset)
+
+    try:
+        orchestrator.load_csv_data(first.session_id, csv_content)
+        store.profile = profile_while_first_releases
+        result = orchestrator.load_csv_data(second.session_id, csv_content)
+        assert result["status"] == "success"
+        assert result["memory_bytes"] is None
+
+        def fail(dataset):
+            raise ValueError("unreadable")
+
+        store.profile = fail
+        assert (
+            orchestrator.load_csv_data(first.session_id, "a\n1\n")["status"] == "error"
+        )
+        assert first.session_id not in store.session_keys
+    finally:
+        orchestrator.delete_session(first.session_id)
+        orchestrator.delete_session(second.session_id)
+
+
+def test_corrupt_archive_upload_returns_an_error():
+    import io
+    import zipfile
+
+    orchestrator = BackendOrchestrator()
+    session = orchestrator.create_new_session(NewChatRequest(session_name="Zip"))
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("people.csv", "name,age\nJohn,30\n")
+    corrupt = archive.getvalue().replace(b"John", b"Jane")
+
+    try:
+        result = orchestrator.load_csv_stream(
+            session.session_id, io.BytesIO(corrupt), "people.zip"
+        )
+        assert result["status"] == "error"
+    finally:
+        orchestrator.delete_session(session.session_id)
@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+import pytest
+from src.services.column_stats import ColumnProfile, ColumnStatsAccumulator
+
+
+def test_accumulator_matches_pandas_across_chunks():
+    series = pd.Series([5.0, 1.0, None, 3.0, 3.0, 8.0])
+    stats = ColumnStatsAccumulator()
+    stats.update(series[:3])
+    stats.update(series[3:])
+    result = stats.to_dict()
+
+    assert result["count"] == 5
+    assert result["nulls"] == 1
+    assert result["min"] == 1.0 and result["max"] == 8.0
+    assert result["mean"] == pytest.approx(series.mean())
+    assert result["quantiles"]["0.5"] == pytest.approx(series.median())
+    assert result["distinct"] == 4 and result["distinct_is_exact"]
+    assert result["top_values"][0] == [3.0, 2]
+
+
+def test_profile_answers_simple_questions_only():
+    stats = ColumnStatsAccumulator()
+    stats.update(pd.Series([10, 20, 30]))
+    profile = ColumnProfile(
+        {"shape": (3, 1), "column_stats": {"unit_price": stats.to_dict()}}
+    )
+
+    assert profile.answer("How many rows are there?") == "The dataset has 3 rows."
+    assert profile.answer("What is the average unit price?") == (
+        "The average of `unit_price` is 20."
+    )
+    assert profile.answer("Plot the average unit_price by month") is None
+    assert profile.answer("Which product sells best?") is None
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "average unit price of engineers",
+        "max unit_price in 2023",
+        "How many rows have unit price above 100?",
+        "median unit price excluding returns",
+        "total unit price for electronics",
+        "What is the minimum unit price below 15?",
+    ],
+)
+def test_profile_leaves_filtered_questions_to_the_agent(question):
+    stats = ColumnStatsAccumulator()
+    stats.update(pd.Series([10, 20, 30]))
+    profile = ColumnProfile(
+        {"shape": (3, 1), "column_stats": {"unit_price": stats.to_dict()}}
+    )
+
+    assert profile.answer(question) is None
+    assert profile.answer("What's the max unit price in the dataset?") == (
+        "The maximum of `unit_price` is 30."
+    )
@@ -0,0 +1,43 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.services.dataset_catalog import (
+    DatasetCatalog,
+    referenced_tables,
+    relevant_tables,
+)
+from src.services.dataset_store import DatasetHandle
+
+
+def _catalog():
+    catalog = DatasetCatalog()
+    for name, columns in [
+        ("orders", ["order_id", "amount"]),
+        ("customers", ["region"]),
+    ]:
+        handle = DatasetHandle(name, f"/tmp/{name}.csv", "", "", "")
+        catalog.add(name, handle, {"file_path": handle.source_path, "columns": columns})
+    return catalog
+
+
+def test_table_names_are_identifiers():
+    catalog = DatasetCatalog()
+    assert catalog.table_name_for("Sales Export (2024).csv") == "sales_export_2024"
+    assert catalog.table_name_for("2024.csv.gz") == "table_2024"
+    assert catalog.table_name_for("df.csv") == "table_df"
+
+
+def test_only_referenced_and_relevant_tables_are_used():
+    csv_info = _catalog().csv_info()
+
+    code = "print(df.merge(customers, on='id').shape)"
+    assert set(referenced_tables(code, csv_info)) == {"df", "customers"}
+    assert referenced_tables(code, csv_info)["df"]["variable"] == "orders"
+    assert referenced_tables("print(1 + 1)", csv_info) == {}
+
+    assert [t["variable"] for t in relevant_tables("sales by region", csv_info)] == [
+        "customers"
+    ]
+    assert [t["variable"] for t in relevant_tables("hello", csv_info)] == ["orders"]
@@ -0,0 +1,130 @@
+import gzip
+import io
+import os
+import sys
+import zipfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.services.dataset_profile import profile_csv
+from src.services.dataset_store import DatasetStore, hash_file
+from src.services.upload_codecs import UPLOAD_ERRORS, open_upload
+
+
+def test_ingest_keys_datasets_by_content(tmp_path):
+    store = DatasetStore(cache_dir=str(tmp_path / "cache"))
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    first.write_text("name,age\nJohn,30\n")
+    second.write_text("name,age\nJohn,30\n")
+    key = hash_file(str(first))
+
+    with open(first, "rb") as f:
+        first_handle = store.ingest(f)
+    with open(second, "rb") as f:
+        second_handle = store.ingest(f)
+
+    assert first_handle is second_handle
+    assert first_handle.key == key
+    assert first.exists() and second.exists()
+    assert first_handle.cache_path == second_handle.cache_path
+    assert first_handle.cache_path.endswith(".arrow")
+    assert not first_handle.is_cached
+
+
+def test_dataset_is_evicted_after_last_session_releases_it(tmp_path):
+    store = DatasetStore(cache_dir=str(tmp_path / "cache"))
+    upload = tmp_path / "upload.csv"
+    upload.write_text("name,age\nJohn,30\n")
+    with open(upload, "rb") as f:
+        handle = store.ingest(f)
+
+    store.acquire(handle.key, "session-a")
+    store.acquire(handle.key, "session-b")
+    store.release("session-a")
+    assert store.datasets.get(handle.key) is handle
+    assert os.path.exists(handle.source_path)
+
+    store.release("session-b")
+    assert store.datasets.get(handle.key) is None
+    assert not os.path.exists(handle.source_path)
+
+
+def test_ingest_streams_upload_into_the_store(tmp_path):
+    store = DatasetStore(cache_dir=str(tmp_path / "cache"))
+    upload = tmp_path / "upload.csv"
+    upload.write_text("name,age\nJohn,30\n")
+
+    handle = store.ingest(io.BytesIO(upload.read_bytes()), chunk_size=4)
+
+    assert handle.key == hash_file(str(upload))
+    assert store.ingest(io.BytesIO(upload.read_bytes())) is handle
+    assert sorted(os.listdir(store.cache_dir)) == [f"{handle.key}.csv"]
+
+
+def test_profile_streams_chunks_and_is_stored(tmp_path):
+    store = DatasetStore(cache_dir=str(tmp_path / "cache"))
+    upload = tmp_path / "upload.csv"
+    rows = "\n".join(f"{i},{i * 0.5}" for i in range(250))
+    upload.write_text(f"id,value\n{rows}\n")
+    with open(upload, "rb") as f:
+        handle = store.ingest(f)
+
+    profile = profile_csv(handle.source_path, chunk_rows=40, sample_rows=4)
+    assert profile["shape"] == (250, 2)
+    assert profile["dtypes"] == {"id": "int64", "value": "float64"}
+    assert len(profile["sample_data"]) == 4
+    assert profile["sample_row_numbers"] == sorted(profile["sample_row_numbers"])
+
+    assert store.profile(handle)["shape"] == (250, 2)
+    assert os.path.exists(handle.profile_path)
+
+
+def test_compressed_uploads_dedupe_with_the_plain_csv(tmp_path):
+    store = DatasetStore(cache_dir=str(tmp_path / "cache"))
+    data = b"name,age\nJohn,30\nJane,25\n"
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("notes.txt", b"not a table")
+        zf.writestr("people.csv", data)
+
+    handle = store.ingest(open_upload(io.BytesIO(data), "people.csv"))
+    gzipped = open_upload(io.BytesIO(gzip.compress(data)), "people.csv.gz")
+    zipped = open_upload(io.BytesIO(archive.getvalue()), "people.zip")
+
+    assert store.ingest(gzipped, chunk_size=4) is handle
+    assert store.ingest(zipped) is handle
+    with open(handle.source_path, "rb") as f:
+        assert f.read() == data
+
+    with pytest.raises(ValueError):
+        open_upload(io.BytesIO(b"no csv here"), "empty.zip")
+
+
+def test_truncated_and_corrupt_archives_fail_cleanly(tmp_path):
+    store = DatasetStore(cache_dir=str(tmp_path / "cache"))
+    data = b"id,value\n" + b"".join(b"%d,%d\n" % (i, i * 7) for i in range(5000))
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("data.csv", data)
+    zipped = archive.getvalue()
+    # Flip bytes inside the deflate stream but keep the directory intact
+    corrupt = bytearray(zipped)
+    corrupt[60:80] = bytes(b ^ 0xFF for b in corrupt[60:80])
+
+    # Stored members decompress fine but fail their CRC check
+    stored = io.BytesIO()
+    with zipfile.ZipFile(stored, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("data.csv", data)
+    bad_crc = stored.getvalue().replace(b"4999,34993", b"4999,34994")
+
+    uploads = [
+        ("data.csv.gz", gzip.compress(data)[:-200]),
+        ("data.zip", zipped[: len(zipped) // 2]),
+        ("data.zip", bytes(corrupt)),
+        ("data.zip", bad_crc),
+    ]
+    for filename, payload in uploads:
+        with pytest.raises(UPLOAD_ERRORS):
+            store.ingest(open_upload(io.BytesIO(payload), filename))
+    assert not os.listdir(store.cache_dir)
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.services.jupyter_service import (
+    AsyncJupyterClient,
+    CSVAnalysisService,
+    ExecutionResult,
+    SimpleJupyterClient,
+    build_bootstrap_code,
+)
+
+
+def test_close_session_shuts_down_kernel():
+    client = SimpleJupyterClient()
+    client.create_new_session("test_kernel")
+
+    inventory = client.list_kernels()
+    assert len(inventory) == 1
+    assert inventory[0]["session_id"] == "test_kernel"
+    assert inventory[0]["pid"] is not None
+    assert inventory[0]["alive"] is True
+
+    km = client.kernel_managers["test_kernel"]
+    client.close_session("test_kernel")
+    assert not km.is_alive()
+    assert client.list_kernels() == []
+
+
+def test_reap_idle_kernels():
+    client = SimpleJupyterClient()
+    client.create_new_session("idle_kernel")
+    assert client.reap_kernels(idle_ttl=0) == ["idle_kernel"]
+    assert "idle_kernel" not in client.clients
+
+
+def test_only_allowlisted_environment_reaches_the_kernel(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "secret-key")
+    monkeypatch.setenv("TZ", "UTC")
+    assert "secret-key" not in build_bootstrap_code()
+
+    client = SimpleJupyterClient()
+    client.create_new_session("env_kernel")
+    try:
+        result = client.execute_code(
+            "import os\n"
+            "print(os.environ.get('TZ'), TZ, 'GROQ_API_KEY' in os.environ, "
+            "'GROQ_API_KEY' in globals())",
+            "env_kernel",
+        )
+    finally:
+        client.close_session("env_kernel", now=True)
+
+    assert result.output.strip() == "UTC UTC False False"
+
+
+def test_kernel_startup_is_timed():
+    client = SimpleJupyterClient()
+    client.create_new_session("timed_kernel")
+    try:
+        timings = client.startup_times["timed_kernel"]
+        metrics = client.get_startup_metrics()
+    finally:
+        client.close_session("timed_kernel", now=True)
+
+    assert timings["kernel_start_seconds"] > 0
+    assert timings["bootstrap_seconds"] > 0
+    assert timings["total_seconds"] >= timings["kernel_start_seconds"]
+    assert metrics["kernels"] == 1
+    assert metrics["max_total_seconds"] == timings["total_seconds"]
+
+
+def test_execution_past_its_deadline_times_out_and_is_interrupted():
+    client = SimpleJupyterClient()
+    client.create_new_session("slow_kernel")
+    try:
+        result = client.execute_code(
+            "import time\ntime.sleep(10)", "slow_kernel", timeout=1
+        )
+        after = client.execute_code("print('still here')", "slow_kernel")
+    finally:
+        client.close_session("slow_kernel", now=True)
+
+    assert result.status == "Timeout"
+    assert result.execution_time < 10
+    assert result.kernel_restarted is False
+    assert after.output.strip() == "still here"
+
+
+def test_kernel_ignoring_interrupts_is_restarted_and_bootstrapped():
+    client = SimpleJupyterClient()
+    client.create_new_session("stuck_kernel")
+    try:
+        client.execute_code("marker = 1", "stuck_kernel")
+        # The kernel installs its own SIGINT handler per execution, so the
+        # runaway cell has to ignore the signal itself
+        result = client.execute_code(
+            "import signal, time\n"
+            "signal.signal(signal.SIGINT, signal.SIG_IGN)\n"
+            "time.sleep(60)",
+            "stuck_kernel",
+            timeout=1,
+        )
+        after = client.execute_code(
+            "print('marker' in globals(), pd.__name__)", "stuck_kernel"
+        )
+    finally:
+        client.close_session("stuck_kernel", now=True)
+
+    assert result.status == "Timeout"
+    assert result.kernel_restarted is True
+    assert after.output.strip() == "False pandas"
+
+
+def test_output_is_truncated_at_the_byte_budget():
+    client = SimpleJupyterClient()
+    client.create_new_session("chatty_kernel")
+    try:
+        result = client.execute_code(
+            "print('x' * 5000)", "chatty_kernel", max_output_bytes=100
+        )
+    finally:
+        client.close_session("chatty_kernel", now=True)
+
+    assert result.status == "Success"
+    assert result.output.count("x") == 100
+    assert result.output.endswith("[output truncated after 100 bytes]")
+
+
+def test_timed_out_analysis_is_reported_as_timeout():
+    service = CSVAnalysisService()
+    result = ExecutionResult(
+        output="partial",
+        status="Timeout",
+        error_message="Execution timed out after 30 seconds",
+        execution_time=30.0,
+    )
+
+    outcome = service._analysis_outcome(result, attempt=0)
+
+    assert outcome["status"] == "timeout"
+    assert outcome["error_message"] == "Execution timed out after 30 seconds"
+    assert outcome["output"] == "partial"
+    assert outcome["attempt"] == 1
+
+
+def test_async_client_runs_sessions_concurrently():
+    async def run():
+        client = AsyncJupyterClient()
+        await asyncio.gather(
+            client.create_new_session("async_a"), client.create_new_session("async_b")
+        )
+        try:
+            return await asyncio.gather(
+                client.execute_code("print('a')", "async_a"),
+                client.execute_code("print('b')", "async_b"),
+            )
+        finally:
+            await client.close_all_sessions()
+
+    results = asyncio.run(run())
+    assert [result.status for result in results] == ["Success", "Success"]
+    assert [result.output for result in results] == ["a", "b"]
+
+
+def test_load_optimizes_dtypes_and_reports_savings(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    rows = [
+        f"{i},{['north', 'south'][i % 2]},2024-01-{i % 28 + 1:02d}" for i in range(200)
+    ]
+    csv_path.write_text("id,region,day\n" + "\n".join(rows) + "\n")
+    service = CSVAnalysisService(optimize_dtypes=True)
+
+    try:
+        result = service.load_csv_file("optimized", str(csv_path))
+        info = service.get_csv_info("optimized")
+    finally:
+        service.close_session("optimized")
+
+    assert result["status"] == "success"
+    assert info["dtypes"]["id"] == "int64"
+    assert info["dtypes"]["region"] == "category"
+    assert info["dtypes"]["day"].startswith("datetime64")
+    assert info["memory_saved_bytes"] > 0
+
+
+def test_optimized_integer_columns_multiply_without_overflow(tmp_path):
+    csv_path = tmp_path / "sales.csv"
+    csv_path.write_text("qty,price_cents\n100000,50000\n")
+    service = CSVAnalysisService(optimize_dtypes=True)
+
+    try:
+        service.load_csv_file("overflow", str(csv_path))
+        result = service.execute_analysis(
+            "overflow", "print((df.qty * df.price_cents).iloc[0])"
+        )
+    finally:
+        service.close_session("overflow")
+
+    assert result["output"].strip() == "5000000000"
+
+
+def test_tables_load_on_demand_and_share_a_parse(tmp_path):
+    csv_path = tmp_path / "orders.csv"
+    csv_path.write_text("order_id,amount\n1,9.5\n2,3.0\n")
+    table = {"file_path": str(csv_path)}
+    service = CSVAnalysisService()
+
+    try:
+        assert service.ensure_tables("lazy", {})["loaded"] == []
+        service.ensure_tables("lazy", {"orders": table, "df": table})
+        result = service.execute_analysis("lazy", "print(df is orders)")
+    finally:
+        service.close_session("lazy")
+
+    assert result["output"].strip() == "True"
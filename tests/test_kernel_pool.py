@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.services.kernel_pool import KernelPool
+
+
+def test_kernel_pool_reuses_warm_kernels():
+    pool = KernelPool(size=1, max_executions=10).start()
+    try:
+        with pool.kernel() as kernel:
+            first_session = kernel.session_id
+            result = pool.jupyter_client.execute_code("x = 41", kernel.session_id)
+            assert result.status == "Success"
+
+        with pool.kernel() as kernel:
+            assert kernel.session_id == first_session
+            result = pool.jupyter_client.execute_code(
+                "print(pd.__name__)", kernel.session_id
+            )
+            assert result.output == "pandas"
+
+        metrics = pool.metrics()
+        assert metrics["pool_size"] == 1
+        assert metrics["checkouts"] == 2
+        assert metrics["kernels_started"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_reaper_leaves_idle_pool_kernels_alone():
+    pool = KernelPool(size=1).start()
+    try:
+        assert pool.jupyter_client.reap_kernels(idle_ttl=0) == []
+        assert pool.metrics()["idle"] == 1
+
+        kernel = pool.take()
+        assert pool.jupyter_client.reap_kernels(idle_ttl=0) == [kernel.session_id]
+    finally:
+        pool.shutdown()
@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.services.local_router import LocalRouter, is_conversational
+
+
+@pytest.mark.parametrize(
+    "query, csv_loaded, agent",
+    [
+        ("Hello", False, "CONVERSATION_AGENT"),
+        ("thanks for your help", True, "CONVERSATION_AGENT"),
+        ("SELECT name FROM users WHERE id = 1", True, "SQL_AGENT"),
+        ("Write a SQL query to count orders per customer", False, "SQL_AGENT"),
+        ("Plot sales by region", True, "CSV_AGENT"),
+        ("Summarize the dataset", True, "CSV_AGENT"),
+    ],
+)
+def test_obvious_queries_are_routed_locally(query, csv_loaded, agent):
+    decision = LocalRouter().route(query, csv_loaded)
+    assert decision is not None
+    assert decision.agent == agent
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "Which camera is most premium?",
+        "hi, can you plot sales by region?",
+        "Which camera has good battery life?",
+        "Help me find customers who churned",
+        "okay, which laptop is the cheapest?",
+    ],
+)
+def test_unclear_queries_fall_back_to_the_llm(query):
+    assert LocalRouter().route(query, csv_loaded=True) is None
+
+
+def test_conversational_keywords_match_whole_words():
+    assert is_conversational("hi there")
+    assert not is_conversational("this is the shipping table")
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+from typing import Union
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.services.models import Failed, RoutingDecision
+from src.services.response_cache import (
+    CachedAgent,
+    MemoryCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+    normalize_prompt,
+)
+
+
+def test_normalize_prompt_keeps_quoted_literals():
+    assert normalize_prompt(
+        "  Show   TOP 10\ncustomers where region = 'North  West' "
+    ) == ("Show TOP 10 customers where region = 'North  West'")
+
+
+def test_normalize_prompt_keeps_the_case_of_unquoted_values():
+    assert normalize_prompt("orders from customer Bob") != normalize_prompt(
+        "orders from customer bob"
+    )
+
+
+def test_memory_backend_evicts_least_recently_used_and_expired():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", "1", ttl=60)
+    backend.set("b", "2", ttl=60)
+    backend.get("a")
+    backend.set("c", "3", ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+
+    backend.set("d", "4", ttl=-1)
+    assert backend.get("d") is None
+
+
+def test_sqlite_backend_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache" / "responses.sqlite")
+    SQLiteCacheBackend(path, max_entries=2).set("a", "1", ttl=60)
+
+    backend = SQLiteCacheBackend(path, max_entries=2)
+    assert backend.get("a") == "1"
+    backend.set("b", "2", ttl=60)
+    time.sleep(0.01)
+    backend.get("a")
+    backend.set("c", "3", ttl=60)
+    assert backend.get("b") is None
+    assert len(backend) == 2
+
+
+def test_cached_agent_returns_validated_outputs():
+    decision = RoutingDecision(agent="SQL_AGENT", confidence=0.9, reasoning="sql")
+    agent = MagicMock()
+    agent.model.model_name = "test-model"
+    agent.output_type = Union[RoutingDecision, Failed]
+    agent.run_sync.return_value = MagicMock(output=decision)
+    cache = ResponseCache(MemoryCacheBackend(), ttl=60)
+    cached = CachedAgent(agent, "routing_agent", "prompt v1", cache)
+
+    first = cached.run_sync("Show top 10 customers")
+    second = cached.run_sync("Show   top 10 customers ")
+
+    agent.run_sync.assert_called_once()
+    assert first.output is decision
+    assert second.output == decision and second.output is not decision
+    assert cache.metrics()["hits"] == 1
+
+    # A new system prompt is a new prompt version
+    CachedAgent(agent, "routing_agent", "prompt v2", cache).run_sync(
+        "Show top 10 customers"
+    )
+    assert agent.run_sync.call_count == 2
+
+
+def test_failed_outputs_are_not_cached():
+    agent = MagicMock()
+    agent.model.model_name = "test-model"
+    agent.output_type = Union[RoutingDecision, Failed]
+    agent.run_sync.return_value = MagicMock(output=Failed(error="no"))
+    cached = CachedAgent(
+        agent, "routing_agent", "prompt", ResponseCache(MemoryCacheBackend(), 60)
+    )
+
+    cached.run_sync("hello")
+    cached.run_sync("hello")
+    assert agent.run_sync.call_count == 2
@@ -0,0 +1,249 @@
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.services.models import ConversationResponse, RoutingDecision, SQLResponse
+from src.services.routing_service import IntelligentRoutingService
+from src.services.semantic_cache import SemanticCache
+from src.services.sql_engine import SQLEngine
+
+SQL_OUTPUT = SQLResponse(
+    sql_query="SELECT customer, COUNT(*) AS n FROM orders GROUP BY customer",
+    explanation="Orders per customer",
+    tables_used=["orders"],
+    columns_selected=["customer"],
+    query_type="SELECT",
+    complexity="SIMPLE",
+    estimated_rows="10",
+)
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = IntelligentRoutingService()
+    service.semantic_cache = SemanticCache(
+        str(tmp_path / "semantic.sqlite"),
+        threshold=service.settings.semantic_cache_threshold,
+    )
+    return service
+
+
+def test_single_call_uses_the_result_type_to_pick_the_agent(service, tmp_path):
+    orders = tmp_path / "orders.csv"
+    orders.write_text("id,customer\n1,ann\n2,bob\n3,ann\n")
+    engine = SQLEngine(backend="sqlite")
+    engine.register_table("orders", str(orders), ["id", "customer"], 3)
+    csv_info = {
+        "variable": "orders",
+        "columns": ["id", "customer"],
+        "tables": {
+            "orders": {
+                "variable": "orders",
+                "columns": ["id", "customer"],
+                "dtypes": {"id": "int64", "customer": "str"},
+                "shape": (3, 2),
+            }
+        },
+    }
+    output = SQL_OUTPUT.model_copy(deep=True)
+
+    with patch.object(
+        service.combined_agent, "run_sync", return_value=MagicMock(output=output)
+    ) as run_sync, patch.object(service.routing_agent, "run_sync") as routing:
+        response = service.handle_single_call(
+            "orders per customer", [], csv_info, None, engine
+        )
+
+    run_sync.assert_called_once()
+    routing.assert_not_called()
+    assert "**Rows Returned:** 2" in response
+    assert "**Planner Estimate:** ~3 rows" in response
+    engine.close()
+
+
+def test_single_call_returns_conversation_replies(service):
+    output = ConversationResponse(message="Hi!", response_type="greeting")
+    with patch.object(
+        service.combined_agent, "run_sync", return_value=MagicMock(output=output)
+    ):
+        assert service.handle_single_call("hmm, who made you?", []) == "Hi!"
+    assert service.routing_stats["single_call"] == 1
+
+
+def test_speculative_draft_is_kept_when_the_route_matches(service):
+    def route(context):
+        time.sleep(0.05)
+        return MagicMock(
+            output=RoutingDecision(agent="SQL_AGENT", confidence=0.9, reasoning="")
+        )
+
+    def draft(context):
+        time.sleep(0.05)
+        return MagicMock(output=SQL_OUTPUT)
+
+    with patch.object(
+        service.routing_agent, "run_sync", side_effect=route
+    ), patch.object(service.sql_agent, "run_sync", side_effect=draft) as sql_agent:
+        agent, response = service.handle_speculative("orders per customer", [])
+
+    assert agent == "SQL_AGENT"
+    assert "SELECT customer" in response
+    sql_agent.assert_called_once()
+    stats = service.speculation_stats()
+    assert stats["speculative_hits"] == 1
+    assert stats["hit_rate"] == 1.0
+    assert stats["saved_seconds"] > 0.02
+
+
+def test_speculative_draft_is_discarded_on_a_miss(service):
+    decision = RoutingDecision(agent="CONVERSATION_AGENT", confidence=0.9, reasoning="")
+    reply = ConversationResponse(message="I am Querypls.", response_type="general")
+    with patch.object(
+        service.routing_agent, "run_sync", return_value=MagicMock(output=decision)
+    ), patch.object(
+        service.sql_agent, "run_sync", return_value=MagicMock(output=SQL_OUTPUT)
+    ), patch.object(
+        service.conversation_agent, "run_sync", return_value=MagicMock(output=reply)
+    ):
+        agent, response = service.handle_speculative(
+            "orders per customer", [], last_agent="SQL_AGENT"
+        )
+
+    assert (agent, response) == ("CONVERSATION_AGENT", "I am Querypls.")
+    assert service.speculation_stats()["speculative_misses"] == 1
+
+
+def test_paraphrased_sql_questions_reuse_the_generated_query(service):
+    with patch.object(
+        service.sql_agent, "run_sync", return_value=MagicMock(output=SQL_OUTPUT)
+    ) as sql_agent:
+        first = service.handle_sql_query("What is the total amount per customer?", [])
+        second = service.handle_sql_query(
+            "Show me the total amount for each customer", []
+        )
+        service.handle_sql_query("List the orders per customer", [])
+        service.handle_sql_query("How many orders does each customer have?", [])
+
+    assert first == second
+    assert sql_agent.call_count == 3
+    assert service.semantic_cache.metrics()["hits"] == 1
+
+
+def test_schema_fingerprint_survives_a_kernel_load(service):
+    orders = {
+        "variable": "orders",
+        "columns": ["id", "region"],
+        "dtypes": {"id": "int64", "region": "object"},
+        "profile_dtypes": {"id": "int64", "region": "object"},
+    }
+    csv_info = {**orders, "tables": {"orders": orders}}
+    engine = SQLEngine(backend="sqlite")
+    before = service._sql_cache_fingerprint("orders by region", [], csv_info, engine)
+
+    orders["dtypes"] = {"id": "int32", "region": "category"}
+    assert service._sql_cache_fingerprint("q", [], csv_info, engine) == before
+    engine.close()
+
+
+def test_environment_is_checked_once_and_queries_skip_the_bootstrap(
+    service, monkeypatch
+):
+    from src.services import jupyter_service as jupyter_module
+    from src.services.jupyter_service import CSVAnalysisService
+
+    analysis = CSVAnalysisService()
+    analysis._ensure_kernel("env_check")
+    # Pooled kernels started by other tests check the environment too, so
+    # count every check in the process, not just this client's
+    check_code = patch.object(
+        jupyter_module,
+        "build_environment_check_code",
+        wraps=jupyter_module.build_environment_check_code,
+    )
+    try:
+        with check_code as build_check:
+            with jupyter_module._environment_lock:
+                monkeypatch.setattr(jupyter_module, "_environment_status", None)
+            outputs = [
+                service._run_csv_analysis("print(6 * 7)", None, "env_check", analysis)
+                for _ in range(3)
+            ]
+            analysis.jupyter_client.verify_environment("env_check")
+    finally:
+        analysis.close_session("env_check")
+
+    status = jupyter_module.get_environment_status()
+    assert outputs == ["42"] * 3
+    assert build_check.call_count == 1
+    assert status.ok
+    assert status.metrics()["bootstrap_runs_skipped"] == 3
+    assert status.metrics()["estimated_latency_saved_seconds"] == pytest.approx(
+        status.check_seconds * 3
+    )
+
+
+def test_speculative_routing_is_enabled_from_the_environment(monkeypatch):
+    from src.backend.orchestrator import BackendOrchestrator
+    from src.config import settings as settings_module
+    from src.schemas.requests import NewChatRequest
+
+    monkeypatch.setenv("SPECULATIVE_ROUTING", "true")
+    monkeypatch.setattr(settings_module, "_settings_instance", None)
+    orchestrator = BackendOrchestrator()
+    session = orchestrator.create_new_session(NewChatRequest(session_name="Spec"))
+
+    with patch.object(
+        orchestrator.routing_service,
+        "handle_speculative",
+        return_value=("SQL_AGENT", "SELECT 1"),
+    ) as speculative:
+        response = orchestrator.generate_intelligent_response(
+            session.session_id, "orders per customer"
+        )
+
+    speculative.assert_called_once()
+    assert response.content == "SELECT 1"
+    assert orchestrator.get_session(session.session_id).last_agent == "SQL_AGENT"
+
+
+def test_loaded_tables_update_the_top_level_description(service):
+    orders = {"variable": "orders", "dtypes": {"region": "object"}}
+    csv_info = {**orders, "tables": {"orders": orders}}
+    jupyter_service = MagicMock()
+    jupyter_service.ensure_tables.return_value = {"status": "success"}
+    jupyter_service.get_csv_info.return_value = {
+        "dtypes": {"region": "category"},
+        "memory_bytes": 100,
+        "memory_saved_bytes": 400,
+    }
+
+    service._load_referenced_tables("print(df.shape)", csv_info, "s1", jupyter_service)
+
+    assert csv_info["dtypes"] == orders["dtypes"] == {"region": "category"}
+    assert csv_info["memory_saved_bytes"] == orders["memory_saved_bytes"] == 400
+
+
+def test_follow_ups_only_reuse_sql_from_the_same_conversation(service):
+    from src.schemas.requests import ChatMessage
+
+    def conversation(*turns):
+        messages = [ChatMessage(role="assistant", content="Welcome!")]
+        for turn in turns:
+            messages += [
+                ChatMessage(role="user", content=turn),
+                ChatMessage(role="assistant", content=f"SQL for {turn}"),
+            ]
+        return messages + [ChatMessage(role="user", content="only for 2023")]
+
+    with patch.object(
+        service.sql_agent, "run_sync", return_value=MagicMock(output=SQL_OUTPUT)
+    ) as sql_agent:
+        service.handle_sql_query("only for 2023", conversation("orders per customer"))
+        service.handle_sql_query("only for 2023", conversation("revenue by region"))
+        service.handle_sql_query("only for 2023", conversation("orders per customer"))
+
+    assert sql_agent.call_count == 2
+    assert service.semantic_cache.metrics()["hits"] == 1
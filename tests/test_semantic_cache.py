@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.services.models import SQLResponse
+from src.services.semantic_cache import (
+    SemanticCache,
+    embed_question,
+    schema_fingerprint,
+)
+
+SCHEMA = schema_fingerprint({"orders": ["id", "customer", "amount"]})
+
+
+def sql_response(sql):
+    return SQLResponse(
+        sql_query=sql,
+        explanation="",
+        tables_used=["orders"],
+        columns_selected=[],
+        query_type="SELECT",
+        complexity="SIMPLE",
+        estimated_rows="1",
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticCache(str(tmp_path / "semantic.sqlite"), threshold=0.8)
+
+
+def test_paraphrases_embed_close_together():
+    paraphrase = embed_question(
+        "What is the total amount per customer?"
+    ) @ embed_question("total amount for each customer")
+    unrelated = embed_question(
+        "What is the total amount per customer?"
+    ) @ embed_question("list orders placed yesterday")
+    assert paraphrase > 0.6 > unrelated
+
+
+def test_similar_question_hits_and_different_question_misses(cache):
+    cache.store("Total amount per customer", SCHEMA, sql_response("SELECT 1"))
+
+    hit = cache.lookup("total amount per customer?", SCHEMA, SQLResponse)
+    assert hit.sql_query == "SELECT 1"
+    assert cache.lookup("Show every order", SCHEMA, SQLResponse) is None
+    assert cache.metrics()["hits"] == 1
+
+
+def test_numbers_and_quoted_values_must_match(cache):
+    cache.store("Top 10 customers by amount", SCHEMA, sql_response("LIMIT 10"))
+
+    assert cache.lookup("top 10 customers by amount", SCHEMA, SQLResponse)
+    assert cache.lookup("Top 5 customers by amount", SCHEMA, SQLResponse) is None
+
+
+@pytest.mark.parametrize(
+    "stored, opposite",
+    [
+        (
+            "list all customers with their total revenue and order count "
+            "sorted by revenue in ascending order",
+            "list all customers with their total revenue and order count "
+            "sorted by revenue in descending order",
+        ),
+        (
+            "customers who have placed orders",
+            "customers who have not placed orders",
+        ),
+        ("customers who have placed orders", "customers who haven't placed orders"),
+        (
+            "orders placed before the first refund",
+            "orders placed after the first refund",
+        ),
+        (
+            "customers with more orders than average",
+            "customers with fewer orders than average",
+        ),
+    ],
+)
+def test_direction_and_negation_words_must_match(tmp_path, stored, opposite):
+    cache = SemanticCache(str(tmp_path / "semantic.sqlite"))
+    cache.store(stored, SCHEMA, sql_response("SELECT 1"))
+
+    assert cache.lookup(stored.capitalize(), SCHEMA, SQLResponse)
+    assert cache.lookup(opposite, SCHEMA, SQLResponse) is None
+
+
+def test_entries_are_scoped_to_their_schema(cache):
+    cache.store("Total amount per customer", SCHEMA, sql_response("SELECT 1"))
+    other = schema_fingerprint({"orders": ["id", "client", "amount"]})
+
+    assert cache.lookup("Total amount per customer", other, SQLResponse) is None
+
+
+def test_index_persists_across_instances(tmp_path):
+    path = str(tmp_path / "semantic.sqlite")
+    SemanticCache(path).store(
+        "Total amount per customer", SCHEMA, sql_response("SELECT 1")
+    )
+
+    assert SemanticCache(path).lookup("total amount per customer", SCHEMA, SQLResponse)
+
+
+def test_least_recently_used_and_expired_entries_are_evicted(tmp_path):
+    cache = SemanticCache(str(tmp_path / "semantic.sqlite"), max_entries=2)
+    cache.store("Total amount per customer", SCHEMA, sql_response("SELECT 1"))
+    time.sleep(0.01)
+    cache.store("Count orders by day", SCHEMA, sql_response("SELECT 2"))
+    time.sleep(0.01)
+    cache.lookup("Total amount per customer", SCHEMA, SQLResponse)
+    cache.store("Average order amount", SCHEMA, sql_response("SELECT 3"))
+
+    assert cache.metrics()["entries"] == 2
+    assert cache.lookup("Count orders by day", SCHEMA, SQLResponse) is None
+    assert cache.lookup("Total amount per customer", SCHEMA, SQLResponse)
+
+    cache.ttl = 0
+    assert cache.lookup("Average order amount", SCHEMA, SQLResponse) is None
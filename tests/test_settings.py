@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.config.settings import Settings
+
+
+def test_defaults_without_environment(monkeypatch):
+    for name in ("SINGLE_CALL_MODE", "RESPONSE_CACHE", "SEMANTIC_CACHE_THRESHOLD"):
+        monkeypatch.delenv(name, raising=False)
+    settings = Settings()
+
+    assert settings.single_call_mode is False
+    assert settings.response_cache == "memory"
+    assert settings.semantic_cache_threshold == 0.95
+
+
+def test_modes_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("SINGLE_CALL_MODE", "true")
+    monkeypatch.setenv("SPECULATIVE_ROUTING", "1")
+    monkeypatch.setenv("LOCAL_ROUTING", "false")
+    monkeypatch.setenv("OPTIMIZE_DTYPES", "false")
+    monkeypatch.setenv("RESPONSE_CACHE", "off")
+    monkeypatch.setenv("RESPONSE_CACHE_TTL", "60")
+    monkeypatch.setenv("SEMANTIC_CACHE", "false")
+    monkeypatch.setenv("SEMANTIC_CACHE_THRESHOLD", "0.8")
+    settings = Settings()
+
+    assert settings.single_call_mode is True
+    assert settings.speculative_routing is True
+    assert settings.local_routing is False
+    assert settings.optimize_dtypes is False
+    assert settings.response_cache == "off"
+    assert settings.response_cache_ttl == 60
+    assert settings.semantic_cache is False
+    assert settings.semantic_cache_threshold == 0.8
@@ -0,0 +1,43 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pandas as pd
+import pytest
+from src.services.sketches import HyperLogLog, KLLSketch, SpaceSaving, hash_values
+
+
+def test_hyperloglog_estimates_distinct_count():
+    sketch = HyperLogLog()
+    values = pd.Series(np.arange(50_000))
+    sketch.update(hash_values(values[:30_000]))
+    sketch.update(hash_values(values[20_000:]))
+
+    assert sketch.estimate() == pytest.approx(50_000, rel=0.05)
+    assert HyperLogLog.from_dict(sketch.to_dict()).estimate() == sketch.estimate()
+
+
+def test_kll_quantiles_stay_within_rank_error():
+    values = np.random.default_rng(1).random(100_000)
+    sketch = KLLSketch()
+    for chunk in np.array_split(values, 10):
+        sketch.update(chunk)
+
+    assert sketch.count == len(values)
+    assert not sketch.is_exact
+    assert sketch.quantile(0.9) == pytest.approx(np.quantile(values, 0.9), abs=0.02)
+    assert KLLSketch.from_dict(sketch.to_dict()).quantile(0.5) == sketch.quantile(0.5)
+
+
+def test_space_saving_keeps_heavy_hitters():
+    values = pd.Series(["a"] * 500 + ["b"] * 300 + [f"rare-{i}" for i in range(200)])
+    sketch = SpaceSaving(capacity=10)
+    shuffled = values.sample(frac=1, random_state=0)
+    for start in range(0, len(shuffled), 200):
+        sketch.update(shuffled[start : start + 200])
+
+    (first, first_count), (second, second_count) = sketch.top(2)
+    assert (first, second) == ("a", "b")
+    assert 500 <= first_count <= 500 + sketch.error
+    assert 300 <= second_count <= 300 + sketch.error
@@ -0,0 +1,162 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from src.schemas.responses import SQLQueryResponse
+from src.services.sql_engine import SQLEngine, duckdb, run_generated_sql
+
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def engine(request, tmp_path):
+    if request.param == "duckdb" and duckdb is None:
+        pytest.skip("duckdb is not installed")
+    sales = tmp_path / "sales.csv"
+    rows = "\n".join(f"{i},{'north' if i % 2 else 'south'},{i * 10}" for i in range(7))
+    sales.write_text(f"id,region,amount\n{rows}\n")
+    engine = SQLEngine(backend=request.param)
+    engine.register_table("sales", str(sales), ["id", "region", "amount"], 7)
+    yield engine
+    engine.close()
+
+
+def test_tables_load_on_first_query_and_results_are_paged(engine):
+    assert not engine.tables["sales"].loaded
+
+    result = engine.execute(
+        "SELECT id, amount FROM sales ORDER BY id", page=1, page_size=3
+    )
+    assert engine.tables["sales"].loaded
+    assert result.columns == ["id", "amount"]
+    assert result.rows == [(3, 30), (4, 40), (5, 50)]
+    assert result.total_rows == 7
+    assert result.has_more
+
+    pages = list(engine.pages("SELECT id FROM sales", page_size=3))
+    assert [len(page) for page in pages] == [3, 3, 1]
+
+
+def test_queries_are_read_only(engine):
+    engine.execute("SELECT COUNT(*) FROM sales")
+    with pytest.raises(Exception):
+        engine.execute("DELETE FROM sales")
+    assert engine.execute("SELECT COUNT(*) FROM sales").rows == [(7,)]
+
+
+def test_only_validated_select_queries_execute(engine, tmp_path):
+    for sql in [
+        f"COPY (SELECT 42) TO '{tmp_path / 'out.csv'}'",
+        f"ATTACH '{tmp_path / 'x.db'}' AS x",
+        "SELECT * FROM sales; SELECT 1",
+    ]:
+        with pytest.raises(ValueError):
+            engine.execute(sql)
+        with pytest.raises(ValueError):
+            list(engine.pages(sql))
+    assert not (tmp_path / "out.csv").exists()
+    assert not (tmp_path / "x.db").exists()
+
+    if engine.backend == "sqlite":
+        with pytest.raises(Exception):
+            engine.connection.execute(f"ATTACH '{tmp_path / 'x.db'}' AS x")
+        assert not (tmp_path / "x.db").exists()
+
+
+def test_generated_sql_reports_real_row_count_and_timing(engine):
+    response = SQLQueryResponse(
+        sql_query="SELECT region, SUM(amount) FROM sales GROUP BY region",
+        explanation="Totals per region",
+        query_type="SELECT",
+        complexity="SIMPLE",
+        estimated_rows="100",
+    )
+
+    result = run_generated_sql(response, engine)
+    assert result.total_rows == 2
+    assert response.estimated_rows == "2"
+    assert response.execution_time.endswith("ms")
+
+    response.sql_query = "SELECT missing FROM sales"
+    assert run_generated_sql(response, engine) is None
+    assert response.warnings
+
+
+def test_planner_estimate_is_reported_and_caps_what_runs(engine):
+    response = SQLQueryResponse(
+        sql_query="SELECT * FROM sales",
+        explanation="Every sale",
+        query_type="SELECT",
+        complexity="SIMPLE",
+        estimated_rows="100",
+    )
+
+    result = run_generated_sql(response, engine)
+    # SQLite counts the full scan; DuckDB's estimate is only close
+    planned = result.planned_rows
+    assert planned == 7 if engine.backend == "sqlite" else planned > 0
+    assert result.to_dict()["planned_rows"] == planned
+
+    assert run_generated_sql(response, engine, max_planned_rows=1) is None
+    assert response.estimated_rows == f"~{planned}"
+    assert response.warnings == [
+        f"Query not run: its plan reads about {planned} rows, "
+        "more than the 1 allowed."
+    ]
+
+
+def test_validation_checks_the_schema_before_anything_runs(engine):
+    assert not engine.validate("SELECT * FROM orders").valid
+    assert not engine.validate("SELECT revenue FROM sales").valid
+    assert not engine.validate("SELECT 1 FROM sales; DROP TABLE sales").valid
+    assert not engine.validate("DELETE FROM sales").valid
+
+    validation = engine.validate(
+        "WITH totals AS (SELECT region, SUM(amount) AS total FROM sales "
+        "WHERE region <> 'a;b' GROUP BY region) SELECT * FROM totals"
+    )
+    assert validation.valid, validation.errors
+    assert validation.plan
+    if engine.backend == "sqlite":
+        assert not engine.tables["sales"].loaded
+        assert validation.scanned_rows == 7
+    else:
+        assert validation.estimated_rows is not None
+
+
+def test_validation_rejects_everything_but_uploaded_tables(engine):
+    for sql in [
+        "SELECT t.content FROM sales, read_text('/etc/hostname') t",
+        "SELECT * FROM sales s JOIN read_csv_auto('/etc/passwd') p ON true",
+        "SELECT * FROM (sales JOIN other ON sales.id = other.id)",
+        "SELECT * FROM sales WHERE id IN (SELECT id FROM main.secrets)",
+        "SELECT * FROM '/etc/passwd'",
+        "SELECT * FROM sales, pragma_table_info('sales')",
+    ]:
+        assert not engine.validate(sql).valid, sql
+
+    assert engine.validate(
+        "SELECT s.id FROM sales s, "
+        "(SELECT id FROM sales) t WHERE s.id = t.id AND s.id IS DISTINCT FROM 3"
+    ).valid
+
+
+def test_duckdb_cannot_touch_other_files(tmp_path):
+    if duckdb is None:
+        pytest.skip("duckdb is not installed")
+    sales = tmp_path / "sales.csv"
+    sales.write_text("id\n1\n")
+    engine = SQLEngine(backend="duckdb")
+    engine.register_table("sales", str(sales), ["id"], 1)
+    assert engine.execute("SELECT COUNT(*) FROM sales").rows == [(1,)]
+
+    with pytest.raises(Exception):
+        engine.connection.execute(f"SELECT * FROM read_text('{sales}.x')")
+    with pytest.raises(Exception):
+        engine.connection.execute(f"COPY (SELECT 42) TO '{tmp_path / 'out.csv'}'")
+    assert not (tmp_path / "out.csv").exists()
+
+    orders = tmp_path / "orders.csv"
+    orders.write_text("id\n1\n2\n")
+    engine.register_table("orders", str(orders), ["id"], 2)
+    assert engine.execute("SELECT COUNT(*) FROM orders").rows == [(2,)]
+    engine.close()